@@ -0,0 +1,71 @@
+"""Correlation backends conformance check and benchmark
+
+Calculates correlations of all correlation types by every available
+correlation backend from the block statistics of the sample images and
+compares them with the NumPy backend correlations. Reports maximal relative
+differences and calculation times. Exits with the non-zero status if any
+difference exceeds the tolerance of the block sums dtype.
+
+Usage: python -m benchmarks.correlation_backends [source image] [destination image]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.correlation_backends import CorrelationBackendsRegistry
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.models.figures.image import ImageWrapper
+
+PIECES_AMOUNTS_AND_STRIDES = ((2, 2), (8, 8), (8, 2), (32, 4))
+TOLERANCES = {np.dtype(np.int64): 1e-12, np.dtype(np.float64): 1e-12, np.dtype(np.float32): 1e-5}
+REPEATS = 5
+
+
+def measure(correlation_method, block_statistics: BlockStatistics) -> float:
+    """Return the best time of the correlations calculation in milliseconds"""
+    correlation_method(block_statistics)
+    return min(timeit.repeat(lambda: correlation_method(block_statistics), number=1, repeat=REPEATS)) * 1000
+
+
+def main(source_path: str, destination_path: str) -> bool:
+    """Print conformance and benchmark table for the given images
+
+    :return: True if all backends conform to the NumPy backend else False
+    """
+    source_matrix = ImageBuilder.get_gray_matrix(ImageWrapper(source_path).image)
+    destination_matrix = ImageBuilder.get_gray_matrix(ImageWrapper(destination_path).image)
+    height = min(source_matrix.shape[0], destination_matrix.shape[0])
+    width = min(source_matrix.shape[1], destination_matrix.shape[1])
+    backends = CorrelationBackendsRegistry.get_available_backends()
+    print(f"Available backends: {', '.join(backend.value for backend in backends)}")
+    print(f"{'pieces':>7} {'stride':>7} {'sums':>8} {'correlation type':>37} "
+          + " ".join(f"{backend.value + ', ms':>12} {'difference':>10}" for backend in backends))
+    conform = True
+    for pieces_amount, stride in PIECES_AMOUNTS_AND_STRIDES:
+        integer_statistics = BlockStatistics.from_image_matrices(
+            source_matrix[:height, :width], destination_matrix[:height, :width], pieces_amount, stride)
+        for block_statistics in (integer_statistics, integer_statistics.astype(np.float32)):
+            tolerance = TOLERANCES[block_statistics.cross_sum.dtype]
+            differences = CorrelationBackendsRegistry.get_conformance_differences(block_statistics)
+            for correlation_type in CorrelationTypes:
+                row = f"{pieces_amount:>7} {stride:>7} {block_statistics.cross_sum.dtype.name:>8} " \
+                      f"{correlation_type.correlation_type:>37}"
+                for backend in backends:
+                    correlation_method = CorrelationBackendsRegistry.get_correlation_method(
+                        correlation_type, CorrelationConfiguration(correlation_backend=backend))
+                    difference = differences[backend, correlation_type]
+                    conform &= difference <= tolerance
+                    row += f" {measure(correlation_method, block_statistics):12.3f} {difference:10.2e}"
+                print(row)
+    print("All backends conform" if conform else "Some backends don't conform")
+    return conform
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sys.exit(not main(sys.argv[1], sys.argv[2]))
+    sys.exit(not main("samples/space/2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg",
+                      "samples/space/2021-04-13T04-20-49_NGC_6188_Halpha_T-20_600s_cal_500.jpg"))
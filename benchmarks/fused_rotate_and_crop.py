@@ -0,0 +1,93 @@
+"""Fused rotate and crop benchmark
+
+Rotates the destination image back by the given angle, then finds the central
+crop of the source image in it rotated by the angle. The two stages path
+rotates and marks the whole destination image, the fused path with the pyramid
+search warps only the regions around the candidates and the found region.
+Reports time and peak traced
+memory of both paths, checks that the found regions are equal and reports the
+maximal pixel difference of the cropped images.
+
+Usage: python -m benchmarks.fused_rotate_and_crop [source image] [destination image] [angle]
+"""
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+import numpy as np
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.models.figures.image import ImageWrapper
+
+CROP_FRACTIONS = (0.25, 0.5, 0.75)
+CORRELATION_TYPE = CorrelationTypes.TM_SQDIFF_NORMED
+
+
+def two_stages(source_image: ImageWrapper, destination_image: ImageWrapper, angle: float) -> ImageWrapper:
+    """Rotate the whole destination image, find, mark and crop the source image in it"""
+    rotated_image = ImageBuilder.rotate_image(destination_image, angle)
+    image_selection = ImagesDescriber.find_image_points(source_image, rotated_image, CORRELATION_TYPE)
+    ImageBuilder.mark_found_image(rotated_image, image_selection)
+    return ImageBuilder.crop_found_image(rotated_image, image_selection)
+
+
+def fused(source_image: ImageWrapper, destination_image: ImageWrapper, angle: float) -> ImageWrapper:
+    """Find the source image in the rotated destination image and crop it by a single region warp"""
+    image_selection = ImagesDescriber.find_rotated_image_points(
+        source_image, destination_image, angle, CORRELATION_TYPE, pyramid_levels=None)
+    return ImageBuilder.rotate_and_crop_image(destination_image, angle, image_selection)
+
+
+def measure(path_function, *arguments) -> tuple[ImageWrapper, float, float]:
+    """Return result, time in milliseconds and peak traced memory in megabytes of the path"""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = path_function(*arguments)
+    elapsed_time = (time.perf_counter() - start_time) * 1000
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed_time, peak_memory / 2 ** 20
+
+
+def crop_center(image: ImageWrapper, crop_fraction: float) -> ImageWrapper:
+    """Return the central crop of the image with the given fraction of its sides"""
+    height, width = image.image.shape[:2]
+    crop_height, crop_width = int(height * crop_fraction), int(width * crop_fraction)
+    top, left = (height - crop_height) // 2, (width - crop_width) // 2
+    return ImageWrapper.create_image(
+        image.image[top:top + crop_height, left:left + crop_width].copy(), FigureType.SOURCE_IMAGE)
+
+
+def get_difference(first_image: ImageWrapper, second_image: ImageWrapper) -> Optional[int]:
+    """Return maximal pixel difference of the images with the same shape, None if their shapes differ"""
+    if first_image.image.shape != second_image.image.shape:
+        return None
+    return int(np.abs(first_image.image.astype(np.int64) - second_image.image.astype(np.int64)).max())
+
+
+def main(source_path: str, destination_path: str, angle: float):
+    """Print benchmark table for the given images"""
+    source_image = ImageWrapper(source_path, FigureType.SOURCE_IMAGE)
+    destination_image = ImageBuilder.rotate_image(
+        ImageWrapper(destination_path, FigureType.DESTINATION_IMAGE), -angle)
+    print(f"{'crop':>5} {'two stages, ms':>15} {'fused, ms':>10} {'two stages, MB':>15} {'fused, MB':>10} "
+          f"{'equal':>6} {'max difference':>15}")
+    for crop_fraction in CROP_FRACTIONS:
+        crop_image = crop_center(source_image, crop_fraction)
+        two_stages_image, two_stages_time, two_stages_memory = measure(
+            two_stages, crop_image, destination_image, angle)
+        fused_image, fused_time, fused_memory = measure(fused, crop_image, destination_image, angle)
+        difference = get_difference(two_stages_image, fused_image)
+        print(f"{crop_fraction:>5} {two_stages_time:15.1f} {fused_time:10.1f} {two_stages_memory:15.1f} "
+              f"{fused_memory:10.1f} {difference is not None!s:>6} {difference!s:>15}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        main(sys.argv[1], sys.argv[2], float(sys.argv[3]))
+    else:
+        main("samples/arduino/arduino.jpg", "samples/arduino/arduino_changed.jpg", 5.0)
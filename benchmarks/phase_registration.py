@@ -0,0 +1,101 @@
+"""Phase correlation registration benchmark
+
+Rotates the changed sample images by the known angles and registers the
+central crops of the samples in them by the current two stages path, which
+finds rotation by the ORB features and the source image by the template
+matching, and by the phase correlation registration. Reports time, angle
+error and position error of both ways. Reference position is found by the
+template matching in the destination image rotated by the reference angle,
+the failed registrations are reported as errors.
+
+Usage: python -m benchmarks.phase_registration [crop fraction] [angle ...]
+"""
+import sys
+import time
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.features_cache import FeaturesCache
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.images.phase_correlation_registrator import PhaseCorrelationRegistrator
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.models.image_selected_region import ImageSelectedRegion
+
+# Samples with the angle to rotate the changed image by to align it with the source one, angles are measured by the
+# best normed correlation coefficient of the central source half over 0.01 degree steps. White noise images have no
+# common content, so the first one is registered in its own rotated copies.
+SAMPLES = (
+    ("samples/arduino/arduino.jpg", "samples/arduino/arduino_changed.jpg", 29.26),
+    ("samples/raspberry/raspberry_small.png", "samples/raspberry/raspberry_small_changed.png", 0.0),
+    ("samples/raspberry_with_noise/raspberry_small_noise_10.png",
+     "samples/raspberry_with_noise/raspberry_small_changed_noise_10.png", 0.0),
+    ("samples/space/2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg",
+     "samples/space/2021-04-13T04-20-49_NGC_6188_Halpha_T-20_600s_cal_500.jpg", 0.16),
+    ("samples/noise/white_noise_100_1.png", "samples/noise/white_noise_100_1.png", 0.0),
+)
+ANGLES = (7.0, -20.0, 135.0)
+CORRELATION_TYPE = CorrelationTypes.TM_SQDIFF_NORMED
+# Correlation coefficient is not biased by the black corners of the rotated images
+REFERENCE_CORRELATION_TYPE = CorrelationTypes.TM_CCOEFF_NORMED
+
+
+def two_stages(source_image: ImageWrapper, destination_image: ImageWrapper) -> tuple[float, ImageSelectedRegion]:
+    """Register the images by the ORB rotation finding and template matching"""
+    angle, _ = ImagesDescriber.find_rotation_angle(source_image, destination_image)
+    rotated_image = ImageBuilder.rotate_image(destination_image, angle)
+    return angle, ImagesDescriber.find_image_points(source_image, rotated_image, CORRELATION_TYPE)
+
+
+def crop_center(image: ImageWrapper, crop_fraction: float) -> ImageWrapper:
+    """Return the central crop of the image with the given fraction of its sides"""
+    height, width = image.image.shape[:2]
+    crop_height, crop_width = int(height * crop_fraction), int(width * crop_fraction)
+    top, left = (height - crop_height) // 2, (width - crop_width) // 2
+    return ImageWrapper.create_image(
+        image.image[top:top + crop_height, left:left + crop_width].copy(), FigureType.SOURCE_IMAGE)
+
+
+def measure(registration_function, source_image: ImageWrapper, destination_image: ImageWrapper,
+            reference: tuple[float, ImageSelectedRegion]) -> tuple[float, str, str]:
+    """Return registration time in milliseconds, angle and position errors or the error name if registration failed"""
+    start_time = time.perf_counter()
+    try:
+        angle, region = registration_function(source_image, destination_image)
+    except Exception as error:  # pylint: disable=broad-except
+        return (time.perf_counter() - start_time) * 1000, type(error).__name__, "-"
+    elapsed_time = (time.perf_counter() - start_time) * 1000
+    reference_angle, reference_region = reference
+    angle_error = abs(180.0 - (180.0 - angle + reference_angle) % 360.0)
+    position_error = max(abs(region.x_1 - reference_region.x_1), abs(region.y_1 - reference_region.y_1))
+    return elapsed_time, f"{angle_error:.3f}", str(position_error)
+
+
+def main(crop_fraction: float, angles: tuple[float, ...]):
+    """Print benchmark table for the bundled samples"""
+    FeaturesCache.configure(0)
+    print(f"{'sample':>20} {'angle':>6} {'two stages, ms':>15} {'error, deg':>11} {'error, px':>10} "
+          f"{'phase, ms':>10} {'error, deg':>11} {'error, px':>10}")
+    for source_path, destination_path, sample_angle in SAMPLES:
+        source_image = crop_center(ImageWrapper(source_path, FigureType.SOURCE_IMAGE), crop_fraction)
+        changed_image = ImageWrapper(destination_path, FigureType.DESTINATION_IMAGE)
+        for angle in angles:
+            destination_image = ImageBuilder.rotate_image(changed_image, angle)
+            # Rotations around the same center are added, so the rotated changed image is aligned by their difference
+            reference_angle = sample_angle - angle
+            reference_region = ImagesDescriber.find_image_points(
+                source_image, ImageBuilder.rotate_image(destination_image, reference_angle), REFERENCE_CORRELATION_TYPE,
+                pyramid_levels=0)
+            reference = (reference_angle, reference_region)
+            two_stages_time, two_stages_angle_error, two_stages_position_error = measure(
+                two_stages, source_image, destination_image, reference)
+            phase_time, phase_angle_error, phase_position_error = measure(
+                PhaseCorrelationRegistrator.register, source_image, destination_image, reference)
+            print(f"{source_path.split('/')[1]:>20} {angle:6.1f} {two_stages_time:15.1f} {two_stages_angle_error:>11} "
+                  f"{two_stages_position_error:>10} {phase_time:10.1f} {phase_angle_error:>11} "
+                  f"{phase_position_error:>10}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.6,
+         tuple(float(angle) for angle in sys.argv[2:]) or ANGLES)
@@ -0,0 +1,55 @@
+"""Process pool benchmark
+
+Compares time of the correlation map calculation of the random images in the
+process pool and in the thread pool. The first process pool build includes
+the worker processes start, the next builds reuse the started workers. Images
+smaller than the process pixels threshold are calculated in the current
+process.
+
+Usage: python -m benchmarks.process_pool [workers amount]
+"""
+import sys
+import time
+
+import numpy as np
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.correlation.band_correlation_builder import (
+    ProcessPoolCorrelationBuilder, ThreadPoolCorrelationBuilder)
+
+CORRELATION_TYPE = CorrelationTypes.TM_CCOEFF_NORMED
+IMAGE_SIDES = (512, 2048, 4096)
+REPEATS = 3
+
+
+def measure(builder, source_matrix: np.ndarray, destination_matrix: np.ndarray) -> list[float]:
+    """Return times of the repeated correlation map builds in seconds"""
+    times = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        builder.build(source_matrix, destination_matrix)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def main(workers_count: int):
+    """Print benchmark table for the random images"""
+    configuration = CorrelationConfiguration(
+        correlation_processes_count=workers_count, correlation_threads_count=workers_count)
+    random_generator = np.random.default_rng(0)
+    print(f"{workers_count} workers, process pixels threshold = "
+          f"{ProcessPoolCorrelationBuilder.PROCESS_PIXELS_THRESHOLD}")
+    print(f"{'side':>6} {'processes first, s':>19} {'processes next, s':>18} {'threads, s':>11}")
+    for side in IMAGE_SIDES:
+        source_matrix = random_generator.random((side, side), dtype=np.float32)
+        destination_matrix = random_generator.random((side, side), dtype=np.float32)
+        process_times = measure(
+            ProcessPoolCorrelationBuilder(CORRELATION_TYPE, configuration), source_matrix, destination_matrix)
+        thread_times = measure(
+            ThreadPoolCorrelationBuilder(CORRELATION_TYPE, configuration), source_matrix, destination_matrix)
+        print(f"{side:>6} {process_times[0]:19.4f} {min(process_times[1:]):18.4f} {min(thread_times):11.4f}")
+    ProcessPoolCorrelationBuilder.shutdown_executors()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,54 @@
+"""Pyramid refinement benchmark
+
+Compares time of the full correlation map calculation and the coarse-to-fine
+calculation with the selective refinement on the sample images. Reports the
+refined blocks fraction and the fraction of the blocks crossing the threshold
+in the full map which were not refined.
+
+Usage: python -m benchmarks.pyramid_refinement [source image] [destination image] [threshold]
+"""
+import sys
+import timeit
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.image import ImageWrapper
+
+CORRELATION_TYPE = CorrelationTypes.TM_SQDIFF_NORMED
+PIECES_AMOUNTS_AND_STRIDES = ((2, 0), (8, 0), (8, 2), (16, 4))
+REPEATS = 3
+
+
+def measure(correlation_map: CorrelationMap) -> float:
+    """Return the best time of the correlation map building in seconds"""
+    return min(timeit.repeat(correlation_map.build_correlation_map, number=1, repeat=REPEATS))
+
+
+def main(source_path: str, destination_path: str, threshold: float):
+    """Print benchmark table for the given images"""
+    source_image = ImageWrapper(source_path)
+    destination_image = ImageWrapper(destination_path)
+    print(f"{CORRELATION_TYPE.correlation_type}, refinement threshold = {threshold}")
+    print(f"{'pieces':>7} {'stride':>7} {'full, s':>9} {'pyramid, s':>11} {'speedup':>8} {'refined':>8} {'missed':>7}")
+    for pieces_amount, stride in PIECES_AMOUNTS_AND_STRIDES:
+        configuration = CorrelationConfiguration(
+            correlation_pieces_count=pieces_amount, correlation_pieces_stride=stride)
+        full_map = CorrelationMap(source_image, destination_image, CORRELATION_TYPE, configuration)
+        full_time = measure(full_map)
+
+        configuration.refinement_threshold = threshold
+        pyramid_map = CorrelationMap(source_image, destination_image, CORRELATION_TYPE, configuration)
+        pyramid_time = measure(pyramid_map)
+
+        crossing_blocks = full_map.correlation_grid > threshold
+        missed_blocks = crossing_blocks & (pyramid_map.correlation_grid != full_map.correlation_grid)
+        missed_fraction = missed_blocks.sum() / max(crossing_blocks.sum(), 1)
+        print(f"{pieces_amount:>7} {stride or pieces_amount:>7} {full_time:9.3f} {pyramid_time:11.3f} "
+              f"{full_time / pyramid_time:8.2f} {pyramid_map.refined_fraction:8.1%} {missed_fraction:7.1%}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        main(sys.argv[1], sys.argv[2], float(sys.argv[3]))
+    else:
+        main("samples/raspberry/raspberry_small.png", "samples/raspberry/raspberry_small_changed.png", 1e-3)
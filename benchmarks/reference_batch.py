@@ -0,0 +1,67 @@
+"""Reference batch benchmark
+
+Compares throughput of comparing one reference image against many destination
+images pair by pair by the correlation map pipeline and by the reference
+batch comparator with the precalculated reference features and block sums.
+Reports pairs per second of both ways and checks that the maps are equal.
+
+Usage: python -m benchmarks.reference_batch [source image] [destination image] [pairs amount]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from correlation_map.core.config.correlation import CorrelationConfiguration
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.correlation.correlation_map_pipeline_builder import CorrelationMapPipelineBuilder
+from correlation_map.core.correlation.reference_batch_comparator import ReferenceBatchComparator
+from correlation_map.core.correlation.reference_template import ReferenceTemplate
+from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.figure_container import FigureContainer
+from correlation_map.core.models.figures.image import ImageWrapper
+
+PIECES_AMOUNTS_AND_STRIDES = ((2, 0), (8, 0), (8, 2))
+
+
+def compare_pair(source_path: str, destination_path: str, configuration: CorrelationConfiguration) -> CorrelationMap:
+    """Compare the images pair by the correlation map pipeline"""
+    FigureContainer.add(ImageWrapper(source_path, FigureType.SOURCE_IMAGE))
+    FigureContainer.add(ImageWrapper(destination_path, FigureType.DESTINATION_IMAGE))
+    for _ in CorrelationMapPipelineBuilder(configuration).start_correlation_building_pipeline():
+        pass
+    return FigureContainer.get(FigureType.CORRELATION_MAP)
+
+
+def main(source_path: str, destination_path: str, pairs_amount: int):
+    """Print benchmark table for the given images"""
+    destination_paths = [destination_path] * pairs_amount
+    print(f"{pairs_amount} pairs, pairs per second")
+    print(f"{'pieces':>7} {'stride':>7} {'pairwise':>9} {'batch':>9} {'speedup':>8} {'equal':>6}")
+    for pieces_amount, stride in PIECES_AMOUNTS_AND_STRIDES:
+        configuration = CorrelationConfiguration(
+            auto_rotate=True, auto_find=True, correlation_pieces_count=pieces_amount,
+            correlation_pieces_stride=stride)
+        start_time = time.perf_counter()
+        pairwise_maps = [compare_pair(source_path, path, configuration) for path in destination_paths]
+        pairwise_speed = pairs_amount / (time.perf_counter() - start_time)
+
+        with tempfile.TemporaryDirectory() as directory:
+            template_path = os.path.join(directory, "reference.npz")
+            ReferenceTemplate.from_image(ImageWrapper(source_path), configuration).save(template_path)
+            comparator = ReferenceBatchComparator(ReferenceTemplate.load(template_path), configuration)
+            batch_maps = [correlation_map for _, correlation_map in comparator.compare_files(destination_paths)]
+
+        equal = all(np.array_equal(pairwise_map.correlation_grid, batch_map.correlation_grid)
+                    for pairwise_map, batch_map in zip(pairwise_maps, batch_maps))
+        print(f"{pieces_amount:>7} {stride or pieces_amount:>7} {pairwise_speed:9.2f} "
+              f"{comparator.pairs_per_second:9.2f} {comparator.pairs_per_second / pairwise_speed:8.2f} {equal!s:>6}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        main(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+    else:
+        main("samples/arduino/arduino.jpg", "samples/arduino/arduino_changed.jpg", 10)
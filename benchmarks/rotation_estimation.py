@@ -0,0 +1,55 @@
+"""Rotation estimation benchmark
+
+Rotates the source image by the known angles and estimates the rotation back
+by the current cross-checked brute force matching with homography and by the
+configurable features matchers. Reports the mean estimation time and the
+maximal angle error of every matching configuration. Features cache is
+disabled, so the features detection is measured too.
+
+Usage: python -m benchmarks.rotation_estimation [source image]
+"""
+import sys
+import time
+
+from correlation_map.core.config.correlation import FeaturesMatchers, RotationEstimators
+from correlation_map.core.images.features_cache import FeaturesCache
+from correlation_map.core.images.features_matcher import FeaturesMatcher
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.models.figures.image import ImageWrapper
+
+ANGLES = (-30.0, -7.5, -1.0, 0.5, 3.0, 15.0, 45.0)
+MATCHING_CONFIGURATIONS = (
+    ("current", 500, FeaturesMatcher()),
+    ("bf knn, affine", 500, FeaturesMatcher(FeaturesMatchers.BRUTE_FORCE_KNN, 0.75,
+                                            RotationEstimators.PARTIAL_AFFINE, 500)),
+    ("flann lsh, affine", 500, FeaturesMatcher(FeaturesMatchers.FLANN_LSH, 0.75,
+                                               RotationEstimators.PARTIAL_AFFINE, 500)),
+    ("bf knn, affine", 2000, FeaturesMatcher(FeaturesMatchers.BRUTE_FORCE_KNN, 0.75,
+                                             RotationEstimators.PARTIAL_AFFINE, 500)),
+    ("flann lsh, affine", 2000, FeaturesMatcher(FeaturesMatchers.FLANN_LSH, 0.75,
+                                                RotationEstimators.PARTIAL_AFFINE, 500)),
+)
+
+
+def main(source_path: str):
+    """Print benchmark table for the given image"""
+    FeaturesCache.configure(0)
+    source_image = ImageWrapper(source_path)
+    rotated_images = [(angle, ImageBuilder.rotate_image(source_image, angle)) for angle in ANGLES]
+    print(f"{len(ANGLES)} rotations from {min(ANGLES)} to {max(ANGLES)} degrees")
+    print(f"{'matching':>18} {'features':>9} {'time, ms':>9} {'max error, deg':>15}")
+    for name, features_count, features_matcher in MATCHING_CONFIGURATIONS:
+        errors = []
+        start_time = time.perf_counter()
+        for angle, rotated_image in rotated_images:
+            # Rotating the destination image by the estimated angle must turn it back to the source one
+            estimated_angle, _ = ImagesDescriber.find_rotation_angle(
+                source_image, rotated_image, features_matcher=features_matcher, features_count=features_count)
+            errors.append(abs(estimated_angle + angle))
+        mean_time = (time.perf_counter() - start_time) / len(rotated_images) * 1000
+        print(f"{name:>18} {features_count:>9} {mean_time:9.1f} {max(errors):15.3f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "samples/arduino/arduino.jpg")
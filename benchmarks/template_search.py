@@ -0,0 +1,56 @@
+"""Template search benchmark
+
+Searches the central crops of the bundled sample images in the changed sample
+images by the exhaustive full resolution template matching and by the
+coarse-to-fine pyramid search. Reports time of both searches and checks that
+the found image regions are equal.
+
+Usage: python -m benchmarks.template_search [crop fraction]
+"""
+import sys
+import time
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.models.figures.image import ImageWrapper
+
+SAMPLES = (
+    ("samples/arduino/arduino.jpg", "samples/arduino/arduino_changed.jpg"),
+    ("samples/raspberry/raspberry_small.png", "samples/raspberry/raspberry_small_changed.png"),
+    ("samples/raspberry_with_noise/raspberry_small_noise_10.png",
+     "samples/raspberry_with_noise/raspberry_small_changed_noise_10.png"),
+    ("samples/space/2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg",
+     "samples/space/2021-04-13T04-20-49_NGC_6188_Halpha_T-20_600s_cal_500.jpg"),
+)
+CORRELATION_TYPES = (
+    CorrelationTypes.TM_SQDIFF_NORMED, CorrelationTypes.TM_CCORR_NORMED, CorrelationTypes.TM_CCOEFF_NORMED)
+
+
+def main(crop_fraction: float):
+    """Print benchmark table for the bundled samples"""
+    print(f"{'sample':>24} {'correlation':>36} {'levels':>7} {'exhaustive, s':>14} {'pyramid, s':>11} {'equal':>6}")
+    for source_path, destination_path in SAMPLES:
+        source_image = ImageWrapper(source_path, FigureType.SOURCE_IMAGE)
+        destination_image = ImageWrapper(destination_path, FigureType.DESTINATION_IMAGE)
+        height, width = source_image.image.shape[:2]
+        crop_height, crop_width = int(height * crop_fraction), int(width * crop_fraction)
+        top, left = (height - crop_height) // 3, (width - crop_width) // 3
+        source_image = ImageWrapper.create_image(
+            source_image.image[top:top + crop_height, left:left + crop_width].copy(), FigureType.SOURCE_IMAGE)
+        levels = ImagesDescriber.get_template_search_levels(crop_height, crop_width)
+        for correlation_type in CORRELATION_TYPES:
+            start_time = time.perf_counter()
+            exhaustive_region = ImagesDescriber.find_image_points(
+                source_image, destination_image, correlation_type, pyramid_levels=0)
+            exhaustive_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            pyramid_region = ImagesDescriber.find_image_points(
+                source_image, destination_image, correlation_type, pyramid_levels=None)
+            pyramid_time = time.perf_counter() - start_time
+            print(f"{source_path.split('/')[1]:>24} {correlation_type.correlation_type:>36} {levels:>7} "
+                  f"{exhaustive_time:14.4f} {pyramid_time:11.4f} {exhaustive_region == pyramid_region!s:>6}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.5)
@@ -1,9 +1,10 @@
 """Contains variables and config for correlation"""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
 import cv2
+import numpy as np
 
 from correlation_map.gui.core.figure_widgets.image_with_selector_widget import ImageSelectedRegion
 
@@ -28,6 +29,77 @@ class CorrelationTypes(Enum):
         self.correlation_cv2_type = correlation_cv2_type
         self.is_default = is_default
 
+    @property
+    def is_lower_better(self) -> bool:
+        """Return True if the lower correlation value means the more similar pieces else False"""
+        return self in (CorrelationTypes.TM_SQDIFF, CorrelationTypes.TM_SQDIFF_NORMED)
+
+
+class ComputePrecision(Enum):
+    """Contains available floating point precisions of the correlation calculations"""
+
+    FLOAT32 = "float32"
+    FLOAT64 = "float64"
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Return numpy dtype of the precision"""
+        return np.dtype(self.value)
+
+
+class GrayConversionModes(Enum):
+    """Contains available conversions of the RGB images to the gray matrices and their channels weights"""
+
+    MEAN = "mean", (1 / 3, 1 / 3, 1 / 3)
+    REC_601 = "rec. 601 luma", (0.299, 0.587, 0.114)
+    REC_709 = "rec. 709 luma", (0.2126, 0.7152, 0.0722)
+
+    def __init__(self, conversion: str, channels_weights: tuple[float, float, float]):
+        """
+        :param conversion: gray conversion name
+        :param channels_weights: weights of the red, green and blue channels
+        """
+        self.conversion = conversion
+        self.channels_weights = channels_weights
+
+
+class CorrelationBackends(Enum):
+    """Contains available implementations of the block correlation calculations"""
+
+    NUMPY = "numpy"
+    OPENCV = "opencv"
+    NUMBA = "numba"
+
+
+class EdgeBlocksModes(Enum):
+    """Contains available ways to compare image edges that are not covered by the whole blocks"""
+
+    DROP = "drop partial edge blocks"
+    PAD = "pad edge blocks with zeros"
+    REDUCED = "reduce edge blocks to the image"
+
+
+class FrameReferenceMode(Enum):
+    """Contains available references to compare frames of the frame sequence with"""
+
+    PREVIOUS_FRAME = "previous frame"
+    FIXED_REFERENCE = "fixed reference"
+
+
+class FeaturesMatchers(Enum):
+    """Contains available strategies to match ORB descriptors of the images"""
+
+    BRUTE_FORCE_CROSS_CHECK = "cross-checked brute force"
+    BRUTE_FORCE_KNN = "brute force kNN with ratio test"
+    FLANN_LSH = "FLANN LSH kNN with ratio test"
+
+
+class RotationEstimators(Enum):
+    """Contains available transformations to estimate rotation angle by the matched key points"""
+
+    HOMOGRAPHY = "homography"
+    PARTIAL_AFFINE = "partial affine"
+
 
 class PreprocessorActions(Enum):
     """Contains all available preprocessor actions"""
@@ -35,6 +107,14 @@ class PreprocessorActions(Enum):
     AUTO_ROTATION = "auto rotation"
     AUTO_FIND = "auto find"
     CHOSE_IMPORTANT_PART = "chose important part"
+    PHASE_REGISTRATION = "phase correlation registration"
+
+
+class ColorCorrelationMaps(Enum):
+    """Contains all available correlation maps of the image colour channels"""
+
+    CHANNEL_MAPS = "red, green and blue channels maps"
+    COMBINED_CHANNELS_MAP = "combined channels map"
 
 
 class CorrelationSettings(Enum):
@@ -42,6 +122,12 @@ class CorrelationSettings(Enum):
 
     DETECTION_MATCH_COUNT = "detections match amount", 5
     CORRELATION_PIECES_COUNT = "correlation pieces amount", 2
+    CORRELATION_PIECES_WIDTH = "correlation pieces width", 0
+    CORRELATION_PIECES_STRIDE = "correlation pieces stride", 0
+    CORRELATION_PROCESSES_COUNT = "correlation processes amount", 1
+    CORRELATION_THREADS_COUNT = "correlation threads amount", 1
+    STREAMING_BLOCK_ROWS = "streaming block rows", 0
+    BLOCK_SUMS_CACHE_BASE = "block sums cache base", 0
 
     def __init__(self, setting: str, default_value: int):
         """
@@ -53,19 +139,115 @@ class CorrelationSettings(Enum):
 
 
 @dataclass(kw_only=True)
-class CorrelationConfiguration:
+class CorrelationConfiguration:  # pylint: disable=too-many-instance-attributes
     """Contains correlation configuration for building correlation map"""
     # Preprocessor actions
     auto_rotate: bool = False
     auto_find: bool = False
     chose_important_part: bool = False
+    # Find rotation and position of the source image by phase correlation instead of auto rotation and finding
+    phase_registration: bool = False
 
     correlation_type: CorrelationTypes = CorrelationTypes.TM_SQDIFF_NORMED
+    # Correlation types to build additional maps with in the same pass
+    additional_correlation_types: list[CorrelationTypes] = field(default_factory=list)
+
+    # Build correlation maps of the red, green and blue image channels from a single pass over the images
+    channel_maps: bool = False
+    # Build correlation map comparing blocks as the whole colour vectors of all channels
+    combined_channels_map: bool = False
+
+    # Precision of the correlations calculations and correlation map arrays
+    compute_precision: ComputePrecision = ComputePrecision.FLOAT64
+    # Conversion of the RGB images to the gray matrices to compare
+    gray_conversion: GrayConversionModes = GrayConversionModes.MEAN
+    # Dtype of the gray matrices, the image dtype is kept if it's not set
+    gray_dtype: Optional[np.dtype] = None
+
+    # Implementation of the block correlations calculations, CORRELATION_BACKEND variable or NumPy if it's not set
+    correlation_backend: Optional[CorrelationBackends] = None
+    # Implementations of the block correlations calculations of the specific correlation types
+    correlation_type_backends: dict[CorrelationTypes, CorrelationBackends] = field(default_factory=dict)
+
+    # Crop the found source image region of the rotated destination by a single warp of the region only, the source
+    # image is searched on at least one downscaled pyramid level, so the destination isn't rotated at full resolution
+    fused_rotate_and_crop: bool = False
+
+    # Auto find configuration
+    # Amount of the downscaled pyramid levels to search the source image on, 0 searches it in the whole destination
+    # at full resolution, levels are chosen by the source image size if it's not set
+    template_search_pyramid_levels: Optional[int] = None
 
     # Auto rotate configuration
     detection_match_count: int = CorrelationSettings.DETECTION_MATCH_COUNT.default_value
+    # Maximal amount of the ORB key points detected on every image
+    orb_features_count: int = 500
+    # Strategy to match ORB descriptors of the images with
+    features_matcher: FeaturesMatchers = FeaturesMatchers.BRUTE_FORCE_CROSS_CHECK
+    # Maximal ratio of the best and the second best match distances of the kNN features matchers
+    matches_ratio: float = 0.75
+    # Transformation to estimate rotation angle by the matched key points
+    rotation_estimator: RotationEstimators = RotationEstimators.HOMOGRAPHY
+    # Maximal amount of the RANSAC iterations to estimate rotation with
+    ransac_max_iterations: int = 2000
+    # Amount of the images features kept in memory to skip features detection of the same images
+    features_cache_size: int = 8
+    # Directory to store detected images features in, features are kept in memory only if it's not set
+    features_cache_directory: Optional[str] = None
     # Correlation configuration
     correlation_pieces_count: int = CorrelationSettings.CORRELATION_PIECES_COUNT.default_value
+    # Width of the pieces, pieces count is their height then. 0 means equal to pieces count, so pieces are square
+    correlation_pieces_width: int = CorrelationSettings.CORRELATION_PIECES_WIDTH.default_value
+    # Step between neighbour pieces. Pieces overlap if it's less than pieces count, 0 means equal to pieces count
+    correlation_pieces_stride: int = CorrelationSettings.CORRELATION_PIECES_STRIDE.default_value
+    # Comparison of the image edges that are not covered by the whole pieces
+    edge_blocks_mode: EdgeBlocksModes = EdgeBlocksModes.DROP
+    # Amount of processes to build correlation map in parallel
+    correlation_processes_count: int = CorrelationSettings.CORRELATION_PROCESSES_COUNT.default_value
+    # Amount of threads to build correlation map and process large images in parallel
+    correlation_threads_count: int = CorrelationSettings.CORRELATION_THREADS_COUNT.default_value
+    # Amount of block rows in the image strip to build correlation map out of core, 0 builds it in memory
+    streaming_block_rows: int = CorrelationSettings.STREAMING_BLOCK_ROWS.default_value
+    # Directory to create run directories of the memory mapped correlation map arrays in, temporary directory is used
+    # if it's not set. Run directory is removed with the correlation map.
+    streaming_directory: Optional[str] = None
+    # Base block size of the cached block sums to reuse them for other pieces amounts, 0 disables the cache
+    block_sums_cache_base: int = CorrelationSettings.BLOCK_SUMS_CACHE_BASE.default_value
+    # Coarse blocks with scores crossing this threshold are refined, hierarchical mode is off if it's not set.
+    # Other blocks keep the coarse scores, which approximate the fine ones and are included in the map statistics
+    refinement_threshold: Optional[float] = None
+    # Amount of pyramid levels to downsample images for the coarse correlation map
+    pyramid_levels: int = 2
+    # Pieces count of the coarse correlation map on the downsampled pyramid level
+    pyramid_pieces_count: int = 8
+    # Amount of coarse blocks around the crossing threshold ones to refine too
+    refinement_margin: int = 1
+    # Amount of the worst correlation blocks kept in the correlation map worst blocks index
+    worst_blocks_count: int = 50
+
+    # Frame sequence configuration
+    # Frame to compare every frame with, the first frame is the fixed reference if no reference image is given
+    frame_reference_mode: FrameReferenceMode = FrameReferenceMode.PREVIOUS_FRAME
+    # Maximal amount of decoded frames waiting for the correlation calculations
+    frames_queue_size: int = 8
+    # Video file or numbered images pattern to correlate frames of instead of building the destination image map
+    frame_source_path: Optional[str] = None
 
     # Chose important part configuration
     selected_image_region: Optional[ImageSelectedRegion] = None
+
+    @property
+    def pieces_shape(self) -> tuple[int, int]:
+        """Return height and width of the correlation pieces"""
+        return self.correlation_pieces_count, self.correlation_pieces_width or self.correlation_pieces_count
+
+    @property
+    def pieces_stride(self) -> tuple[int, int]:
+        """Return steps between neighbour pieces along rows and columns, pieces height and width if it's not set"""
+        pieces_height, pieces_width = self.pieces_shape
+        return self.correlation_pieces_stride or pieces_height, self.correlation_pieces_stride or pieces_width
+
+    @property
+    def is_rotate_and_crop_fused(self) -> bool:
+        """Return True if the found region of the rotated destination is cropped by a single warp else False"""
+        return self.fused_rotate_and_crop and self.auto_rotate and self.auto_find
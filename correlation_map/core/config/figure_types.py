@@ -17,7 +17,19 @@ class FigureType(Enum):
     ROTATED_IMAGE = "destination rotated image"
     FOUND_IMAGE = "destination found image"
     FOUND_AND_CROPPED = "destination found and cropped image"
+    DEFECT_REGIONS_IMAGE = "destination defect regions image"
     CORRELATION_MAP = "correlation map"
+    SQUARE_DIFFERENCE_CORRELATION_MAP = "square difference correlation map"
+    SQUARE_DIFFERENCE_NORMED_CORRELATION_MAP = "square difference normed correlation map"
+    CROSS_CORRELATION_MAP = "cross correlation map"
+    CROSS_CORRELATION_NORMED_MAP = "cross correlation normed map"
+    CORRELATION_COEFFICIENT_MAP = "correlation coefficient map"
+    CORRELATION_COEFFICIENT_NORMED_MAP = "correlation coefficient normed map"
+    RED_CHANNEL_CORRELATION_MAP = "red channel correlation map"
+    GREEN_CHANNEL_CORRELATION_MAP = "green channel correlation map"
+    BLUE_CHANNEL_CORRELATION_MAP = "blue channel correlation map"
+    COMBINED_CHANNELS_CORRELATION_MAP = "combined channels correlation map"
+    FRAME_SCORES = "frame scores"
 
     @classmethod
     def get_by_name(cls, name: str) -> Optional['FigureType']:
@@ -9,6 +9,7 @@ class EnvironmentVariables:
     APPLICATION_MODE = "MODE"
     APPLICATION_DEBUG_MODE = "DEBUG"
     APPLICATION_PROD_MODE = "PROD"
+    CORRELATION_BACKEND = "CORRELATION_BACKEND"
 
 
 class RequiredEnvironmentVariables(Enum):
@@ -0,0 +1,282 @@
+"""Band correlation builders
+
+Contains builders that split image matrices into row bands and calculate block
+statistics and correlations of the bands in parallel. Every band writes only
+its own block rows of the output, so the result is the same as the single
+band calculation.
+"""
+import abc
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Final
+
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.correlation_backends import CorrelationBackendsRegistry
+from correlation_map.core.tools.thread_tile_executor import ThreadTileExecutor, split_rows
+from correlation_map.gui.tools.logger import app_logger
+
+
+@dataclass(frozen=True)
+class SharedArrayDescription:
+    """Description of the numpy array placed in the shared memory"""
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class SharedBandTask:
+    """Task to calculate block statistics and correlations for the band of block rows in the shared memory"""
+    source: SharedArrayDescription
+    destination: SharedArrayDescription
+    output: SharedArrayDescription
+    first_row: int
+    last_row: int
+
+
+class BandCorrelationBuilder(abc.ABC):
+    """Base builder of the correlation block grid by row bands
+
+    Output array contains five block sums planes in the order of the
+    `STATISTICS_FIELDS` and the correlation plane.
+    """
+
+    STATISTICS_FIELDS: Final[tuple[str, ...]] = (
+        "source_sum", "destination_sum", "source_square_sum", "destination_square_sum", "cross_sum")
+
+    def __init__(self, correlation_type: CorrelationTypes, correlation_configuration: CorrelationConfiguration):
+        """
+        :param correlation_type: correlation type to compare pieces
+        :param correlation_configuration: correlation configuration with the
+            pieces amount, stride, edge blocks mode and parallel workers amount
+        """
+        self.correlation_type = correlation_type
+        self.pieces_amount = correlation_configuration.pieces_shape
+        self.stride = correlation_configuration.pieces_stride
+        self.edge_mode = correlation_configuration.edge_blocks_mode
+        self.compute_dtype = correlation_configuration.compute_precision.dtype
+        self.correlation_method = CorrelationBackendsRegistry.get_correlation_method(
+            correlation_type, correlation_configuration)
+
+    @abc.abstractmethod
+    def build(self, source_matrix: ndarray, destination_matrix: ndarray) -> tuple[BlockStatistics, ndarray]:
+        """Calculate block statistics and correlation grid of the given image matrices
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix with
+            the same shape as the source one
+        :return: block statistics and correlation block grid
+        """
+
+    def get_output_shape(self, matrix_shape: tuple[int, int]) -> tuple[int, int, int]:
+        """Return shape of the output array for the image matrix with the given shape"""
+        rows, columns = BlockStatistics.get_grid_shape(*matrix_shape, self.pieces_amount, self.stride, self.edge_mode)
+        return len(self.STATISTICS_FIELDS) + 1, rows, columns
+
+    def calculate_band(self, source_matrix: ndarray, destination_matrix: ndarray, output: ndarray,
+                       band: tuple[int, int]):
+        """Calculate block statistics and correlations of the band and write them to the output
+
+        :param source_matrix: whole source grayscale image matrix
+        :param destination_matrix: whole destination grayscale image matrix
+        :param output: whole output array to write band results in
+        :param band: first and last (excluded) block rows of the band
+        """
+        top, bottom = self.get_covered_image_range(band)
+        block_statistics = BlockStatistics.from_image_matrices(
+            source_matrix[top:bottom], destination_matrix[top:bottom], self.pieces_amount, self.stride,
+            self.edge_mode)
+        self.write_band(block_statistics, output, band)
+
+    def get_covered_image_range(self, band: tuple[int, int], axis: int = 0) -> tuple[int, int]:
+        """Return first and last (excluded) image rows or columns covered by the given block rows or columns
+
+        :param band: first and last (excluded) block rows or columns
+        :param axis: 0 for the block rows, 1 for the block columns
+        :return: first and last (excluded) image rows or columns
+        """
+        first_row, last_row = band
+        return first_row * self.stride[axis], (last_row - 1) * self.stride[axis] + self.pieces_amount[axis]
+
+    def write_band(self, block_statistics: BlockStatistics, output: ndarray, band: tuple[int, int]):
+        """Write block statistics and correlations of the band to the output
+
+        :param block_statistics: block statistics of the band
+        :param output: whole output array to write band results in
+        :param band: first and last (excluded) block rows of the band
+        """
+        first_row, last_row = band
+        block_statistics = block_statistics.to_calculation_dtype(self.compute_dtype)
+        for plane_number, statistics_field in enumerate(self.STATISTICS_FIELDS):
+            output[plane_number, first_row:last_row] = getattr(block_statistics, statistics_field)
+        output[-1, first_row:last_row] = self.correlation_method(block_statistics)
+
+    def split_output(self, output: ndarray, matrix_shape: tuple[int, int]) -> tuple[BlockStatistics, ndarray]:
+        """Split output array into block statistics and correlation grid
+
+        :param output: whole output array
+        :param matrix_shape: shape of the image matrices to count pixels of
+            the edge blocks
+        :return: block statistics and correlation block grid
+        """
+        block_statistics = BlockStatistics(
+            **dict(zip(self.STATISTICS_FIELDS, output)),
+            pixels_count=BlockStatistics.get_pixels_count(
+                *matrix_shape, self.pieces_amount, self.stride, self.edge_mode))
+        return block_statistics, output[-1]
+
+
+class ThreadPoolCorrelationBuilder(BandCorrelationBuilder):
+    """Build correlation block grid by bands in the thread pool"""
+
+    def __init__(self, correlation_type: CorrelationTypes, correlation_configuration: CorrelationConfiguration):
+        super().__init__(correlation_type, correlation_configuration)
+        self.threads_count = correlation_configuration.correlation_threads_count
+
+    def build(self, source_matrix: ndarray, destination_matrix: ndarray) -> tuple[BlockStatistics, ndarray]:
+        output = np.zeros(self.get_output_shape(source_matrix.shape), dtype=self.compute_dtype)
+        app_logger.debug("Calculating bands of the correlation map in %s threads", self.threads_count)
+        ThreadTileExecutor(self.threads_count).map_row_bands(
+            lambda first_row, last_row: self.calculate_band(
+                source_matrix, destination_matrix, output, (first_row, last_row)),
+            output.shape[1])
+        return self.split_output(output, source_matrix.shape)
+
+
+class ProcessPoolCorrelationBuilder(BandCorrelationBuilder):
+    """Build correlation block grid by bands in the process pool
+
+    Image matrices and output are passed through the shared memory, so images
+    are never pickled per task, and workers write straight into the output.
+    Workers are started by the fork server where it's available, because
+    forking the process with running Numba or OpenCV worker threads may
+    deadlock the workers.
+
+    Starting the worker processes takes seconds, so the process pool is
+    created once per processes amount and reused by all builders. Processes
+    help only for the large images whose calculation takes longer than
+    copying them to the shared memory, images with fewer pixels than the
+    `PROCESS_PIXELS_THRESHOLD` are calculated in the current process.
+    """
+
+    BANDS_PER_PROCESS: Final[int] = 4
+    # Minimal amount of the image pixels to calculate the correlation map in the worker processes
+    PROCESS_PIXELS_THRESHOLD: Final[int] = 1 << 22
+
+    _executors: dict[int, ProcessPoolExecutor] = {}
+    _executors_lock = threading.Lock()
+
+    def __init__(self, correlation_type: CorrelationTypes, correlation_configuration: CorrelationConfiguration):
+        super().__init__(correlation_type, correlation_configuration)
+        self.processes_count = correlation_configuration.correlation_processes_count
+
+    def build(self, source_matrix: ndarray, destination_matrix: ndarray) -> tuple[BlockStatistics, ndarray]:
+        output_shape = self.get_output_shape(source_matrix.shape)
+        if source_matrix.size < self.PROCESS_PIXELS_THRESHOLD:
+            app_logger.debug("Calculating correlation map of %s pixels in the current process", source_matrix.size)
+            output = np.zeros(output_shape, dtype=self.compute_dtype)
+            self.calculate_band(source_matrix, destination_matrix, output, (0, output_shape[1]))
+            return self.split_output(output, source_matrix.shape)
+        shared_memories: list[SharedMemory] = []
+        try:
+            source = self._share_array(source_matrix, shared_memories)
+            destination = self._share_array(destination_matrix, shared_memories)
+            output = self._share_array(np.zeros(output_shape, dtype=self.compute_dtype), shared_memories)
+            tasks = [SharedBandTask(source, destination, output, first_row, last_row) for first_row, last_row
+                     in split_rows(output_shape[1], self.processes_count * self.BANDS_PER_PROCESS)]
+            app_logger.debug("Calculating %s bands of the correlation map in %s processes",
+                             len(tasks), self.processes_count)
+            executor = self.get_executor(self.processes_count)
+            try:
+                list(executor.map(self.calculate_shared_band, tasks))
+            except BrokenProcessPool:
+                self._discard_executor(self.processes_count, executor)
+                raise
+            output_array = np.ndarray(output_shape, dtype=self.compute_dtype, buffer=shared_memories[-1].buf).copy()
+        finally:
+            for shared_memory in shared_memories:
+                shared_memory.close()
+                shared_memory.unlink()
+        return self.split_output(output_array, source_matrix.shape)
+
+    @classmethod
+    def get_executor(cls, processes_count: int) -> ProcessPoolExecutor:
+        """Return process pool with the given amount of workers, create it on the first call
+
+        :param processes_count: amount of the worker processes
+        :return: shared process pool executor
+        """
+        with cls._executors_lock:
+            if processes_count not in cls._executors:
+                cls._executors[processes_count] = ProcessPoolExecutor(
+                    max_workers=processes_count, mp_context=cls._get_context())
+            return cls._executors[processes_count]
+
+    @classmethod
+    def _discard_executor(cls, processes_count: int, executor: ProcessPoolExecutor):
+        """Forget the broken process pool, so the next build starts new worker processes
+
+        :param processes_count: amount of the worker processes of the pool
+        :param executor: broken process pool executor
+        """
+        with cls._executors_lock:
+            if cls._executors.get(processes_count) is executor:
+                del cls._executors[processes_count]
+        executor.shutdown(wait=False)
+
+    @classmethod
+    def shutdown_executors(cls):
+        """Stop worker processes of all created process pools"""
+        with cls._executors_lock:
+            for executor in cls._executors.values():
+                executor.shutdown()
+            cls._executors.clear()
+
+    def calculate_shared_band(self, task: SharedBandTask):
+        """Calculate block statistics and correlations of the band placed in the shared memory
+
+        :param task: band task with the shared arrays descriptions
+        """
+        source_memory = SharedMemory(task.source.name)
+        destination_memory = SharedMemory(task.destination.name)
+        output_memory = SharedMemory(task.output.name)
+        try:
+            source_matrix = np.ndarray(task.source.shape, dtype=task.source.dtype, buffer=source_memory.buf)
+            destination_matrix = np.ndarray(
+                task.destination.shape, dtype=task.destination.dtype, buffer=destination_memory.buf)
+            output = np.ndarray(task.output.shape, dtype=task.output.dtype, buffer=output_memory.buf)
+            self.calculate_band(source_matrix, destination_matrix, output, (task.first_row, task.last_row))
+            del source_matrix, destination_matrix, output
+        finally:
+            source_memory.close()
+            destination_memory.close()
+            output_memory.close()
+
+    @staticmethod
+    def _get_context() -> multiprocessing.context.BaseContext:
+        """Return fork server multiprocessing context or spawn context if fork server is not available"""
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return multiprocessing.get_context(start_method)
+
+    @staticmethod
+    def _share_array(array: ndarray, shared_memories: list[SharedMemory]) -> SharedArrayDescription:
+        """Copy the given array to the new shared memory block
+
+        :param array: array to copy
+        :param shared_memories: list to register created shared memory block
+            in to release it later
+        :return: description of the shared array
+        """
+        shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared_memories.append(shared_memory)
+        shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=shared_memory.buf)
+        shared_array[:] = array
+        return SharedArrayDescription(shared_memory.name, array.shape, array.dtype.str)
@@ -0,0 +1,80 @@
+"""Module contains vectorized block correlation operations within a single class"""
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+
+
+class BlockCorrelationMaker:
+    """Provide different correlation methods for all blocks at once
+
+    Methods have the same names as in the `CorrelationMaker` and return the
+    same values, but they are calculated from the block statistics for the
+    whole block grid. Integer block sums are combined in integers, and their
+    products are calculated in float64. Float block sums are processed in
+    their own dtype.
+    """
+
+    __slots__ = []
+
+    @classmethod
+    def square_difference_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the square correlation coefficients for all blocks"""
+        return statistics.source_square_sum - 2 * statistics.cross_sum + statistics.destination_square_sum
+
+    @classmethod
+    def square_difference_normed_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed square correlation coefficients for all blocks"""
+        numerator = cls.square_difference_correlation(statistics)
+        denominator = np.sqrt(np.multiply(
+            statistics.source_square_sum, statistics.destination_square_sum, dtype=cls._get_float_dtype(statistics)))
+        return cls._divide_or_one(numerator, denominator)
+
+    @classmethod
+    def cross_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the cross correlation coefficients for all blocks"""
+        return statistics.cross_sum.copy()
+
+    @classmethod
+    def cross_correlation_normed(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed cross correlation coefficients for all blocks"""
+        denominator = np.sqrt(np.multiply(
+            statistics.source_square_sum, statistics.destination_square_sum, dtype=cls._get_float_dtype(statistics)))
+        return cls._divide_or_one(statistics.cross_sum, denominator)
+
+    @classmethod
+    def correlation_coefficient(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the correlation coefficients for all blocks"""
+        return cls._get_centered_cross_sum(statistics) / statistics.pixels_count
+
+    @classmethod
+    def correlation_coefficient_normed(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed correlation coefficients for all blocks"""
+        pixels_count = statistics.pixels_count
+        source_variance = pixels_count * statistics.source_square_sum - statistics.source_sum ** 2
+        destination_variance = pixels_count * statistics.destination_square_sum - statistics.destination_sum ** 2
+        denominator = np.sqrt(np.multiply(
+            np.clip(source_variance, 0, None), np.clip(destination_variance, 0, None),
+            dtype=cls._get_float_dtype(statistics)))
+        return cls._divide_or_one(cls._get_centered_cross_sum(statistics), denominator)
+
+    @staticmethod
+    def _get_centered_cross_sum(statistics: BlockStatistics) -> ndarray:
+        """Returns cross sums of the centered blocks multiplied by the block pixels amount
+
+        Multiplication by the pixels amount keeps the result exact for the
+        integer valued image matrices.
+        """
+        return statistics.pixels_count * statistics.cross_sum - statistics.source_sum * statistics.destination_sum
+
+    @staticmethod
+    def _get_float_dtype(statistics: BlockStatistics) -> np.dtype:
+        """Returns float dtype to calculate products of the block sums in"""
+        return np.result_type(statistics.cross_sum.dtype, np.float32)
+
+    @staticmethod
+    def _divide_or_one(numerator: ndarray, denominator: ndarray) -> ndarray:
+        """Divide arrays element-wise and use 1 where the denominator is zero"""
+        result = np.ones(np.broadcast(numerator, denominator).shape, dtype=np.result_type(numerator, denominator))
+        np.divide(numerator, denominator, out=result, where=denominator != 0)
+        return result
@@ -0,0 +1,519 @@
+"""Block statistics of the image matrices
+
+Contains block statistics model that stores per-block sums of two image
+matrices. All available correlation types can be calculated from these sums
+without touching image pixels again. Sums of the integer image matrices are
+calculated in int64, so they are exact for any image depth while they can't
+overflow. Blocks are squares with the pieces amount side or rectangles with
+the (height, width) pieces amount, and the stride is the same or the (rows,
+columns) step.
+"""
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import EdgeBlocksModes
+
+# Side of the square block or height and width of the rectangular block
+BlockSize = Union[int, tuple[int, int]]
+
+
+@dataclass
+class BlockStatistics:
+    """Per-block sums of the source and destination image matrices
+
+    Every array has the shape of the correlation map block grid. Element
+    with the (row, column) index contains sum for the block in the
+    corresponding position. Pixels count is the amount of pixels in every
+    block, or the array with the block grid shape when the edge blocks are
+    reduced to the image.
+    """
+    source_sum: ndarray
+    destination_sum: ndarray
+    source_square_sum: ndarray
+    destination_square_sum: ndarray
+    cross_sum: ndarray
+    pixels_count: Union[int, ndarray]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Return block grid shape"""
+        return self.cross_sum.shape
+
+    def get_rows(self, first_row: int, last_row: int) -> "BlockStatistics":
+        """Return block statistics of the given block rows
+
+        :param first_row: first block row
+        :param last_row: last (excluded) block row
+        :return: block statistics with views of the given rows
+        """
+        return BlockStatistics(
+            source_sum=self.source_sum[first_row:last_row],
+            destination_sum=self.destination_sum[first_row:last_row],
+            source_square_sum=self.source_square_sum[first_row:last_row],
+            destination_square_sum=self.destination_square_sum[first_row:last_row],
+            cross_sum=self.cross_sum[first_row:last_row],
+            pixels_count=self.pixels_count[first_row:last_row] if isinstance(self.pixels_count, ndarray)
+            else self.pixels_count,
+        )
+
+    def get_channel(self, channel: int) -> "BlockStatistics":
+        """Return block statistics of the given channel of the channel block statistics
+
+        :param channel: channel index
+        :return: block statistics with views of the channel sums
+        """
+        return BlockStatistics(
+            source_sum=self.source_sum[channel],
+            destination_sum=self.destination_sum[channel],
+            source_square_sum=self.source_square_sum[channel],
+            destination_square_sum=self.destination_square_sum[channel],
+            cross_sum=self.cross_sum[channel],
+            pixels_count=self.pixels_count,
+        )
+
+    def sum_channels(self) -> "BlockStatistics":
+        """Return block statistics of the channel block statistics with all channels values of the block
+
+        Every block of the combined statistics contains values of all
+        channels of the block pixels, so correlations of the combined
+        statistics compare blocks as the whole colour vectors.
+
+        :return: block statistics with the channels sums summed
+        """
+        channels_count = self.cross_sum.shape[0]
+        return BlockStatistics(
+            source_sum=self.source_sum.sum(axis=0),
+            destination_sum=self.destination_sum.sum(axis=0),
+            source_square_sum=self.source_square_sum.sum(axis=0),
+            destination_square_sum=self.destination_square_sum.sum(axis=0),
+            cross_sum=self.cross_sum.sum(axis=0),
+            pixels_count=self.pixels_count * channels_count,
+        )
+
+    def to_calculation_dtype(self, dtype: np.dtype) -> "BlockStatistics":
+        """Return block statistics to calculate correlations with the given float dtype
+
+        Integer sums are kept if correlation numerators and variances can be
+        combined from them without overflow, so they are combined exactly
+        before the conversion to floats. Other sums are converted to the given
+        dtype.
+
+        :param dtype: float dtype of the correlations calculations
+        :return: block statistics to calculate correlations from
+        """
+        if np.issubdtype(self.cross_sum.dtype, np.integer) and self.cross_sum.size:
+            max_square_sum = max(int(self.source_square_sum.max()), int(self.destination_square_sum.max()))
+            if 2 * int(np.max(self.pixels_count)) * max_square_sum <= np.iinfo(np.int64).max:
+                return self
+        return self.astype(dtype)
+
+    def astype(self, dtype: np.dtype) -> "BlockStatistics":
+        """Return block statistics with sums converted to the given dtype
+
+        :param dtype: dtype of the sums
+        :return: block statistics with the converted sums, the same block
+            statistics arrays are used if they already have the given dtype
+        """
+        return BlockStatistics(
+            source_sum=self.source_sum.astype(dtype, copy=False),
+            destination_sum=self.destination_sum.astype(dtype, copy=False),
+            source_square_sum=self.source_square_sum.astype(dtype, copy=False),
+            destination_square_sum=self.destination_square_sum.astype(dtype, copy=False),
+            cross_sum=self.cross_sum.astype(dtype, copy=False),
+            pixels_count=self.pixels_count,
+        )
+
+    @classmethod
+    def from_image_matrices(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            cls, source_matrix: ndarray, destination_matrix: ndarray, pieces_amount: BlockSize,
+            stride: Optional[BlockSize] = None,
+            edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> "BlockStatistics":
+        """Calculate block statistics of the given image matrices
+
+        Without stride or with stride equal to the pieces amount blocks don't
+        overlap, and they are reduced from the blocks view. Otherwise, blocks
+        are sliding windows with the given stride, and their sums are taken
+        from the summed-area tables. Edge blocks that are not covered by the
+        matrices are dropped, or the matrices are padded with zeros to cover
+        them, so the edge blocks sums are sums of their pixels inside the
+        matrices.
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: calculated block statistics
+        """
+        pieces_amount, stride = cls.get_blocks_layout(pieces_amount, stride)
+        pixels_count = cls.get_pixels_count(*source_matrix.shape, pieces_amount, stride, edge_mode)
+        source_matrix = cls.pad_to_grid(source_matrix, pieces_amount, stride, edge_mode)
+        destination_matrix = cls.pad_to_grid(destination_matrix, pieces_amount, stride, edge_mode)
+        height, width = source_matrix.shape
+        if stride == pieces_amount and not height % pieces_amount[0] and not width % pieces_amount[1]:
+            block_statistics = cls.from_non_overlapping_blocks(source_matrix, destination_matrix, pieces_amount)
+        else:
+            block_statistics = cls.from_sliding_windows(source_matrix, destination_matrix, pieces_amount, stride)
+        block_statistics.pixels_count = pixels_count
+        return block_statistics
+
+    @classmethod
+    def from_non_overlapping_blocks(cls, source_matrix: ndarray, destination_matrix: ndarray,
+                                    pieces_amount: BlockSize) -> "BlockStatistics":
+        """Calculate block statistics of the given image matrices for non-overlapping blocks
+
+        Image matrices are viewed as (rows, pieces height, columns, pieces
+        width) arrays without copying, so all blocks are reduced by a few
+        vectorized numpy operations. Matrices must have the same shape that is
+        a multiple of the pieces amount.
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix
+        :param pieces_amount: height and width of the single block
+        :return: calculated block statistics
+        """
+        pieces_amount = cls.get_block_shape(pieces_amount)
+        sums_dtype = cls.get_sums_dtype(source_matrix, destination_matrix)
+        source_blocks = cls._get_blocks_view(source_matrix, pieces_amount)
+        destination_blocks = cls._get_blocks_view(destination_matrix, pieces_amount)
+        return cls(
+            source_sum=source_blocks.sum(axis=(1, 3), dtype=sums_dtype),
+            destination_sum=destination_blocks.sum(axis=(1, 3), dtype=sums_dtype),
+            source_square_sum=np.einsum("ijkl,ijkl->ik", source_blocks, source_blocks, dtype=sums_dtype),
+            destination_square_sum=np.einsum(
+                "ijkl,ijkl->ik", destination_blocks, destination_blocks, dtype=sums_dtype),
+            cross_sum=np.einsum("ijkl,ijkl->ik", source_blocks, destination_blocks, dtype=sums_dtype),
+            pixels_count=pieces_amount[0] * pieces_amount[1],
+        )
+
+    @classmethod
+    def from_sliding_windows(cls, source_matrix: ndarray, destination_matrix: ndarray, pieces_amount: BlockSize,
+                             stride: BlockSize) -> "BlockStatistics":
+        """Calculate block statistics of the given image matrices for the sliding windows
+
+        Sum of every window is taken from the summed-area table by four
+        lookups, so the calculation cost depends only on the image size and
+        doesn't depend on the pieces amount. Windows start in the top left
+        corner and move by the stride while they fit in the matrices.
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix
+        :param pieces_amount: height and width of the single window
+        :param stride: step between neighbour windows
+        :return: calculated block statistics
+        """
+        pieces_amount, stride = cls.get_blocks_layout(pieces_amount, stride)
+        sums_dtype = cls.get_sums_dtype(source_matrix, destination_matrix)
+        cross_product = np.multiply(source_matrix, destination_matrix, dtype=sums_dtype)
+        return cls(
+            source_sum=cls.get_windows_sums(source_matrix, pieces_amount, stride),
+            destination_sum=cls.get_windows_sums(destination_matrix, pieces_amount, stride),
+            source_square_sum=cls.get_windows_sums(np.square(source_matrix, dtype=sums_dtype), pieces_amount, stride),
+            destination_square_sum=cls.get_windows_sums(
+                np.square(destination_matrix, dtype=sums_dtype), pieces_amount, stride),
+            cross_sum=cls.get_windows_sums(cross_product, pieces_amount, stride),
+            pixels_count=pieces_amount[0] * pieces_amount[1],
+        )
+
+    @classmethod
+    def from_channel_matrices(cls, source_matrix: ndarray, destination_matrix: ndarray, pieces_amount: BlockSize,
+                              stride: Optional[BlockSize] = None,
+                              edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> "BlockStatistics":
+        """Calculate block statistics of every channel of the given image matrices at once
+
+        Channels are reduced together as the last axis of the blocks view or
+        of the summed-area tables, so the image matrices are scanned once for
+        all channels.
+
+        :param source_matrix: source image matrix with the channels last
+        :param destination_matrix: destination image matrix with the same
+            shape as the source one
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: block statistics with the (channels, rows, columns) sums
+        """
+        pieces_amount, stride = cls.get_blocks_layout(pieces_amount, stride)
+        pixels_count = cls.get_pixels_count(*source_matrix.shape[:2], pieces_amount, stride, edge_mode)
+        source_matrix = cls.pad_to_grid(source_matrix, pieces_amount, stride, edge_mode)
+        destination_matrix = cls.pad_to_grid(destination_matrix, pieces_amount, stride, edge_mode)
+        height, width, channels_count = source_matrix.shape
+        sums_dtype = cls.get_sums_dtype(source_matrix, destination_matrix)
+        if stride == pieces_amount and not height % pieces_amount[0] and not width % pieces_amount[1]:
+            blocks_shape = (height // pieces_amount[0], pieces_amount[0], width // pieces_amount[1], pieces_amount[1],
+                            channels_count)
+            source_blocks = source_matrix.reshape(blocks_shape)
+            destination_blocks = destination_matrix.reshape(blocks_shape)
+            channel_sums = (
+                source_blocks.sum(axis=(1, 3), dtype=sums_dtype),
+                destination_blocks.sum(axis=(1, 3), dtype=sums_dtype),
+                np.einsum("ijklc,ijklc->ikc", source_blocks, source_blocks, dtype=sums_dtype),
+                np.einsum("ijklc,ijklc->ikc", destination_blocks, destination_blocks, dtype=sums_dtype),
+                np.einsum("ijklc,ijklc->ikc", source_blocks, destination_blocks, dtype=sums_dtype),
+            )
+        else:
+            channel_sums = (
+                cls.get_windows_sums(source_matrix, pieces_amount, stride),
+                cls.get_windows_sums(destination_matrix, pieces_amount, stride),
+                cls.get_windows_sums(np.square(source_matrix, dtype=sums_dtype), pieces_amount, stride),
+                cls.get_windows_sums(np.square(destination_matrix, dtype=sums_dtype), pieces_amount, stride),
+                cls.get_windows_sums(
+                    np.multiply(source_matrix, destination_matrix, dtype=sums_dtype), pieces_amount, stride),
+            )
+        source_sum, destination_sum, source_square_sum, destination_square_sum, cross_sum = (
+            np.moveaxis(sums, -1, 0) for sums in channel_sums)
+        return cls(
+            source_sum=source_sum,
+            destination_sum=destination_sum,
+            source_square_sum=source_square_sum,
+            destination_square_sum=destination_square_sum,
+            cross_sum=cross_sum,
+            pixels_count=pixels_count,
+        )
+
+    @classmethod
+    def from_reference_sums(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            cls, reference_sums: tuple[ndarray, ndarray], source_matrix: ndarray, destination_matrix: ndarray,
+            pieces_amount: BlockSize, stride: Optional[BlockSize] = None,
+            edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> "BlockStatistics":
+        """Calculate block statistics of the given image matrices with the precalculated source sums
+
+        Reference sums are the source block sums and square sums calculated
+        on the whole source matrix with the same pieces amount and stride.
+        Blocks start in the top left corner, so the block grid of the common
+        part of the matrices is their top left part. Only destination sums
+        and cross sums are calculated. Reference sums of the partial edge
+        blocks are valid only if they are calculated on the source matrix
+        with the destination matrix shape.
+
+        :param reference_sums: source block sums and square sums
+        :param source_matrix: source grayscale image matrix with the shape of
+            the destination matrix
+        :param destination_matrix: destination grayscale image matrix
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: calculated block statistics
+        """
+        pieces_amount, stride = cls.get_blocks_layout(pieces_amount, stride)
+        rows, columns = cls.get_grid_shape(*destination_matrix.shape, pieces_amount, stride, edge_mode)
+        pixels_count = cls.get_pixels_count(*destination_matrix.shape, pieces_amount, stride, edge_mode)
+        source_matrix = cls.pad_to_grid(source_matrix, pieces_amount, stride, edge_mode)
+        destination_matrix = cls.pad_to_grid(destination_matrix, pieces_amount, stride, edge_mode)
+        height, width = destination_matrix.shape
+        sums_dtype = cls.get_sums_dtype(source_matrix, destination_matrix)
+        source_sum, source_square_sum = (sums[:rows, :columns].astype(sums_dtype, copy=False)
+                                         for sums in reference_sums)
+        if stride == pieces_amount and not height % pieces_amount[0] and not width % pieces_amount[1]:
+            source_blocks = cls._get_blocks_view(source_matrix, pieces_amount)
+            destination_blocks = cls._get_blocks_view(destination_matrix, pieces_amount)
+            destination_sum = destination_blocks.sum(axis=(1, 3), dtype=sums_dtype)
+            destination_square_sum = np.einsum(
+                "ijkl,ijkl->ik", destination_blocks, destination_blocks, dtype=sums_dtype)
+            cross_sum = np.einsum("ijkl,ijkl->ik", source_blocks, destination_blocks, dtype=sums_dtype)
+        else:
+            destination_sum = cls.get_windows_sums(destination_matrix, pieces_amount, stride)
+            destination_square_sum = cls.get_windows_sums(
+                np.square(destination_matrix, dtype=sums_dtype), pieces_amount, stride)
+            cross_sum = cls.get_windows_sums(
+                np.multiply(source_matrix, destination_matrix, dtype=sums_dtype), pieces_amount, stride)
+        return cls(
+            source_sum=source_sum,
+            destination_sum=destination_sum,
+            source_square_sum=source_square_sum,
+            destination_square_sum=destination_square_sum,
+            cross_sum=cross_sum,
+            pixels_count=pixels_count,
+        )
+
+    @classmethod
+    def get_reference_sums(cls, matrix: ndarray, pieces_amount: BlockSize, stride: Optional[BlockSize] = None,
+                           edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> tuple[ndarray, ndarray]:
+        """Return block sums and square sums of the given matrix to use them as reference sums
+
+        :param matrix: grayscale image matrix
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: block sums and block square sums
+        """
+        pieces_amount, stride = cls.get_blocks_layout(pieces_amount, stride)
+        matrix = cls.pad_to_grid(matrix, pieces_amount, stride, edge_mode)
+        sums_dtype = cls.get_sums_dtype(matrix, matrix)
+        return (cls.get_windows_sums(matrix, pieces_amount, stride),
+                cls.get_windows_sums(np.square(matrix, dtype=sums_dtype), pieces_amount, stride))
+
+    @staticmethod
+    def get_sums_dtype(source_matrix: ndarray, destination_matrix: ndarray) -> np.dtype:
+        """Return dtype to calculate exact sums of the given matrices, their squares and products
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix
+        :return: int64 for the integer matrices if the sum of the squares of
+            all pixels can't overflow it else float64
+        """
+        if not np.issubdtype(source_matrix.dtype, np.integer) or \
+                not np.issubdtype(destination_matrix.dtype, np.integer):
+            return np.dtype(np.float64)
+        max_value = max(np.iinfo(source_matrix.dtype).max, np.iinfo(destination_matrix.dtype).max)
+        if max_value * max_value * max(source_matrix.size, 1) > np.iinfo(np.int64).max:
+            return np.dtype(np.float64)
+        return np.dtype(np.int64)
+
+    @staticmethod
+    def get_block_shape(block_size: BlockSize) -> tuple[int, int]:
+        """Return height and width of the block with the given size
+
+        :param block_size: side of the square block or height and width of
+            the rectangular block
+        :return: block height and width
+        """
+        if np.ndim(block_size) == 0:
+            return int(block_size), int(block_size)
+        height, width = block_size
+        return int(height), int(width)
+
+    @classmethod
+    def get_blocks_layout(cls, pieces_amount: BlockSize, stride: Optional[BlockSize] = None) -> tuple[
+            tuple[int, int], tuple[int, int]]:
+        """Return blocks height and width and steps between neighbour blocks along rows and columns
+
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :return: block shape and block steps
+        """
+        pieces_amount = cls.get_block_shape(pieces_amount)
+        return pieces_amount, cls.get_block_shape(stride) if stride else pieces_amount
+
+    @classmethod
+    def get_grid_shape(cls, height: int, width: int, pieces_amount: BlockSize, stride: Optional[BlockSize] = None,
+                       edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> tuple[int, int]:
+        """Return shape of the block grid for the matrix with the given shape
+
+        Dropping edge mode places only the blocks fitting in the matrix.
+        Other modes add the edge blocks to cover the whole matrix.
+
+        :param height: matrix height
+        :param width: matrix width
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: amount of block rows and columns
+        """
+        (pieces_height, pieces_width), (stride_height, stride_width) = cls.get_blocks_layout(pieces_amount, stride)
+        if edge_mode == EdgeBlocksModes.DROP:
+            return (max((height - pieces_height) // stride_height + 1, 0),
+                    max((width - pieces_width) // stride_width + 1, 0))
+        return (-(-max(height - pieces_height, 0) // stride_height) + 1 if height > 0 else 0,
+                -(-max(width - pieces_width, 0) // stride_width) + 1 if width > 0 else 0)
+
+    @classmethod
+    def get_covered_shape(cls, rows: int, columns: int, pieces_amount: BlockSize,
+                          stride: Optional[BlockSize] = None) -> tuple[int, int]:
+        """Return shape of the matrix part covered by the block grid with the given shape
+
+        :param rows: amount of block rows
+        :param columns: amount of block columns
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :return: height and width of the covered part, it's larger than the
+            matrix if the edge blocks are padded
+        """
+        (pieces_height, pieces_width), (stride_height, stride_width) = cls.get_blocks_layout(pieces_amount, stride)
+        return ((rows - 1) * stride_height + pieces_height if rows else 0,
+                (columns - 1) * stride_width + pieces_width if columns else 0)
+
+    @classmethod
+    def get_pixels_count(cls, height: int, width: int, pieces_amount: BlockSize, stride: Optional[BlockSize] = None,
+                         edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> Union[int, ndarray]:
+        """Return amount of pixels in the blocks of the matrix with the given shape
+
+        :param height: matrix height
+        :param width: matrix width
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: amount of pixels in every block, or int64 array of the block
+            pixels amounts with the block grid shape if the edge blocks are
+            reduced to the matrix and don't fit in it
+        """
+        pieces_amount, stride = cls.get_blocks_layout(pieces_amount, stride)
+        pixels_count = pieces_amount[0] * pieces_amount[1]
+        if edge_mode != EdgeBlocksModes.REDUCED:
+            return pixels_count
+        rows, columns = cls.get_grid_shape(height, width, pieces_amount, stride, edge_mode)
+        covered_height, covered_width = cls.get_covered_shape(rows, columns, pieces_amount, stride)
+        if covered_height <= height and covered_width <= width:
+            return pixels_count
+        blocks_extents = []
+        for blocks_amount, length, piece_length, step in zip((rows, columns), (height, width), pieces_amount, stride):
+            blocks_starts = np.arange(blocks_amount, dtype=np.int64) * step
+            blocks_extents.append(np.minimum(blocks_starts + piece_length, length) - blocks_starts)
+        return np.outer(blocks_extents[0], blocks_extents[1])
+
+    @classmethod
+    def pad_to_grid(cls, matrix: ndarray, pieces_amount: BlockSize, stride: Optional[BlockSize] = None,
+                    edge_mode: EdgeBlocksModes = EdgeBlocksModes.DROP) -> ndarray:
+        """Pad the matrix with zeros to cover its partial edge blocks
+
+        :param matrix: image matrix or matrix of the block sums, channels are
+            the last axes
+        :param pieces_amount: height and width of the single block
+        :param stride: step between neighbour blocks, pieces amount if not given
+        :param edge_mode: comparison of the partial edge blocks
+        :return: padded matrix, the same matrix if the edge blocks are dropped
+            or fit in it
+        """
+        if edge_mode == EdgeBlocksModes.DROP:
+            return matrix
+        height, width = matrix.shape[:2]
+        rows, columns = cls.get_grid_shape(height, width, pieces_amount, stride, edge_mode)
+        covered_height, covered_width = cls.get_covered_shape(rows, columns, pieces_amount, stride)
+        if covered_height <= height and covered_width <= width:
+            return matrix
+        return np.pad(matrix, ((0, max(covered_height - height, 0)), (0, max(covered_width - width, 0)),
+                               *((0, 0),) * (matrix.ndim - 2)))
+
+    @classmethod
+    def _get_blocks_view(cls, matrix: ndarray, pieces_amount: BlockSize) -> ndarray:
+        """Return view of the given matrix with blocks axes
+
+        :param matrix: image matrix with shape that is a multiple of the
+            pieces amount
+        :param pieces_amount: height and width of the single block
+        :return: view with (rows, pieces height, columns, pieces width) shape
+        """
+        height, width = matrix.shape
+        pieces_height, pieces_width = cls.get_block_shape(pieces_amount)
+        return matrix.reshape(height // pieces_height, pieces_height, width // pieces_width, pieces_width)
+
+    @classmethod
+    def get_windows_sums(cls, matrix: ndarray, pieces_amount: BlockSize, stride: BlockSize) -> ndarray:
+        """Return sums of the sliding windows of the given matrix
+
+        Summed-area table of the integer matrix is calculated in int64.
+        Channels of the matrix with the channels last are summed separately.
+
+        :param matrix: image matrix to sum
+        :param pieces_amount: height and width of the single window
+        :param stride: step between neighbour windows
+        :return: array of window sums with the block grid shape and the
+            matrix channels axis if it has
+        """
+        height, width = matrix.shape[:2]
+        rows, columns = cls.get_grid_shape(height, width, pieces_amount, stride)
+        (pieces_height, pieces_width), (stride_height, stride_width) = cls.get_blocks_layout(pieces_amount, stride)
+        sums_dtype = np.int64 if np.issubdtype(matrix.dtype, np.integer) else np.float64
+        summed_area_table = np.zeros((height + 1, width + 1, *matrix.shape[2:]), dtype=sums_dtype)
+        np.cumsum(matrix, axis=0, dtype=sums_dtype, out=summed_area_table[1:, 1:])
+        np.cumsum(summed_area_table[1:, 1:], axis=1, out=summed_area_table[1:, 1:])
+
+        top_rows = slice(0, rows * stride_height, stride_height)
+        bottom_rows = slice(pieces_height, pieces_height + rows * stride_height, stride_height)
+        left_columns = slice(0, columns * stride_width, stride_width)
+        right_columns = slice(pieces_width, pieces_width + columns * stride_width, stride_width)
+        return (summed_area_table[bottom_rows, right_columns] - summed_area_table[top_rows, right_columns]
+                - summed_area_table[bottom_rows, left_columns] + summed_area_table[top_rows, left_columns])
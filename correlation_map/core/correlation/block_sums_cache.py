@@ -0,0 +1,159 @@
+"""Block sums cache
+
+Contains singleton cache of the block sums of the current source and
+destination images at the base block granularity. Block statistics for any
+pieces amount and stride that are multiples of the base block size are
+aggregated from the cached sums without scanning image pixels again.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, EdgeBlocksModes
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.tools.common import MetaSingleton
+from correlation_map.gui.tools.logger import app_logger
+
+
+class BlockSumsCache(metaclass=MetaSingleton):
+    """Cache of the base block sums for the current images pair
+
+    Images pair is identified by the images content digests, the gray
+    conversion of the images and the edge blocks mode. Base block height and
+    width are the greatest common divisors of the configured base and the
+    pieces height and width and stride, so they are decreased when a pieces
+    amount or stride is not their multiple. Partial edge base blocks are
+    padded or reduced like the aggregated blocks, so partial edge blocks are
+    aggregated from them.
+    """
+
+    __images_digests: Optional[tuple] = None
+    __base_size: tuple[int, int] = (0, 0)
+    __base_statistics: Optional[BlockStatistics] = None
+
+    @classmethod
+    def get_block_statistics(cls, source_image: ImageWrapper, destination_image: ImageWrapper,
+                             correlation_configuration: CorrelationConfiguration) -> BlockStatistics:
+        """Get block statistics of the given images aggregated from the cached base block sums
+
+        Base block sums are calculated if the cache contains another images
+        pair or the cached base block size doesn't divide the pieces amount
+        and stride.
+
+        :param source_image: source image to compare
+        :param destination_image: destination image to compare
+        :param correlation_configuration: correlation configuration with the
+            pieces amount, stride, edge blocks mode and base block size
+        :return: block statistics for the configured pieces amount and stride
+        """
+        pieces_amount = correlation_configuration.pieces_shape
+        stride = correlation_configuration.pieces_stride
+        images_digests = (source_image.content_digest, destination_image.content_digest,
+                          correlation_configuration.gray_conversion, correlation_configuration.gray_dtype,
+                          correlation_configuration.edge_blocks_mode)
+        if images_digests != cls.__images_digests:
+            cls.clear()
+            base_size = cls._get_base_size(
+                (correlation_configuration.block_sums_cache_base,) * 2, pieces_amount, stride)
+        elif any(piece % base or step % base for piece, step, base in zip(pieces_amount, stride, cls.__base_size)):
+            base_size = cls._get_base_size(cls.__base_size, pieces_amount, stride)
+        else:
+            base_size = cls.__base_size
+
+        if base_size != cls.__base_size:
+            cls.__base_statistics = cls._calculate_base_statistics(
+                source_image, destination_image, base_size, correlation_configuration)
+            cls.__images_digests = images_digests
+            cls.__base_size = base_size
+        else:
+            app_logger.debug("Aggregating block sums from the cached base blocks with the %sx%s size", *base_size)
+        base_blocks_amount = tuple(piece // base for piece, base in zip(pieces_amount, base_size))
+        base_blocks_stride = tuple(step // base for step, base in zip(stride, base_size))
+        return cls._aggregate_base_statistics(
+            base_blocks_amount, base_blocks_stride, correlation_configuration.edge_blocks_mode)
+
+    @classmethod
+    def clear(cls):
+        """Remove cached base block sums"""
+        if cls.__base_statistics is not None:
+            app_logger.debug("Clearing cached base block sums")
+        cls.__images_digests = None
+        cls.__base_size = (0, 0)
+        cls.__base_statistics = None
+
+    @staticmethod
+    def _get_base_size(base_size: tuple[int, int], pieces_amount: tuple[int, int],
+                       stride: tuple[int, int]) -> tuple[int, int]:
+        """Return the largest base block height and width dividing the given base, pieces amount and stride"""
+        return tuple(math.gcd(base, piece, step) for base, piece, step in zip(base_size, pieces_amount, stride))
+
+    @classmethod
+    def _calculate_base_statistics(cls, source_image: ImageWrapper, destination_image: ImageWrapper,
+                                   base_size: tuple[int, int],
+                                   correlation_configuration: CorrelationConfiguration) -> BlockStatistics:
+        """Calculate block statistics of the base blocks of the given images common part
+
+        :param source_image: source image to compare
+        :param destination_image: destination image to compare
+        :param base_size: height and width of the base block
+        :param correlation_configuration: correlation configuration with the
+            gray conversion and edge blocks mode
+        :return: base block statistics
+        """
+        app_logger.debug("Calculating base block sums with the %sx%s base block size", *base_size)
+        gray_conversion, gray_dtype = correlation_configuration.gray_conversion, correlation_configuration.gray_dtype
+        edge_mode = correlation_configuration.edge_blocks_mode
+        gray_source_matrix = ImageBuilder.get_image_gray_matrix(source_image, gray_conversion, gray_dtype)
+        gray_destination_matrix = ImageBuilder.get_image_gray_matrix(destination_image, gray_conversion, gray_dtype)
+        height = min(gray_source_matrix.shape[0], gray_destination_matrix.shape[0])
+        width = min(gray_source_matrix.shape[1], gray_destination_matrix.shape[1])
+        if edge_mode == EdgeBlocksModes.DROP:
+            height, width = height // base_size[0] * base_size[0], width // base_size[1] * base_size[1]
+        return BlockStatistics.from_image_matrices(
+            gray_source_matrix[:height, :width], gray_destination_matrix[:height, :width], base_size,
+            edge_mode=edge_mode)
+
+    @classmethod
+    def _aggregate_base_statistics(cls, base_blocks_amount: tuple[int, int], base_blocks_stride: tuple[int, int],
+                                   edge_mode: EdgeBlocksModes) -> BlockStatistics:
+        """Aggregate block statistics from the cached base block sums
+
+        :param base_blocks_amount: height and width of the block in the base
+            blocks
+        :param base_blocks_stride: steps between neighbour blocks along rows
+            and columns in the base blocks
+        :param edge_mode: comparison of the partial edge blocks
+        :return: aggregated block statistics
+        """
+        base_statistics = cls.__base_statistics
+        if edge_mode == EdgeBlocksModes.REDUCED:
+            pixels_count = cls._aggregate_sums(
+                np.broadcast_to(base_statistics.pixels_count, base_statistics.shape), base_blocks_amount,
+                base_blocks_stride, edge_mode)
+        else:
+            pixels_count = base_statistics.pixels_count * base_blocks_amount[0] * base_blocks_amount[1]
+        return BlockStatistics(
+            source_sum=cls._aggregate_sums(
+                base_statistics.source_sum, base_blocks_amount, base_blocks_stride, edge_mode),
+            destination_sum=cls._aggregate_sums(
+                base_statistics.destination_sum, base_blocks_amount, base_blocks_stride, edge_mode),
+            source_square_sum=cls._aggregate_sums(
+                base_statistics.source_square_sum, base_blocks_amount, base_blocks_stride, edge_mode),
+            destination_square_sum=cls._aggregate_sums(
+                base_statistics.destination_square_sum, base_blocks_amount, base_blocks_stride, edge_mode),
+            cross_sum=cls._aggregate_sums(
+                base_statistics.cross_sum, base_blocks_amount, base_blocks_stride, edge_mode),
+            pixels_count=pixels_count,
+        )
+
+    @staticmethod
+    def _aggregate_sums(base_sums: ndarray, base_blocks_amount: tuple[int, int], base_blocks_stride: tuple[int, int],
+                        edge_mode: EdgeBlocksModes) -> ndarray:
+        """Sum base block sums of every aggregated block, partial edge blocks sum their base blocks inside the image"""
+        return BlockStatistics.get_windows_sums(
+            BlockStatistics.pad_to_grid(base_sums, base_blocks_amount, base_blocks_stride, edge_mode),
+            base_blocks_amount, base_blocks_stride)
@@ -0,0 +1,121 @@
+"""Correlation backends registry
+
+Contains registry of the block correlation makers implementing correlation
+methods with different libraries. NumPy backend is always available and is the
+reference implementation, other backends are registered when their libraries
+are installed.
+"""
+import os
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationBackends, CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.config.variables import EnvironmentVariables
+from correlation_map.core.correlation.block_correlation_maker import BlockCorrelationMaker
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.opencv_block_correlation_maker import OpenCVBlockCorrelationMaker
+from correlation_map.core.tools.common import MetaSingleton
+from correlation_map.gui.tools.logger import app_logger
+
+CorrelationMethod = Callable[[BlockStatistics], ndarray]
+
+
+class CorrelationBackendsRegistry(metaclass=MetaSingleton):
+    """Registry of the block correlation makers by backends
+
+    Backend is chosen for every correlation type by the correlation type
+    backends configuration, then by the correlation backend configuration,
+    then by the `CORRELATION_BACKEND` environment variable. NumPy backend is
+    used if the chosen backend isn't available or doesn't implement the
+    correlation type.
+    """
+
+    __backends: dict[CorrelationBackends, type] = {
+        CorrelationBackends.NUMPY: BlockCorrelationMaker,
+        CorrelationBackends.OPENCV: OpenCVBlockCorrelationMaker,
+    }
+
+    @classmethod
+    def register(cls, backend: CorrelationBackends, correlation_maker: type):
+        """Register block correlation maker of the backend
+
+        :param backend: backend to register
+        :param correlation_maker: class with the block correlation methods
+            named as the correlation types
+        """
+        app_logger.debug("Registering `%s` correlation backend", backend.value)
+        cls.__backends[backend] = correlation_maker
+
+    @classmethod
+    def get_available_backends(cls) -> list[CorrelationBackends]:
+        """Return registered backends"""
+        return list(cls.__backends)
+
+    @classmethod
+    def get_correlation_method(cls, correlation_type: CorrelationTypes,
+                               correlation_configuration: CorrelationConfiguration) -> CorrelationMethod:
+        """Return block correlation method of the correlation type from the configured backend
+
+        :param correlation_type: correlation type to get method of
+        :param correlation_configuration: correlation configuration with the
+            chosen backends
+        :return: method that calculates correlations of all blocks from the
+            block statistics
+        """
+        backend = correlation_configuration.correlation_type_backends.get(correlation_type) \
+            or correlation_configuration.correlation_backend or cls._get_environment_backend()
+        correlation_maker = cls.__backends.get(backend)
+        if correlation_maker is None:
+            app_logger.warning("Correlation backend `%s` is not available, using `%s` backend",
+                               backend.value, CorrelationBackends.NUMPY.value)
+            correlation_maker = BlockCorrelationMaker
+        correlation_method = getattr(correlation_maker, correlation_type.correlation_type, None)
+        if correlation_method is None:
+            app_logger.warning("Correlation backend `%s` doesn't implement `%s`, using `%s` backend",
+                               backend.value, correlation_type.correlation_type, CorrelationBackends.NUMPY.value)
+            correlation_method = getattr(BlockCorrelationMaker, correlation_type.correlation_type)
+        return correlation_method
+
+    @classmethod
+    def get_conformance_differences(cls, block_statistics: BlockStatistics) -> dict[
+            tuple[CorrelationBackends, CorrelationTypes], float]:
+        """Compare correlations of every available backend with the NumPy backend ones
+
+        :param block_statistics: block statistics to calculate correlations of
+        :return: maximal differences of the backends correlations relative to
+            the maximal absolute NumPy backend correlation by the backends and
+            correlation types
+        """
+        differences: dict[tuple[CorrelationBackends, CorrelationTypes], float] = {}
+        for correlation_type in CorrelationTypes:
+            reference_grid = getattr(BlockCorrelationMaker, correlation_type.correlation_type)(block_statistics)
+            scale = max(float(np.abs(reference_grid).max(initial=0)), np.finfo(np.float64).tiny)
+            for backend, correlation_maker in cls.__backends.items():
+                backend_grid = getattr(correlation_maker, correlation_type.correlation_type)(block_statistics)
+                differences[backend, correlation_type] = float(
+                    np.abs(backend_grid - reference_grid).max(initial=0)) / scale
+        return differences
+
+    @staticmethod
+    def _get_environment_backend() -> CorrelationBackends:
+        """Return backend from the environment variable or NumPy backend if it's not set or wrong"""
+        backend_name = os.getenv(EnvironmentVariables.CORRELATION_BACKEND)
+        if not backend_name:
+            return CorrelationBackends.NUMPY
+        try:
+            return CorrelationBackends(backend_name.lower())
+        except ValueError:
+            app_logger.warning("Unknown correlation backend `%s` in the `%s` environment variable, using `%s` backend",
+                               backend_name, EnvironmentVariables.CORRELATION_BACKEND, CorrelationBackends.NUMPY.value)
+            return CorrelationBackends.NUMPY
+
+
+try:
+    from correlation_map.core.correlation.numba_block_correlation_maker import NumbaBlockCorrelationMaker
+except ImportError:
+    app_logger.debug("Numba is not installed, `%s` correlation backend is not available",
+                     CorrelationBackends.NUMBA.value)
+else:
+    CorrelationBackendsRegistry.register(CorrelationBackends.NUMBA, NumbaBlockCorrelationMaker)
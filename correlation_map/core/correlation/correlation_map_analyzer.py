@@ -0,0 +1,116 @@
+"""Correlation map analyzer
+
+Contains analyzer that finds defect regions of the correlation map. Analyzer
+works on the correlation block grid instead of the image pixels, so it takes
+milliseconds even for the large images.
+"""
+from typing import Optional
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.models.defect_region import DefectRegion
+from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.gui.tools.logger import app_logger
+
+NORMED_CORRELATION_TYPES = (
+    CorrelationTypes.TM_SQDIFF_NORMED, CorrelationTypes.TM_CCORR_NORMED, CorrelationTypes.TM_CCOEFF_NORMED)
+
+
+class CorrelationMapAnalyzer:
+    """Find regions of the connected defect blocks of the correlation map
+
+    Block is a defect if its similarity is lower than the similarity limit.
+    Similarity of the normed correlation types is the block correlation, or
+    one minus the block correlation for the normed square difference. Other
+    correlation types are scaled to the [0, 1] range by the map minimal and
+    maximal correlations taken from the map statistics. Defect blocks
+    connected by sides or corners form one defect region.
+    """
+
+    __slots__ = []
+
+    @classmethod
+    def find_defect_regions(cls, correlation_map: CorrelationMap, similarity_limit: float) -> list[DefectRegion]:
+        """Find defect regions of the given correlation map
+
+        :param correlation_map: built correlation map
+        :param similarity_limit: blocks with the lower similarity are defects
+        :return: defect regions sorted by area from the largest one
+        """
+        correlation_grid = np.asarray(correlation_map.correlation_grid)
+        map_statistics = correlation_map.map_statistics
+        defect_mask = cls.get_defect_mask(correlation_grid, correlation_map.correlation_type, similarity_limit,
+                                          (map_statistics.minimum, map_statistics.maximum))
+        regions_count, labels, stats, _ = cv2.connectedComponentsWithStats(
+            defect_mask.astype(np.uint8), connectivity=8, ltype=cv2.CV_32S)
+        min_scores, max_scores, mean_scores = cls._get_regions_scores(correlation_grid, labels, regions_count)
+        (pieces_height, pieces_width), (stride_height, stride_width) = \
+            correlation_map.pieces_amount, correlation_map.stride
+        regions = [
+            DefectRegion(
+                x_1=int(column) * stride_width,
+                y_1=int(row) * stride_height,
+                x_2=int(column + columns - 1) * stride_width + pieces_width,
+                y_2=int(row + rows - 1) * stride_height + pieces_height,
+                blocks_count=int(blocks_count),
+                area=int(blocks_count) * stride_height * stride_width,
+                min_score=float(min_score),
+                max_score=float(max_score),
+                mean_score=float(mean_score),
+            )
+            for (column, row, columns, rows, blocks_count), min_score, max_score, mean_score
+            in zip(stats[1:], min_scores, max_scores, mean_scores)]
+        regions.sort(key=lambda region: region.area, reverse=True)
+        app_logger.info("Found %s defect regions of %s defect blocks", len(regions), np.count_nonzero(defect_mask))
+        return regions
+
+    @staticmethod
+    def get_defect_mask(correlation_grid: ndarray, correlation_type: CorrelationTypes, similarity_limit: float,
+                        correlations_range: Optional[tuple[float, float]] = None) -> ndarray:
+        """Return mask of the defect blocks of the correlation grid
+
+        :param correlation_grid: correlation block grid
+        :param correlation_type: correlation type of the grid
+        :param similarity_limit: blocks with the lower similarity are defects
+        :param correlations_range: known minimal and maximal correlations of
+            the grid, they are found by the grid scan if not given
+        :return: boolean mask with the grid shape
+        """
+        if correlation_type in NORMED_CORRELATION_TYPES:
+            low, high = 0.0, 1.0
+        elif correlations_range is not None:
+            low, high = correlations_range
+        else:
+            low, high = float(np.nanmin(correlation_grid, initial=np.inf)), \
+                float(np.nanmax(correlation_grid, initial=-np.inf))
+        if correlation_type.is_lower_better:
+            return correlation_grid > high - similarity_limit * (high - low)
+        return correlation_grid < low + similarity_limit * (high - low)
+
+    @staticmethod
+    def _get_regions_scores(correlation_grid: ndarray, labels: ndarray,
+                            regions_count: int) -> tuple[ndarray, ndarray, ndarray]:
+        """Return minimal, maximal and mean correlations of the labeled regions
+
+        Defect blocks are sorted by their region labels, so the scores of all
+        regions are reduced at once.
+
+        :param correlation_grid: correlation block grid
+        :param labels: region labels of the blocks, zero for the non-defect
+            blocks
+        :param regions_count: amount of labels including the background one
+        :return: minimal, maximal and mean correlations of the regions
+        """
+        defect_indexes = np.flatnonzero(labels)
+        blocks_labels = labels.ravel()[defect_indexes]
+        order = np.argsort(blocks_labels, kind="stable")
+        scores = correlation_grid.ravel()[defect_indexes[order]].astype(np.float64)
+        regions_starts = np.searchsorted(blocks_labels[order], np.arange(1, regions_count))
+        if not scores.size:
+            return scores, scores, scores
+        regions_sizes = np.diff(np.append(regions_starts, scores.size))
+        return (np.minimum.reduceat(scores, regions_starts), np.maximum.reduceat(scores, regions_starts),
+                np.add.reduceat(scores, regions_starts) / regions_sizes)
@@ -7,13 +7,18 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Callable, Final, Generator, Optional
 
-from correlation_map.core.config.correlation import CorrelationConfiguration
+from correlation_map.core.config.correlation import CorrelationConfiguration, FrameReferenceMode
 from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.correlation.frame_sequence_correlator import FrameSequenceCorrelator
 from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.frame_scores import FrameScores
 from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.images.features_cache import FeaturesCache
+from correlation_map.core.images.features_matcher import FeaturesMatcher
 from correlation_map.core.images.image_builder import ImageBuilder
 from correlation_map.core.models.figures.figure_container import FigureContainer
 from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.images.phase_correlation_registrator import PhaseCorrelationRegistrator
 from correlation_map.gui.tools.logger import app_logger
 
 
@@ -26,9 +31,11 @@ class CorrelationStageAttributes(Enum):
     FIND_ROTATE_ANGLE = "finding rotate angle", "Finding rotate angle between source and destination images", 3
     ROTATE_IMAGE = "rotating destination image", "Rotating destination image", 2
     FIND_IMAGE = "find source image", "Finding source image in destination images", 3
+    REGISTER_IMAGES = "registering images", "Finding rotation and position of source image by phase correlation", 3
     MARK_FOUND_IMAGE = "mark found image", "Marking found source image in destination image", 2
     CROP_FOUND_IMAGE = "croup found image", "Cropping found source image in destination image", 2
     BUILD_CORRELATION_MAP = "build correlation map", "Building correlation map", 20
+    CORRELATE_FRAMES = "correlate frames", "Correlating frames of the frame source with their references", 20
     END = "end", "Correlation map built", 0
 
     def __init__(self, status: str, message: str, weight: int):
@@ -140,18 +147,33 @@ class CorrelationBuildingPipeline:
             CorrelationStageAttributes.START,
             CorrelationStageAttributes.LOADING,
         ]
+        if correlation_settings.frame_source_path:
+            planned_stages.extend([
+                CorrelationStageAttributes.CORRELATE_FRAMES,
+                CorrelationStageAttributes.END])
+            return planned_stages
         if correlation_settings.chose_important_part:
             planned_stages.append(
                 CorrelationStageAttributes.SCALE_IMAGE)
-        if correlation_settings.auto_rotate:
+        if correlation_settings.phase_registration:
             planned_stages.extend([
-                CorrelationStageAttributes.FIND_ROTATE_ANGLE,
-                CorrelationStageAttributes.ROTATE_IMAGE])
-        if correlation_settings.auto_rotate:
+                CorrelationStageAttributes.REGISTER_IMAGES,
+                CorrelationStageAttributes.CROP_FOUND_IMAGE])
+        elif correlation_settings.is_rotate_and_crop_fused:
             planned_stages.extend([
+                CorrelationStageAttributes.FIND_ROTATE_ANGLE,
                 CorrelationStageAttributes.FIND_IMAGE,
-                CorrelationStageAttributes.MARK_FOUND_IMAGE,
                 CorrelationStageAttributes.CROP_FOUND_IMAGE])
+        else:
+            if correlation_settings.auto_rotate:
+                planned_stages.extend([
+                    CorrelationStageAttributes.FIND_ROTATE_ANGLE,
+                    CorrelationStageAttributes.ROTATE_IMAGE])
+            if correlation_settings.auto_find:
+                planned_stages.extend([
+                    CorrelationStageAttributes.FIND_IMAGE,
+                    CorrelationStageAttributes.MARK_FOUND_IMAGE,
+                    CorrelationStageAttributes.CROP_FOUND_IMAGE])
         planned_stages.extend([
             CorrelationStageAttributes.BUILD_CORRELATION_MAP,
             CorrelationStageAttributes.END])
@@ -175,6 +197,8 @@ class CorrelationMapPipelineBuilder:
 
         self.current_source_image: Optional[ImageWrapper] = None
         self.current_destination_image: Optional[ImageWrapper] = None
+        # Rotation angle of the current destination image applied while it's cropped in the fused mode
+        self.destination_rotation_angle: Optional[float] = None
 
     def _crop_image(self) -> Generator[CurrentCorrelationStage, None, None]:
         """Sub-pipeline to scale source image
@@ -206,11 +230,20 @@ class CorrelationMapPipelineBuilder:
         """
         app_logger.info("Correlation pipeline: Rotating destination image")
         yield next(self.correlation_pipeline)
+        FeaturesCache.configure(
+            self.correlation_settings.features_cache_size, self.correlation_settings.features_cache_directory)
         rotate_angle, detected_image = ImagesDescriber.find_rotation_angle(
-            self.current_source_image, self.current_destination_image, self.correlation_settings.detection_match_count)
+            self.current_source_image, self.current_destination_image, self.correlation_settings.detection_match_count,
+            FeaturesMatcher.from_configuration(self.correlation_settings),
+            self.correlation_settings.orb_features_count)
         FigureContainer.add(detected_image)
+        if self.correlation_settings.is_rotate_and_crop_fused:
+            self.destination_rotation_angle = rotate_angle
+            app_logger.info("Correlation pipeline: Destination rotation is postponed to the found image cropping")
+            return
         yield next(self.correlation_pipeline)
-        rotated_image = ImageBuilder.rotate_image(self.current_destination_image, rotate_angle)
+        rotated_image = ImageBuilder.rotate_image(
+            self.current_destination_image, rotate_angle, self.correlation_settings.correlation_threads_count)
         FigureContainer.add(rotated_image)
         self.current_destination_image = rotated_image
         app_logger.info("Correlation pipeline: Destination rotated")
@@ -228,9 +261,14 @@ class CorrelationMapPipelineBuilder:
         :return: generator that returns current correlation pipeline stage
         """
         app_logger.info("Correlation pipeline: Finding source image in the destination image")
+        if self.destination_rotation_angle is not None:
+            yield from self._find_and_crop_rotated()
+            return
         yield next(self.correlation_pipeline)
         image_selection = ImagesDescriber.find_image_points(
-            self.current_source_image, self.current_destination_image, self.correlation_settings.correlation_type)
+            self.current_source_image, self.current_destination_image, self.correlation_settings.correlation_type,
+            self.correlation_settings.correlation_threads_count,
+            self.correlation_settings.template_search_pyramid_levels)
         yield next(self.correlation_pipeline)
         marked_image = ImageBuilder.mark_found_image(self.current_destination_image, image_selection)
         FigureContainer.add(marked_image)
@@ -240,10 +278,62 @@ class CorrelationMapPipelineBuilder:
         self.current_destination_image = cropped_image
         app_logger.info("Correlation pipeline: Source image found")
 
+    def _find_and_crop_rotated(self) -> Generator[CurrentCorrelationStage, None, None]:
+        """Sub-pipeline to find and crop the source image in the destination image rotated by the found angle
+
+        1) Find image region in the rotated destination image that represents
+           the source image warping only the regions around the candidates
+        2) Rotate and crop found region of the destination image by a single
+           warp of the region
+        3) Add cropped image to image container
+        4) Set cropped image as current destination image
+
+        Rotated and marked destination images are not created.
+
+        :return: generator that returns current correlation pipeline stage
+        """
+        yield next(self.correlation_pipeline)
+        image_selection = ImagesDescriber.find_rotated_image_points(
+            self.current_source_image, self.current_destination_image, self.destination_rotation_angle,
+            self.correlation_settings.correlation_type, self.correlation_settings.template_search_pyramid_levels)
+        yield next(self.correlation_pipeline)
+        cropped_image = ImageBuilder.rotate_and_crop_image(
+            self.current_destination_image, self.destination_rotation_angle, image_selection)
+        FigureContainer.add(cropped_image)
+        self.current_destination_image = cropped_image
+        self.destination_rotation_angle = None
+        app_logger.info("Correlation pipeline: Source image found in the rotated destination image")
+
+    def _register_and_crop(self) -> Generator[CurrentCorrelationStage, None, None]:
+        """Sub-pipeline to register and crop destination image by phase correlation
+
+        1) Find rotation angle of the destination image and the region of
+           the source image in the rotated destination image
+        2) Rotate and crop found region of the destination image by a single
+           warp of the region
+        3) Add cropped image to image container
+        4) Set cropped image as current destination image
+
+        :return: generator that returns current correlation pipeline stage
+        """
+        app_logger.info("Correlation pipeline: Registering destination image by phase correlation")
+        yield next(self.correlation_pipeline)
+        rotate_angle, image_selection = PhaseCorrelationRegistrator.register(
+            self.current_source_image, self.current_destination_image, self.correlation_settings.gray_conversion)
+        yield next(self.correlation_pipeline)
+        cropped_image = ImageBuilder.rotate_and_crop_image(
+            self.current_destination_image, rotate_angle, image_selection)
+        FigureContainer.add(cropped_image)
+        self.current_destination_image = cropped_image
+        app_logger.info("Correlation pipeline: Destination image registered")
+
     def _build_correlation_map(self) -> Generator[CurrentCorrelationStage, None, None]:
         """Sub-pipeline to build correlation map
 
-        Create correlation map and add it to the image container
+        Create correlation map and add it to the image container. Create maps
+        of the additional correlation types from the same block statistics and
+        add them to the image container. Create maps of the image colour
+        channels if they are configured and add them to the image container.
 
         :return: generator that returns current correlation pipeline stage
         """
@@ -253,11 +343,34 @@ class CorrelationMapPipelineBuilder:
             self.current_source_image,
             self.current_destination_image,
             self.correlation_settings.correlation_type,
-            self.correlation_settings.correlation_pieces_count,
+            self.correlation_settings,
         ).build_correlation_map()
         FigureContainer.add(correlation_map)
+        for correlation_type in self.correlation_settings.additional_correlation_types:
+            if correlation_type != self.correlation_settings.correlation_type:
+                FigureContainer.add(correlation_map.build_related_correlation_map(correlation_type))
+        if self.correlation_settings.channel_maps or self.correlation_settings.combined_channels_map:
+            for channel_map in correlation_map.build_channel_correlation_maps():
+                FigureContainer.add(channel_map)
         app_logger.info("Correlation pipeline: Correlation map calculated")
 
+    def _correlate_frames(self) -> Generator[CurrentCorrelationStage, None, None]:
+        """Sub-pipeline to correlate frames of the frame source
+
+        Correlate every frame with the previous frame or with the source image
+        in the fixed reference mode. Add frame scores to the image container.
+
+        :return: generator that returns current correlation pipeline stage
+        """
+        app_logger.info("Correlation pipeline: Correlating frames of %s", self.correlation_settings.frame_source_path)
+        yield next(self.correlation_pipeline)
+        reference_image = self.current_source_image \
+            if self.correlation_settings.frame_reference_mode == FrameReferenceMode.FIXED_REFERENCE else None
+        frame_sequence_correlation = FrameSequenceCorrelator(self.correlation_settings).correlate_file(
+            self.correlation_settings.frame_source_path, reference_image)
+        FigureContainer.add(FrameScores(frame_sequence_correlation))
+        app_logger.info("Correlation pipeline: Frames correlated")
+
     def start_correlation_building_pipeline(self) -> Generator[CurrentCorrelationStage, None, None]:
         """Start correlation building pipeline
 
@@ -269,18 +382,25 @@ class CorrelationMapPipelineBuilder:
         self.current_source_image = FigureContainer.get(FigureType.SOURCE_IMAGE)
         self.current_destination_image = FigureContainer.get(FigureType.DESTINATION_IMAGE)
 
+        for sub_pipeline in self.__get_sub_pipelines():
+            for stage in sub_pipeline():
+                yield stage
+        yield next(self.correlation_pipeline)
+
+        app_logger.info("Correlation pipeline: pipeline finished")
+
+    def __get_sub_pipelines(self) -> list[Callable[[], Generator[CurrentCorrelationStage, None, None]]]:
+        """Returns list of sub-pipelines to run from the correlation settings"""
+        if self.correlation_settings.frame_source_path:
+            return [self._correlate_frames]
         sub_pipelines: list[Callable[[], Generator[CurrentCorrelationStage, None, None]]] = []
-        if self.correlation_settings.auto_rotate:
+        if self.correlation_settings.auto_rotate and not self.correlation_settings.phase_registration:
             sub_pipelines.append(self._rotate_image)
         if self.correlation_settings.chose_important_part:
             sub_pipelines.append(self._crop_image)
-        if self.correlation_settings.auto_find:
+        if self.correlation_settings.phase_registration:
+            sub_pipelines.append(self._register_and_crop)
+        elif self.correlation_settings.auto_find:
             sub_pipelines.append(self._find_and_crop)
         sub_pipelines.append(self._build_correlation_map)
-
-        for sub_pipeline in sub_pipelines:
-            for stage in sub_pipeline():
-                yield stage
-        yield next(self.correlation_pipeline)
-
-        app_logger.info("Correlation pipeline: pipeline finished")
+        return sub_pipelines
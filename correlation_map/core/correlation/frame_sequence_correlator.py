@@ -0,0 +1,180 @@
+"""Frame sequence correlator
+
+Contains correlator that compares every frame of the frame sequence with the
+previous frame or with the fixed reference frame. Correlation block grids of
+all frames are written into the memory mapped stack, and every frame gets the
+summary score.
+"""
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, FrameReferenceMode
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.correlation_backends import CorrelationBackendsRegistry
+from correlation_map.core.images.frame_source import FrameSource
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.tools.common import create_run_directory, remove_directory_with
+from correlation_map.gui.tools.logger import app_logger
+
+
+@dataclass
+class FrameSequenceCorrelation:
+    """Correlation results of the frame sequence
+
+    Element with the (frame, row, column) index of the correlation grids stack
+    contains correlation of the block of the frame with the same block of its
+    reference. Frame score is the mean correlation of the frame blocks.
+    """
+    correlation_grids: ndarray
+    frame_scores: ndarray
+    frames_per_second: float
+
+
+class FrameSequenceCorrelator:
+    """Correlate frames of the frame sequence with their references
+
+    Block sums of the frame are calculated once. In the previous frame mode
+    destination block sums of the frame are source block sums of the next
+    frame. In the fixed reference mode source block sums of the reference are
+    reused for all frames. Only destination and cross sums are calculated for
+    every frame.
+    """
+
+    GRIDS_FILE_NAME_SUFFIX = "frames_grids.dat"
+
+    def __init__(self, correlation_configuration: CorrelationConfiguration):
+        """
+        :param correlation_configuration: correlation configuration with the
+            correlation type, pieces amount, stride, edge blocks mode and
+            frame reference mode
+        """
+        self.correlation_configuration = correlation_configuration
+        self.correlation_type = correlation_configuration.correlation_type
+        self.reference_mode = correlation_configuration.frame_reference_mode
+        self.compute_dtype = correlation_configuration.compute_precision.dtype
+        self.pieces_amount = correlation_configuration.pieces_shape
+        self.stride = correlation_configuration.pieces_stride
+        self.edge_mode = correlation_configuration.edge_blocks_mode
+        self.base_directory = correlation_configuration.streaming_directory
+
+    def correlate_file(self, path: str, reference_image: Optional[ImageWrapper] = None) -> FrameSequenceCorrelation:
+        """Correlate frames of the video file or the images sequence decoded in the background thread
+
+        :param path: path to the video file or the images sequence pattern
+        :param reference_image: fixed reference image, used only in the fixed
+            reference mode
+        :return: memory mapped stack of the correlation block grids and frames
+            summary scores
+        """
+        frame_source = FrameSource(path, self.correlation_configuration.frames_queue_size)
+        return self.correlate(frame_source, reference_image)
+
+    def correlate(self, frames: Iterable[ndarray],
+                  reference_image: Optional[ImageWrapper] = None) -> FrameSequenceCorrelation:
+        """Correlate every frame with the previous frame or the fixed reference
+
+        The first frame is the reference of the next frame and isn't
+        correlated itself, if the reference image isn't given in the fixed
+        reference mode.
+
+        :param frames: frame matrices with the same shape, usually frame
+            source decoding frames in the background
+        :param reference_image: fixed reference image, used only in the fixed
+            reference mode
+        :return: memory mapped stack of the correlation block grids and frames
+            summary scores, the run directory of the grids is removed with
+            the grids stack
+        :raise ValueError: when the frame shape differs from the reference one
+        """
+        directory = create_run_directory(self.base_directory)
+        try:
+            frame_sequence_correlation = self._correlate_frames(frames, reference_image, directory)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        if isinstance(frame_sequence_correlation.correlation_grids, np.memmap):
+            remove_directory_with(frame_sequence_correlation.correlation_grids, directory)
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+        return frame_sequence_correlation
+
+    def _correlate_frames(self, frames: Iterable[ndarray], reference_image: Optional[ImageWrapper],
+                          directory: str) -> FrameSequenceCorrelation:
+        """Correlate every frame with its reference writing correlation grids into the given directory
+
+        :param frames: frame matrices with the same shape
+        :param reference_image: fixed reference image, used only in the fixed
+            reference mode
+        :param directory: run directory to write correlation grids to
+        :return: memory mapped stack of the correlation block grids and frames
+            summary scores
+        :raise ValueError: when the frame shape differs from the reference one
+        """
+        correlation_method = CorrelationBackendsRegistry.get_correlation_method(
+            self.correlation_type, self.correlation_configuration)
+        grids_path = os.path.join(directory, f"{self.correlation_type.correlation_type}_{self.GRIDS_FILE_NAME_SUFFIX}")
+        reference_matrix, reference_sums = None, None
+        if self.reference_mode == FrameReferenceMode.FIXED_REFERENCE and reference_image is not None:
+            reference_matrix, reference_sums = self._get_reference(reference_image.image)
+        frame_scores: list[float] = []
+        grid_shape = (0, 0)
+        start_time = time.perf_counter()
+        app_logger.debug("Correlating frames with the %s, writing grids to %s", self.reference_mode.value, grids_path)
+        with open(grids_path, "wb") as grids_file:
+            for frame in frames:
+                if reference_matrix is None:
+                    reference_matrix, reference_sums = self._get_reference(frame)
+                    continue
+                gray_matrix = self._get_covered_matrix(frame)
+                if gray_matrix.shape != reference_matrix.shape:
+                    raise ValueError(f"Frame {len(frame_scores) + 1} shape {frame.shape[:2]} differs from the "
+                                     f"reference shape")
+                block_statistics = BlockStatistics.from_reference_sums(
+                    reference_sums, reference_matrix, gray_matrix, self.pieces_amount, self.stride, self.edge_mode)
+                correlation_grid = correlation_method(
+                    block_statistics.to_calculation_dtype(self.compute_dtype)).astype(self.compute_dtype, copy=False)
+                correlation_grid.tofile(grids_file)
+                grid_shape = correlation_grid.shape
+                frame_scores.append(float(correlation_grid.mean(dtype=np.float64)))
+                if self.reference_mode == FrameReferenceMode.PREVIOUS_FRAME:
+                    reference_matrix = gray_matrix
+                    reference_sums = block_statistics.destination_sum, block_statistics.destination_square_sum
+        elapsed_time = time.perf_counter() - start_time
+        frames_per_second = len(frame_scores) / elapsed_time if elapsed_time else 0.0
+        app_logger.info("Correlated %s frames, %.2f frames per second", len(frame_scores), frames_per_second)
+        correlation_grids = np.memmap(grids_path, dtype=self.compute_dtype, mode="r",
+                                      shape=(len(frame_scores), *grid_shape)) if frame_scores else \
+            np.empty((0, *grid_shape), dtype=self.compute_dtype)
+        return FrameSequenceCorrelation(correlation_grids, np.array(frame_scores), frames_per_second)
+
+    def _get_reference(self, image_matrix: ndarray) -> tuple[ndarray, tuple[ndarray, ndarray]]:
+        """Return reference gray matrix and its block sums and square sums
+
+        :param image_matrix: reference image or frame matrix
+        :return: gray matrix of the covered part and its block sums
+        """
+        gray_matrix = self._get_covered_matrix(image_matrix)
+        return gray_matrix, BlockStatistics.get_reference_sums(
+            gray_matrix, self.pieces_amount, self.stride, self.edge_mode)
+
+    def _get_covered_matrix(self, image_matrix: ndarray) -> ndarray:
+        """Return gray matrix of the image part covered by the blocks
+
+        Whole gray matrix is covered if the edge blocks are padded or reduced.
+
+        :param image_matrix: image or frame matrix
+        :return: gray matrix of the covered image part
+        """
+        gray_matrix = ImageBuilder.get_gray_matrix(
+            image_matrix, self.correlation_configuration.gray_conversion, self.correlation_configuration.gray_dtype)
+        rows, columns = BlockStatistics.get_grid_shape(
+            *gray_matrix.shape, self.pieces_amount, self.stride, self.edge_mode)
+        height, width = BlockStatistics.get_covered_shape(rows, columns, self.pieces_amount, self.stride)
+        return gray_matrix[:height, :width]
@@ -0,0 +1,160 @@
+"""Correlation map statistics
+
+Contains running statistics of the correlation block grid accumulated tile by
+tile while the map is built: amount, mean, variance, minimum, maximum and
+histogram of the block correlations. Percentiles, median and median absolute
+deviation are estimated from the histogram, so the statistics are available
+without scanning the grid again.
+"""
+from typing import Final
+
+import numpy as np
+from numpy import ndarray
+
+
+class MapStatistics:
+    """Running statistics of the block correlations
+
+    Mean and variance are merged from the tiles ones by the parallel
+    variance algorithm. Histogram has the fixed amount of bins, its range
+    covers the first tile and is doubled when the next tile doesn't fit in it,
+    so percentiles are exact up to the bin width. Blocks with the undefined
+    correlations are skipped.
+    """
+
+    BINS_COUNT: Final[int] = 1024
+    STRIP_SIZE: Final[int] = 1 << 20
+    # Scale of the median absolute deviation to estimate the standard deviation of the normal distribution
+    MAD_SCALE: Final[float] = 1.4826
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.squared_deviations_sum = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.histogram = np.zeros(self.BINS_COUNT, dtype=np.int64)
+        self.histogram_start = 0.0
+        self.bin_width = 0.0
+
+    @classmethod
+    def from_grid(cls, correlation_grid: ndarray) -> "MapStatistics":
+        """Accumulate statistics of the whole correlation grid strip by strip
+
+        :param correlation_grid: correlation block grid, memory mapped grids
+            are read by strips
+        :return: accumulated statistics
+        """
+        map_statistics = cls()
+        strip_rows = max(cls.STRIP_SIZE // max(correlation_grid.shape[1], 1), 1)
+        for first_row in range(0, correlation_grid.shape[0], strip_rows):
+            map_statistics.update(np.asarray(correlation_grid[first_row:first_row + strip_rows]))
+        return map_statistics
+
+    @property
+    def variance(self) -> float:
+        """Return variance of the block correlations"""
+        return self.squared_deviations_sum / self.count if self.count else float("nan")
+
+    @property
+    def standard_deviation(self) -> float:
+        """Return standard deviation of the block correlations"""
+        return float(np.sqrt(self.variance))
+
+    @property
+    def median(self) -> float:
+        """Return median of the block correlations estimated from the histogram"""
+        return self.get_percentile(50)
+
+    @property
+    def median_absolute_deviation(self) -> float:
+        """Return median absolute deviation of the block correlations estimated from the histogram"""
+        if not self.count:
+            return float("nan")
+        deviations = np.abs(self._get_bins_centers() - self.median)
+        order = np.argsort(deviations, kind="stable")
+        cumulative_counts = np.cumsum(self.histogram[order])
+        return float(deviations[order][np.searchsorted(cumulative_counts, self.count / 2)])
+
+    def update(self, correlation_tile: ndarray):
+        """Add correlations of the finished grid tile to the statistics
+
+        :param correlation_tile: correlations of the tile blocks
+        """
+        values = np.asarray(correlation_tile, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return
+        tile_mean = float(values.mean())
+        tile_squared_deviations_sum = float(np.square(values - tile_mean).sum())
+        count = self.count + values.size
+        delta = tile_mean - self.mean
+        self.squared_deviations_sum += tile_squared_deviations_sum + delta * delta * self.count * values.size / count
+        self.mean += delta * values.size / count
+        self.count = count
+        tile_minimum, tile_maximum = float(values.min()), float(values.max())
+        self._extend_histogram(tile_minimum, tile_maximum)
+        self.minimum, self.maximum = min(self.minimum, tile_minimum), max(self.maximum, tile_maximum)
+        bins_indexes = np.minimum(((values - self.histogram_start) / self.bin_width).astype(np.int64),
+                                  self.BINS_COUNT - 1)
+        self.histogram += np.bincount(bins_indexes, minlength=self.BINS_COUNT)
+
+    def get_percentile(self, percent: float) -> float:
+        """Return percentile of the block correlations estimated from the histogram
+
+        Correlations are supposed to be uniform inside the histogram bins.
+
+        :param percent: percent of the blocks with the lower correlations
+        :return: estimated percentile clipped to the minimal and maximal
+            correlations
+        """
+        if not self.count:
+            return float("nan")
+        rank = percent / 100 * self.count
+        cumulative_counts = np.cumsum(self.histogram)
+        bin_index = min(int(np.searchsorted(cumulative_counts, rank)), self.BINS_COUNT - 1)
+        previous_count = cumulative_counts[bin_index - 1] if bin_index else 0
+        bin_fraction = (rank - previous_count) / self.histogram[bin_index] if self.histogram[bin_index] else 0.0
+        percentile = self.histogram_start + (bin_index + bin_fraction) * self.bin_width
+        return float(np.clip(percentile, self.minimum, self.maximum))
+
+    def get_robust_z_scores(self, correlation_grid: ndarray) -> ndarray:
+        """Return robust z-scores of the block correlations by the median and median absolute deviation
+
+        :param correlation_grid: correlation block grid of the statistics
+        :return: float64 anomaly grid, zeros if the correlations don't deviate
+        """
+        scale = self.MAD_SCALE * self.median_absolute_deviation
+        deviations = np.asarray(correlation_grid, dtype=np.float64) - self.median
+        if not scale or not np.isfinite(scale):
+            return np.zeros_like(deviations)
+        return deviations / scale
+
+    def _get_bins_centers(self) -> ndarray:
+        """Return centers of the histogram bins"""
+        return self.histogram_start + (np.arange(self.BINS_COUNT) + 0.5) * self.bin_width
+
+    def _extend_histogram(self, minimum: float, maximum: float):
+        """Double histogram range until it covers the given correlations range
+
+        Every doubling merges the neighbour bins pairs, and the old range
+        becomes the lower or upper half of the new range.
+
+        :param minimum: minimal correlation to cover
+        :param maximum: maximal correlation to cover
+        """
+        if not self.bin_width:
+            self.histogram_start = minimum
+            correlations_range = maximum - minimum or max(abs(minimum), 1.0) * 1e-6
+            # Range is padded a bit, so the maximal correlation always fits in the last bin
+            self.bin_width = correlations_range * (1 + 1e-9) / self.BINS_COUNT
+            return
+        while minimum < self.histogram_start or maximum > self.histogram_start + self.bin_width * self.BINS_COUNT:
+            merged_bins = self.histogram.reshape(-1, 2).sum(axis=1)
+            self.histogram = np.zeros_like(self.histogram)
+            if minimum < self.histogram_start:
+                self.histogram[self.BINS_COUNT // 2:] = merged_bins
+                self.histogram_start -= self.bin_width * self.BINS_COUNT
+            else:
+                self.histogram[:self.BINS_COUNT // 2] = merged_bins
+            self.bin_width *= 2
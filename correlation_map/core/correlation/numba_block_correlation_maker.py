@@ -0,0 +1,114 @@
+"""Module contains block correlation operations compiled by Numba
+
+Module requires optional `numba` package, so it's imported only by the
+correlation backends registry when the package is installed.
+"""
+from typing import Final
+
+# Numba is optional, this module is imported only when it's installed, so pylint may not find it
+import numba  # pylint: disable=import-error
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+
+SQUARE_DIFFERENCE: Final[int] = 0
+SQUARE_DIFFERENCE_NORMED: Final[int] = 1
+CROSS_CORRELATION: Final[int] = 2
+CROSS_CORRELATION_NORMED: Final[int] = 3
+CORRELATION_COEFFICIENT: Final[int] = 4
+CORRELATION_COEFFICIENT_NORMED: Final[int] = 5
+
+
+@numba.njit(parallel=True, cache=True)
+def calculate_correlations(correlation_kind: int, sums: tuple, pixels_counts: ndarray) -> ndarray:
+    """Calculate correlations of the given kind for every block in parallel
+
+    Integer sums are combined in integers like in the `BlockCorrelationMaker`,
+    and their products are calculated in float64.
+
+    :param correlation_kind: one of the module correlation kinds constants
+    :param sums: flat source sums, destination sums, source square sums,
+        destination square sums and cross sums
+    :param pixels_counts: flat amounts of pixels in the blocks
+    :return: flat float64 array of the block correlations
+    """
+    source_sum, destination_sum, source_square_sum, destination_square_sum, cross_sum = sums
+    result = np.empty(cross_sum.size, dtype=np.float64)
+    # Numba compiles prange to the parallel loop, pylint sees only its Python function returning no iterable
+    for index in numba.prange(cross_sum.size):  # pylint: disable=not-an-iterable
+        pixels_count = pixels_counts[index]
+        if correlation_kind == CROSS_CORRELATION:
+            result[index] = cross_sum[index]
+            continue
+        if correlation_kind <= SQUARE_DIFFERENCE_NORMED:
+            numerator = source_square_sum[index] - 2 * cross_sum[index] + destination_square_sum[index]
+        elif correlation_kind == CROSS_CORRELATION_NORMED:
+            numerator = cross_sum[index]
+        else:
+            numerator = pixels_count * cross_sum[index] - source_sum[index] * destination_sum[index]
+        if correlation_kind == SQUARE_DIFFERENCE:
+            result[index] = numerator
+            continue
+        if correlation_kind == CORRELATION_COEFFICIENT:
+            result[index] = numerator / pixels_count
+            continue
+        if correlation_kind == CORRELATION_COEFFICIENT_NORMED:
+            source_variance = max(pixels_count * source_square_sum[index] - source_sum[index] ** 2, 0)
+            destination_variance = max(
+                pixels_count * destination_square_sum[index] - destination_sum[index] ** 2, 0)
+            denominator = np.sqrt(np.float64(source_variance) * np.float64(destination_variance))
+        else:
+            denominator = np.sqrt(np.float64(source_square_sum[index]) * np.float64(destination_square_sum[index]))
+        result[index] = numerator / denominator if denominator != 0 else 1.0
+    return result
+
+
+class NumbaBlockCorrelationMaker:
+    """Provide different correlation methods for all blocks at once compiled by Numba
+
+    Methods have the same names and return the same values as the
+    `BlockCorrelationMaker` ones, but all blocks are calculated in a single
+    parallel loop without temporary arrays. Results are float64 arrays.
+    """
+
+    __slots__ = []
+
+    @classmethod
+    def square_difference_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the square correlation coefficients for all blocks"""
+        return cls._calculate(SQUARE_DIFFERENCE, statistics)
+
+    @classmethod
+    def square_difference_normed_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed square correlation coefficients for all blocks"""
+        return cls._calculate(SQUARE_DIFFERENCE_NORMED, statistics)
+
+    @classmethod
+    def cross_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the cross correlation coefficients for all blocks"""
+        return cls._calculate(CROSS_CORRELATION, statistics)
+
+    @classmethod
+    def cross_correlation_normed(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed cross correlation coefficients for all blocks"""
+        return cls._calculate(CROSS_CORRELATION_NORMED, statistics)
+
+    @classmethod
+    def correlation_coefficient(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the correlation coefficients for all blocks"""
+        return cls._calculate(CORRELATION_COEFFICIENT, statistics)
+
+    @classmethod
+    def correlation_coefficient_normed(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed correlation coefficients for all blocks"""
+        return cls._calculate(CORRELATION_COEFFICIENT_NORMED, statistics)
+
+    @staticmethod
+    def _calculate(correlation_kind: int, statistics: BlockStatistics) -> ndarray:
+        """Calculate correlations of the given kind and return them with the block grid shape"""
+        sums = tuple(np.ascontiguousarray(block_sums).ravel() for block_sums in (
+            statistics.source_sum, statistics.destination_sum, statistics.source_square_sum,
+            statistics.destination_square_sum, statistics.cross_sum))
+        pixels_counts = np.ascontiguousarray(np.broadcast_to(statistics.pixels_count, statistics.shape)).ravel()
+        return calculate_correlations(correlation_kind, sums, pixels_counts).reshape(statistics.shape)
@@ -0,0 +1,120 @@
+"""Module contains block correlation operations implemented by OpenCV arithmetic functions"""
+import functools
+from typing import Callable, Union
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.correlation.block_correlation_maker import BlockCorrelationMaker
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+
+
+def calculate_empty_grid_by_numpy(correlation_method: Callable) -> Callable:
+    """Decorate block correlation method to calculate empty block grids by the NumPy block correlation maker
+
+    OpenCV arithmetic functions don't support empty arrays.
+    """
+    @functools.wraps(correlation_method)
+    def wrapper(cls, statistics: BlockStatistics) -> ndarray:
+        if not statistics.cross_sum.size:
+            return getattr(BlockCorrelationMaker, correlation_method.__name__)(statistics)
+        return correlation_method(cls, statistics)
+    return wrapper
+
+
+class OpenCVBlockCorrelationMaker:
+    """Provide different correlation methods for all blocks at once using OpenCV arithmetic
+
+    Methods have the same names and return the same values as the
+    `BlockCorrelationMaker` ones. OpenCV arithmetic doesn't support int64
+    arrays, so integer block sums are converted to float64 before the
+    calculations. Float block sums are processed in their own dtype. Pixels
+    counts arrays of the reduced edge blocks are applied element-wise.
+    """
+
+    __slots__ = []
+
+    @classmethod
+    @calculate_empty_grid_by_numpy
+    def square_difference_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the square correlation coefficients for all blocks"""
+        source_square_sum, destination_square_sum, cross_sum = cls._get_float_sums(
+            statistics.source_square_sum, statistics.destination_square_sum, statistics.cross_sum)
+        return cv2.add(cv2.scaleAdd(cross_sum, -2.0, source_square_sum), destination_square_sum)
+
+    @classmethod
+    @calculate_empty_grid_by_numpy
+    def square_difference_normed_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed square correlation coefficients for all blocks"""
+        source_square_sum, destination_square_sum = cls._get_float_sums(
+            statistics.source_square_sum, statistics.destination_square_sum)
+        denominator = cv2.sqrt(cv2.multiply(source_square_sum, destination_square_sum))
+        return cls._divide_or_one(cls.square_difference_correlation(statistics), denominator)
+
+    @classmethod
+    @calculate_empty_grid_by_numpy
+    def cross_correlation(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the cross correlation coefficients for all blocks"""
+        return cls._get_float_sums(statistics.cross_sum)[0].copy()
+
+    @classmethod
+    @calculate_empty_grid_by_numpy
+    def cross_correlation_normed(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed cross correlation coefficients for all blocks"""
+        source_square_sum, destination_square_sum, cross_sum = cls._get_float_sums(
+            statistics.source_square_sum, statistics.destination_square_sum, statistics.cross_sum)
+        denominator = cv2.sqrt(cv2.multiply(source_square_sum, destination_square_sum))
+        return cls._divide_or_one(cross_sum, denominator)
+
+    @classmethod
+    @calculate_empty_grid_by_numpy
+    def correlation_coefficient(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the correlation coefficients for all blocks"""
+        centered_cross_sum = cls._get_centered_cross_sum(statistics)
+        if isinstance(statistics.pixels_count, ndarray):
+            return cv2.divide(centered_cross_sum, statistics.pixels_count.astype(centered_cross_sum.dtype))
+        return cv2.multiply(centered_cross_sum, 1 / statistics.pixels_count)
+
+    @classmethod
+    @calculate_empty_grid_by_numpy
+    def correlation_coefficient_normed(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns the normed correlation coefficients for all blocks"""
+        source_sum, destination_sum, source_square_sum, destination_square_sum = cls._get_float_sums(
+            statistics.source_sum, statistics.destination_sum,
+            statistics.source_square_sum, statistics.destination_square_sum)
+        source_variance = cls._scale_add(
+            source_square_sum, statistics.pixels_count, cv2.multiply(source_sum, source_sum, scale=-1))
+        destination_variance = cls._scale_add(
+            destination_square_sum, statistics.pixels_count, cv2.multiply(destination_sum, destination_sum, scale=-1))
+        denominator = cv2.sqrt(cv2.multiply(
+            cv2.threshold(source_variance, 0, 0, cv2.THRESH_TOZERO)[1],
+            cv2.threshold(destination_variance, 0, 0, cv2.THRESH_TOZERO)[1]))
+        return cls._divide_or_one(cls._get_centered_cross_sum(statistics), denominator)
+
+    @classmethod
+    def _get_centered_cross_sum(cls, statistics: BlockStatistics) -> ndarray:
+        """Returns cross sums of the centered blocks multiplied by the block pixels amount"""
+        source_sum, destination_sum, cross_sum = cls._get_float_sums(
+            statistics.source_sum, statistics.destination_sum, statistics.cross_sum)
+        return cls._scale_add(cross_sum, statistics.pixels_count, cv2.multiply(source_sum, destination_sum, scale=-1))
+
+    @staticmethod
+    def _scale_add(block_sums: ndarray, pixels_count: Union[int, ndarray], addend: ndarray) -> ndarray:
+        """Multiply block sums by the blocks pixels counts and add the addend to them"""
+        if isinstance(pixels_count, ndarray):
+            return cv2.add(cv2.multiply(block_sums, pixels_count.astype(block_sums.dtype)), addend)
+        return cv2.scaleAdd(block_sums, float(pixels_count), addend)
+
+    @staticmethod
+    def _get_float_sums(*sums: ndarray) -> list[ndarray]:
+        """Returns contiguous float block sums supported by OpenCV arithmetic"""
+        return [np.ascontiguousarray(block_sums, dtype=np.result_type(block_sums.dtype, np.float32))
+                for block_sums in sums]
+
+    @staticmethod
+    def _divide_or_one(numerator: ndarray, denominator: ndarray) -> ndarray:
+        """Divide arrays element-wise and use 1 where the denominator is zero"""
+        result = cv2.divide(numerator, denominator)
+        result[denominator == 0] = 1
+        return result
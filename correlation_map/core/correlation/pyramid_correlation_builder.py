@@ -0,0 +1,145 @@
+"""Pyramid correlation builder
+
+Contains builder that calculates coarse correlation map on the downsampled
+pyramid level and recalculates correlations with the configured pieces amount
+only inside the coarse blocks with scores crossing the refinement threshold.
+"""
+from typing import Optional
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.correlation.band_correlation_builder import BandCorrelationBuilder
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.gui.tools.logger import app_logger
+
+
+class PyramidCorrelationBuilder(BandCorrelationBuilder):
+    """Build correlation block grid from coarse to fine
+
+    Fine blocks are assigned to the coarse block containing their centers.
+    Statistics of the not refined fine blocks are the coarse block statistics
+    scaled to the fine block pixels count, so every correlation type of them
+    equals to the coarse block correlation in the fine block scale. These
+    correlations are only approximations of the fine ones, they are marked by
+    the refined mask. Partial edge blocks are always refined.
+    """
+
+    def __init__(self, correlation_type: CorrelationTypes, correlation_configuration: CorrelationConfiguration):
+        super().__init__(correlation_type, correlation_configuration)
+        self.refinement_threshold = correlation_configuration.refinement_threshold
+        self.pyramid_levels = correlation_configuration.pyramid_levels
+        self.coarse_pieces_amount = correlation_configuration.pyramid_pieces_count
+        self.refinement_margin = correlation_configuration.refinement_margin
+        # Fraction and mask of the fine blocks calculated with the fine pieces in the last build
+        self.refined_fraction: Optional[float] = None
+        self.refined_mask: Optional[ndarray] = None
+
+    @property
+    def coarse_cell_size(self) -> int:
+        """Return size of the coarse block in the full resolution image pixels"""
+        return self.coarse_pieces_amount * 2 ** self.pyramid_levels
+
+    def build(self, source_matrix: ndarray, destination_matrix: ndarray) -> tuple[BlockStatistics, ndarray]:
+        rows, columns = BlockStatistics.get_grid_shape(
+            *source_matrix.shape, self.pieces_amount, self.stride, self.edge_mode)
+        coarse_statistics = self._get_coarse_statistics(source_matrix, destination_matrix)
+        coarse_grid = self.correlation_method(coarse_statistics)
+        if self.correlation_type.is_lower_better:
+            refine_flags = coarse_grid > self.refinement_threshold
+        else:
+            refine_flags = coarse_grid < self.refinement_threshold
+        if self.refinement_margin and refine_flags.size:
+            refine_flags = cv2.dilate(refine_flags.astype(np.uint8), np.ones(
+                (2 * self.refinement_margin + 1,) * 2, dtype=np.uint8)).astype(bool)
+        # Fine blocks outside the coarse blocks are always refined
+        refine_flags = np.pad(refine_flags, ((0, 1), (0, 1)), constant_values=True)
+        row_indexes = self._get_coarse_indexes(rows, coarse_grid.shape[0], 0)
+        column_indexes = self._get_coarse_indexes(columns, coarse_grid.shape[1], 1)
+        refine_mask = refine_flags[np.ix_(row_indexes, column_indexes)]
+        # Partial edge blocks are always refined
+        whole_rows, whole_columns = BlockStatistics.get_grid_shape(
+            *source_matrix.shape, self.pieces_amount, self.stride)
+        refine_mask[whole_rows:] = True
+        refine_mask[:, whole_columns:] = True
+
+        block_statistics = BlockStatistics(
+            **{statistics_field: np.pad(getattr(coarse_statistics, statistics_field), ((0, 1), (0, 1)))[
+                np.ix_(row_indexes, column_indexes)] for statistics_field in self.STATISTICS_FIELDS},
+            pixels_count=BlockStatistics.get_pixels_count(
+                *source_matrix.shape, self.pieces_amount, self.stride, self.edge_mode))
+        # Fine rows of the same coarse row have the same refine mask rows, partial edge row is refined separately
+        rows_groups = np.where(np.arange(rows) < whole_rows, row_indexes, -1)
+        rows_groups_starts = np.flatnonzero(np.diff(rows_groups, prepend=-2))
+        for first_row, last_row in zip(rows_groups_starts, np.append(rows_groups_starts[1:], rows)):
+            for first_column, last_column in self._get_runs(refine_mask[first_row]):
+                self._refine_region(
+                    source_matrix, destination_matrix, block_statistics,
+                    (first_row, last_row, first_column, last_column))
+        self.refined_fraction = float(refine_mask.mean()) if refine_mask.size else 0.0
+        self.refined_mask = refine_mask
+        app_logger.debug("Refined %s of %s correlation map blocks", np.count_nonzero(refine_mask), refine_mask.size)
+        return block_statistics, self.correlation_method(block_statistics.to_calculation_dtype(self.compute_dtype))
+
+    def _get_coarse_statistics(self, source_matrix: ndarray, destination_matrix: ndarray) -> BlockStatistics:
+        """Calculate block statistics of the coarse blocks on the downsampled pyramid level
+
+        Statistics are scaled to the fine block pixels count.
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix
+        :return: scaled coarse block statistics
+        """
+        for _ in range(self.pyramid_levels):
+            source_matrix = cv2.pyrDown(source_matrix)
+            destination_matrix = cv2.pyrDown(destination_matrix)
+        app_logger.debug("Calculating coarse correlation map on the %sx%s pyramid level", *source_matrix.shape)
+        coarse_statistics = BlockStatistics.from_image_matrices(
+            source_matrix, destination_matrix, self.coarse_pieces_amount)
+        fine_pixels_count = self.pieces_amount[0] * self.pieces_amount[1]
+        scale = fine_pixels_count / coarse_statistics.pixels_count
+        return BlockStatistics(
+            **{statistics_field: getattr(coarse_statistics, statistics_field) * scale
+               for statistics_field in self.STATISTICS_FIELDS},
+            pixels_count=fine_pixels_count)
+
+    def _get_coarse_indexes(self, fine_blocks_amount: int, coarse_blocks_amount: int, axis: int) -> ndarray:
+        """Return indexes of the coarse blocks containing centers of the fine blocks along one axis
+
+        Fine blocks outside the coarse blocks get the coarse blocks amount
+        index.
+
+        :param fine_blocks_amount: amount of the fine blocks along the axis
+        :param coarse_blocks_amount: amount of the coarse blocks along the axis
+        :param axis: 0 for the block rows, 1 for the block columns
+        :return: coarse block indexes of the fine blocks
+        """
+        fine_centers = np.arange(fine_blocks_amount) * self.stride[axis] + self.pieces_amount[axis] // 2
+        return np.minimum(fine_centers // self.coarse_cell_size, coarse_blocks_amount)
+
+    def _refine_region(self, source_matrix: ndarray, destination_matrix: ndarray, block_statistics: BlockStatistics,
+                       region: tuple[int, int, int, int]):
+        """Calculate block statistics of the fine blocks region and write them to the block statistics
+
+        :param source_matrix: source grayscale image matrix
+        :param destination_matrix: destination grayscale image matrix
+        :param block_statistics: block statistics to write in
+        :param region: first and last (excluded) block rows and columns
+        """
+        first_row, last_row, first_column, last_column = region
+        top, bottom = self.get_covered_image_range((first_row, last_row))
+        left, right = self.get_covered_image_range((first_column, last_column), axis=1)
+        region_statistics = BlockStatistics.from_image_matrices(
+            source_matrix[top:bottom, left:right], destination_matrix[top:bottom, left:right],
+            self.pieces_amount, self.stride, self.edge_mode)
+        for statistics_field in self.STATISTICS_FIELDS:
+            getattr(block_statistics, statistics_field)[first_row:last_row, first_column:last_column] = getattr(
+                region_statistics, statistics_field)
+
+    @staticmethod
+    def _get_runs(mask: ndarray) -> ndarray:
+        """Return first and last (excluded) indexes of the True values runs in the given mask"""
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+        return edges.reshape(-1, 2)
@@ -0,0 +1,114 @@
+"""Reference batch comparator
+
+Contains comparator that compares one reference image against many
+destination images. Reference grayscale matrix, ORB features and block sums
+are taken from the reference template, so only destination images are
+processed for every pair.
+"""
+import time
+from typing import Generator, Iterable, Optional
+
+from correlation_map.core.config.correlation import CorrelationConfiguration
+from correlation_map.core.correlation.reference_template import ReferenceTemplate
+from correlation_map.core.images.features_cache import FeaturesCache
+from correlation_map.core.images.features_matcher import FeaturesMatcher
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.images.phase_correlation_registrator import PhaseCorrelationRegistrator
+from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.gui.tools.logger import app_logger
+
+
+class ReferenceBatchComparator:
+    """Compare the reference template against the destination images
+
+    Every destination image passes the same stages as in the correlation map
+    pipeline: rotation, finding and cropping of the reference image and
+    correlation map building according to the configuration.
+    """
+
+    def __init__(self, reference_template: ReferenceTemplate, correlation_configuration: CorrelationConfiguration):
+        """
+        :param reference_template: prepared reference template
+        :param correlation_configuration: correlation configuration to compare
+            images with
+        """
+        self.reference_template = reference_template
+        self.correlation_configuration = correlation_configuration
+        self.reference_template.configure(correlation_configuration)
+        FeaturesCache.configure(
+            correlation_configuration.features_cache_size, correlation_configuration.features_cache_directory)
+        self.reference_image = reference_template.reference_image
+        self.features_matcher = FeaturesMatcher.from_configuration(correlation_configuration)
+        self.pairs_count: int = 0
+        self.elapsed_time: float = 0.0
+
+    @property
+    def pairs_per_second(self) -> Optional[float]:
+        """Return throughput of the compared pairs or None if nothing was compared"""
+        if not self.pairs_count or not self.elapsed_time:
+            return None
+        return self.pairs_count / self.elapsed_time
+
+    def compare(self, destination_image: ImageWrapper) -> CorrelationMap:
+        """Compare the reference image with the given destination image
+
+        :param destination_image: destination image to compare
+        :return: correlation map of the reference and destination images
+        """
+        threads_count = self.correlation_configuration.correlation_threads_count
+        if self.correlation_configuration.phase_registration:
+            rotate_angle, image_selection = PhaseCorrelationRegistrator.register(
+                self.reference_image, destination_image, self.correlation_configuration.gray_conversion)
+            destination_image = ImageBuilder.rotate_and_crop_image(destination_image, rotate_angle, image_selection)
+        elif self.correlation_configuration.auto_rotate:
+            rotate_angle = ImagesDescriber.find_features_rotation_angle(
+                self.reference_template.features, destination_image, self.features_matcher,
+                self.correlation_configuration.orb_features_count)
+            if self.correlation_configuration.is_rotate_and_crop_fused:
+                image_selection = ImagesDescriber.find_rotated_image_points(
+                    self.reference_image, destination_image, rotate_angle,
+                    self.correlation_configuration.correlation_type,
+                    self.correlation_configuration.template_search_pyramid_levels)
+                destination_image = ImageBuilder.rotate_and_crop_image(destination_image, rotate_angle, image_selection)
+            else:
+                destination_image = ImageBuilder.rotate_image(destination_image, rotate_angle, threads_count)
+        if self.correlation_configuration.auto_find and not self.correlation_configuration.phase_registration \
+                and not self.correlation_configuration.is_rotate_and_crop_fused:
+            image_selection = ImagesDescriber.find_image_points(
+                self.reference_image, destination_image, self.correlation_configuration.correlation_type,
+                threads_count, self.correlation_configuration.template_search_pyramid_levels)
+            destination_image = ImageBuilder.crop_found_image(destination_image, image_selection)
+        correlation_map = CorrelationMap(
+            self.reference_image, destination_image, self.correlation_configuration.correlation_type,
+            self.correlation_configuration)
+        destination_gray_matrix = ImageBuilder.get_image_gray_matrix(
+            destination_image, self.correlation_configuration.gray_conversion,
+            self.reference_template.gray_matrix.dtype)
+        correlation_map.calculate_correlations(self.reference_template.get_block_statistics(destination_gray_matrix))
+        return correlation_map
+
+    def compare_files(self, destination_paths: Iterable[str]) -> Generator[tuple[str, CorrelationMap], None, None]:
+        """Compare the reference image with the destination images from the given files one by one
+
+        Destination images are loaded only when their correlation maps are
+        requested, so only one destination image is kept in memory. Throughput
+        is logged when all files are compared.
+
+        :param destination_paths: paths to the destination images
+        :return: generator that returns destination image path and its
+            correlation map
+        """
+        self.pairs_count = 0
+        self.elapsed_time = 0.0
+        for destination_path in destination_paths:
+            start_time = time.perf_counter()
+            correlation_map = self.compare(ImageWrapper(destination_path))
+            self.elapsed_time += time.perf_counter() - start_time
+            self.pairs_count += 1
+            app_logger.debug("Compared reference image with %s", destination_path)
+            yield destination_path, correlation_map
+        if self.pairs_per_second:
+            app_logger.info("Compared %s pairs in %.2f s, %.2f pairs per second",
+                            self.pairs_count, self.elapsed_time, self.pairs_per_second)
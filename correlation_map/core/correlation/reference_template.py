@@ -0,0 +1,198 @@
+"""Reference template
+
+Contains reference template model that stores everything about the source
+(reference) image needed to compare it with many destination images: source
+image and gray matrices, ORB key points and descriptors and source block sums.
+Reference template is saved to and loaded from the `.npz` file, so it's
+prepared once for all comparisons.
+"""
+from dataclasses import dataclass
+from typing import Sequence
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, EdgeBlocksModes, GrayConversionModes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.images.features_cache import FeaturesCache
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.gui.tools.logger import app_logger
+
+
+@dataclass
+class ReferenceTemplate:
+    """Precalculated attributes of the reference image
+
+    Key points and descriptors are detected on the whole reference image,
+    because destination images are rotated before the important part is
+    chosen. Image and gray matrices are matrices of the important part if it's
+    chosen, block sums are sums of the gray matrix blocks with the template
+    pieces amount, stride and edge blocks mode.
+    """
+    image: ndarray
+    gray_matrix: ndarray
+    gray_conversion: GrayConversionModes
+    key_points: Sequence[cv2.KeyPoint]
+    descriptors: ndarray
+    pieces_amount: tuple[int, int]
+    stride: tuple[int, int]
+    edge_blocks_mode: EdgeBlocksModes
+    source_sum: ndarray
+    source_square_sum: ndarray
+
+    @property
+    def reference_image(self) -> ImageWrapper:
+        """Return reference image wrapper of the template image matrix"""
+        return ImageWrapper.create_image(self.image, FigureType.SOURCE_IMAGE)
+
+    @property
+    def features(self) -> tuple[Sequence[cv2.KeyPoint], ndarray]:
+        """Return reference key points and descriptors"""
+        return self.key_points, self.descriptors
+
+    @classmethod
+    def from_image(cls, image: ImageWrapper,
+                   correlation_configuration: CorrelationConfiguration) -> "ReferenceTemplate":
+        """Prepare reference template of the given image
+
+        :param image: reference image
+        :param correlation_configuration: correlation configuration with the
+            pieces amount, stride and the important part of the image
+        :return: prepared reference template
+        """
+        app_logger.debug("Preparing reference template")
+        FeaturesCache.configure(
+            correlation_configuration.features_cache_size, correlation_configuration.features_cache_directory)
+        key_points, descriptors = ImagesDescriber.detect_features(
+            image, {"nfeatures": correlation_configuration.orb_features_count})
+        if correlation_configuration.chose_important_part:
+            image = ImageBuilder.crop_image(image, correlation_configuration.selected_image_region)
+        gray_conversion = correlation_configuration.gray_conversion
+        gray_matrix = ImageBuilder.get_image_gray_matrix(image, gray_conversion, correlation_configuration.gray_dtype)
+        pieces_amount = correlation_configuration.pieces_shape
+        stride = correlation_configuration.pieces_stride
+        edge_blocks_mode = correlation_configuration.edge_blocks_mode
+        source_sum, source_square_sum = BlockStatistics.get_reference_sums(
+            gray_matrix, pieces_amount, stride, edge_blocks_mode)
+        return cls(
+            image=image.image,
+            gray_matrix=gray_matrix,
+            gray_conversion=gray_conversion,
+            key_points=key_points,
+            descriptors=descriptors,
+            pieces_amount=pieces_amount,
+            stride=stride,
+            edge_blocks_mode=edge_blocks_mode,
+            source_sum=source_sum,
+            source_square_sum=source_square_sum,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ReferenceTemplate":
+        """Load reference template from the `.npz` file
+
+        :param path: path to the reference template file
+        :return: loaded reference template
+        """
+        app_logger.debug("Loading reference template from %s", path)
+        with np.load(path) as template_file:
+            key_points_attributes = template_file["key_points"].tolist()
+            return cls(
+                image=template_file["image"],
+                gray_matrix=template_file["gray_matrix"],
+                gray_conversion=GrayConversionModes[str(template_file["gray_conversion"])]
+                if "gray_conversion" in template_file else GrayConversionModes.MEAN,
+                key_points=[cv2.KeyPoint(x, y, size, angle, response, int(octave), int(class_id))
+                            for x, y, size, angle, response, octave, class_id in key_points_attributes],
+                descriptors=template_file["descriptors"],
+                pieces_amount=BlockStatistics.get_block_shape(template_file["pieces_amount"].tolist()),
+                stride=BlockStatistics.get_block_shape(template_file["stride"].tolist()),
+                edge_blocks_mode=EdgeBlocksModes[str(template_file["edge_blocks_mode"])]
+                if "edge_blocks_mode" in template_file else EdgeBlocksModes.DROP,
+                source_sum=template_file["source_sum"],
+                source_square_sum=template_file["source_square_sum"],
+            )
+
+    def save(self, path: str):
+        """Save reference template to the `.npz` file
+
+        Arrays are saved without compression, so the template is loaded
+        without decoding.
+
+        :param path: path to the reference template file
+        """
+        app_logger.debug("Saving reference template to %s", path)
+        key_points = np.array(
+            [(*key_point.pt, key_point.size, key_point.angle, key_point.response, key_point.octave,
+              key_point.class_id) for key_point in self.key_points], dtype=np.float64).reshape(-1, 7)
+        np.savez(
+            path,
+            image=self.image,
+            gray_matrix=self.gray_matrix,
+            gray_conversion=self.gray_conversion.name,
+            key_points=key_points,
+            descriptors=self.descriptors,
+            pieces_amount=self.pieces_amount,
+            stride=self.stride,
+            edge_blocks_mode=self.edge_blocks_mode.name,
+            source_sum=self.source_sum,
+            source_square_sum=self.source_square_sum,
+        )
+
+    def configure(self, correlation_configuration: CorrelationConfiguration):
+        """Recalculate source block sums if the configured blocks layout differs from the template one
+
+        Source block sums are recalculated if the configured pieces amount,
+        stride or edge blocks mode differs from the template ones. Gray matrix
+        is converted again if the configured gray conversion or dtype differs
+        from the template ones.
+
+        :param correlation_configuration: correlation configuration with the
+            pieces amount, stride, edge blocks mode and gray conversion
+        """
+        blocks_layout = (correlation_configuration.pieces_shape, correlation_configuration.pieces_stride,
+                         correlation_configuration.edge_blocks_mode)
+        gray_conversion = correlation_configuration.gray_conversion
+        gray_dtype = np.dtype(correlation_configuration.gray_dtype if correlation_configuration.gray_dtype is not None
+                              else self.image.dtype)
+        gray_matrix_changed = (gray_conversion, gray_dtype) != (self.gray_conversion, self.gray_matrix.dtype)
+        if gray_matrix_changed:
+            app_logger.debug("Converting reference gray matrix with the %s gray conversion and %s dtype",
+                             gray_conversion.conversion, gray_dtype)
+            self.gray_matrix = ImageBuilder.get_gray_matrix(self.image, gray_conversion, gray_dtype)
+            self.gray_conversion = gray_conversion
+        if gray_matrix_changed or blocks_layout != (self.pieces_amount, self.stride, self.edge_blocks_mode):
+            app_logger.debug("Recalculating reference block sums for %s pieces amount, %s stride and %s",
+                             blocks_layout[0], blocks_layout[1], blocks_layout[2].value)
+            self.source_sum, self.source_square_sum = BlockStatistics.get_reference_sums(
+                self.gray_matrix, *blocks_layout)
+            self.pieces_amount, self.stride, self.edge_blocks_mode = blocks_layout
+
+    def get_block_statistics(self, destination_gray_matrix: ndarray) -> BlockStatistics:
+        """Calculate block statistics of the reference and the given destination using reference block sums
+
+        Reference sums of the partial edge blocks are calculated on the whole
+        reference gray matrix, so if the edge blocks are padded or reduced
+        and the destination shape differs from the reference one, all block
+        sums are calculated again on the common part of the images.
+
+        :param destination_gray_matrix: destination grayscale image matrix
+        :return: block statistics of the common part of the images
+        """
+        height = min(self.gray_matrix.shape[0], destination_gray_matrix.shape[0])
+        width = min(self.gray_matrix.shape[1], destination_gray_matrix.shape[1])
+        if self.edge_blocks_mode != EdgeBlocksModes.DROP and destination_gray_matrix.shape != self.gray_matrix.shape:
+            app_logger.debug("Destination shape differs from the reference one, calculating all block sums")
+            return BlockStatistics.from_image_matrices(
+                self.gray_matrix[:height, :width], destination_gray_matrix[:height, :width], self.pieces_amount,
+                self.stride, edge_mode=self.edge_blocks_mode)
+        if self.edge_blocks_mode == EdgeBlocksModes.DROP:
+            rows, columns = BlockStatistics.get_grid_shape(height, width, self.pieces_amount, self.stride)
+            height, width = BlockStatistics.get_covered_shape(rows, columns, self.pieces_amount, self.stride)
+        return BlockStatistics.from_reference_sums(
+            (self.source_sum, self.source_square_sum), self.gray_matrix[:height, :width],
+            destination_gray_matrix[:height, :width], self.pieces_amount, self.stride, self.edge_blocks_mode)
@@ -0,0 +1,127 @@
+"""Streaming correlation builder
+
+Contains builder that reads source and destination images by horizontal
+strips, calculates block statistics and correlations strip by strip and
+writes them into the memory mapped `.npy` arrays. Peak memory is bounded by
+the strip size instead of the image size. Every builder writes its arrays
+into its own run directory, which is removed with the builder. Correlation map statistics are
+accumulated strip by strip, so the written grid is never scanned again.
+"""
+import math
+import os
+from typing import Final, Optional
+
+import numpy as np
+from numpy import ndarray
+from numpy.lib.format import open_memmap
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.correlation.band_correlation_builder import BandCorrelationBuilder
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.map_statistics import MapStatistics
+from correlation_map.core.images.image_strip_reader import ImageStripReader
+from correlation_map.core.tools.common import create_run_directory, remove_directory_with
+from correlation_map.core.tools.thread_tile_executor import split_rows
+from correlation_map.gui.tools.logger import app_logger
+
+
+class StreamingCorrelationBuilder(BandCorrelationBuilder):
+    """Build correlation block grid out of core by image strips
+
+    Every strip contains `streaming_block_rows` block rows. Strips of the
+    overlapping blocks overlap by the pieces height minus stride image rows.
+    """
+
+    STATISTICS_FILE_SUFFIX: Final[str] = "statistics"
+    GRID_FILE_SUFFIX: Final[str] = "grid"
+    MAP_FILE_SUFFIX: Final[str] = "map"
+
+    def __init__(self, correlation_type: CorrelationTypes, correlation_configuration: CorrelationConfiguration):
+        super().__init__(correlation_type, correlation_configuration)
+        self.strip_block_rows = max(correlation_configuration.streaming_block_rows, 1)
+        self.base_directory = correlation_configuration.streaming_directory
+        # Run directory of the memory mapped arrays created with the first array and removed with the builder
+        self._directory: Optional[str] = None
+        # Statistics of the last calculated correlation grid accumulated by strips
+        self.map_statistics = MapStatistics()
+
+    @property
+    def directory(self) -> str:
+        """Return run directory of the builder arrays, create it in the streaming directory on the first request"""
+        if self._directory is None:
+            self._directory = create_run_directory(self.base_directory)
+            remove_directory_with(self, self._directory)
+            app_logger.debug("Created %s directory for the memory mapped correlation map arrays", self._directory)
+        return self._directory
+
+    def build(self, source_matrix: ImageStripReader,
+              destination_matrix: ImageStripReader) -> tuple[BlockStatistics, ndarray]:
+        """Calculate block statistics and correlation grid of the given images strip by strip
+
+        :param source_matrix: source image strip reader
+        :param destination_matrix: destination image strip reader
+        :return: memory mapped block statistics and correlation block grid
+        """
+        height = min(source_matrix.shape[0], destination_matrix.shape[0])
+        width = min(source_matrix.shape[1], destination_matrix.shape[1])
+        source_reader = source_matrix.crop(height, width)
+        destination_reader = destination_matrix.crop(height, width)
+        output = self._open_output(self.STATISTICS_FILE_SUFFIX, self.get_output_shape((height, width)))
+        strips = self._get_strips(output.shape[1])
+        app_logger.debug("Calculating %s strips of the correlation map in the %s directory",
+                         len(strips), self.directory)
+        self.map_statistics = MapStatistics()
+        for strip in strips:
+            top, bottom = self.get_covered_image_range(strip)
+            block_statistics = BlockStatistics.from_image_matrices(
+                source_reader.read_gray_strip(top, bottom), destination_reader.read_gray_strip(top, bottom),
+                self.pieces_amount, self.stride, self.edge_mode)
+            self.write_band(block_statistics, output, strip)
+            self.map_statistics.update(output[-1, strip[0]:strip[1]])
+        output.flush()
+        return self.split_output(output, (height, width))
+
+    def calculate_correlations(self, block_statistics: BlockStatistics) -> ndarray:
+        """Calculate correlation grid of the builder correlation type strip by strip
+
+        :param block_statistics: memory mapped block statistics
+        :return: memory mapped correlation block grid
+        """
+        correlation_grid = self._open_output(self.GRID_FILE_SUFFIX, block_statistics.shape)
+        self.map_statistics = MapStatistics()
+        for first_row, last_row in self._get_strips(block_statistics.shape[0]):
+            correlation_grid[first_row:last_row] = self.correlation_method(
+                block_statistics.get_rows(first_row, last_row).to_calculation_dtype(self.compute_dtype))
+            self.map_statistics.update(correlation_grid[first_row:last_row])
+        correlation_grid.flush()
+        return correlation_grid
+
+    def expand_grid(self, correlation_grid: ndarray) -> ndarray:
+        """Expand correlation grid to the full size map strip by strip
+
+        :param correlation_grid: correlation block grid
+        :return: memory mapped full size correlation map, where every block
+            value fills stride sized cell
+        """
+        rows, columns = correlation_grid.shape
+        stride_height, stride_width = self.stride
+        correlation_map = self._open_output(self.MAP_FILE_SUFFIX, (rows * stride_height, columns * stride_width))
+        for first_row, last_row in self._get_strips(rows):
+            correlation_map[first_row * stride_height:last_row * stride_height] = np.repeat(
+                np.repeat(correlation_grid[first_row:last_row], stride_height, axis=0), stride_width, axis=1)
+        correlation_map.flush()
+        return correlation_map
+
+    def _get_strips(self, rows: int) -> list[tuple[int, int]]:
+        """Return strips of the block rows with the configured amount of block rows"""
+        return split_rows(rows, math.ceil(rows / self.strip_block_rows))
+
+    def _open_output(self, suffix: str, shape: tuple[int, ...]) -> np.memmap:
+        """Create memory mapped `.npy` array of the builder correlation type
+
+        :param suffix: suffix of the array file name
+        :param shape: array shape
+        :return: created memory mapped array
+        """
+        path = os.path.join(self.directory, f"{self.correlation_type.correlation_type}_{suffix}.npy")
+        return open_memmap(path, mode="w+", dtype=self.compute_dtype, shape=shape)
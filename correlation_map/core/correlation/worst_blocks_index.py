@@ -0,0 +1,100 @@
+"""Worst blocks index
+
+Contains index of the blocks with the worst correlations of the correlation
+block grid. Index is updated tile by tile, so it's built in a single pass
+over the grid strips or the tiles calculated separately, and only the worst
+blocks candidates are kept in memory.
+"""
+from typing import Final
+
+import numpy as np
+from numpy import ndarray
+
+
+class WorstBlocksIndex:
+    """Index of the worst correlation blocks found by the partial sorting
+
+    Worst blocks are the blocks with the lowest correlations, or with the
+    highest ones for the correlation types where the lower value means the
+    more similar blocks. Blocks with the undefined correlations are never the
+    worst. Every tile update selects the worst blocks of the tile and of the
+    current index by `argpartition`, so the update takes linear time of the
+    tile size.
+    """
+
+    STRIP_SIZE: Final[int] = 1 << 20
+
+    def __init__(self, capacity: int, is_lower_better: bool):
+        """
+        :param capacity: maximal amount of the worst blocks to keep
+        :param is_lower_better: True if the lower correlation means the more
+            similar blocks else False
+        """
+        self.capacity = max(capacity, 0)
+        self.is_lower_better = is_lower_better
+        self.rows = np.empty(0, dtype=np.int64)
+        self.columns = np.empty(0, dtype=np.int64)
+        self.scores = np.empty(0, dtype=np.float64)
+
+    @classmethod
+    def from_grid(cls, correlation_grid: ndarray, capacity: int, is_lower_better: bool) -> "WorstBlocksIndex":
+        """Build index of the whole correlation grid strip by strip
+
+        Memory mapped grids are read by strips, so they are never loaded at
+        once.
+
+        :param correlation_grid: correlation block grid
+        :param capacity: maximal amount of the worst blocks to keep
+        :param is_lower_better: True if the lower correlation means the more
+            similar blocks else False
+        :return: built worst blocks index
+        """
+        worst_blocks_index = cls(capacity, is_lower_better)
+        rows, columns = correlation_grid.shape
+        strip_rows = max(cls.STRIP_SIZE // max(columns, 1), 1)
+        for first_row in range(0, rows, strip_rows):
+            worst_blocks_index.update(np.asarray(correlation_grid[first_row:first_row + strip_rows]), first_row)
+        return worst_blocks_index
+
+    def update(self, correlation_tile: ndarray, first_row: int = 0, first_column: int = 0):
+        """Add the worst blocks of the correlation grid tile to the index
+
+        :param correlation_tile: correlations of the grid tile blocks
+        :param first_row: grid row of the tile first row
+        :param first_column: grid column of the tile first column
+        """
+        tile_indexes = self._get_worst_indexes(self._get_badness(correlation_tile.ravel()))
+        tile_rows, tile_columns = np.divmod(tile_indexes, correlation_tile.shape[1]) \
+            if correlation_tile.size else (tile_indexes, tile_indexes)
+        rows = np.concatenate((self.rows, tile_rows + first_row))
+        columns = np.concatenate((self.columns, tile_columns + first_column))
+        scores = np.concatenate((self.scores, correlation_tile.ravel()[tile_indexes].astype(np.float64)))
+        worst_indexes = self._get_worst_indexes(self._get_badness(scores))
+        self.rows, self.columns, self.scores = rows[worst_indexes], columns[worst_indexes], scores[worst_indexes]
+
+    def get_worst_blocks(self, count: int) -> tuple[ndarray, ndarray, ndarray]:
+        """Return the given amount of the worst blocks sorted from the worst one
+
+        :param count: amount of the worst blocks, at most index capacity
+        :return: rows, columns and correlations of the worst blocks
+        """
+        order = np.argsort(-self._get_badness(self.scores), kind="stable")[:count]
+        return self.rows[order], self.columns[order], self.scores[order]
+
+    def _get_badness(self, scores: ndarray) -> ndarray:
+        """Return badness of the given correlations, the larger badness means the worse block"""
+        badness = scores.astype(np.float64) if self.is_lower_better else -scores.astype(np.float64)
+        return np.nan_to_num(badness, nan=-np.inf)
+
+    def _get_worst_indexes(self, badness: ndarray) -> ndarray:
+        """Return indexes of the blocks with the largest badness, not more than index capacity
+
+        :param badness: badness of the blocks
+        :return: unordered indexes of the worst blocks
+        """
+        badness_indexes = np.flatnonzero(badness > -np.inf)
+        if badness_indexes.size <= self.capacity:
+            return badness_indexes
+        worst_positions = np.argpartition(badness[badness_indexes], -self.capacity)[-self.capacity:] \
+            if self.capacity else np.empty(0, dtype=np.int64)
+        return badness_indexes[worst_positions]
@@ -0,0 +1,157 @@
+"""Features cache
+
+Contains singleton cache of the ORB key points and descriptors of the images.
+Features are identified by the image content digest and the detector
+parameters, so the pipeline re-runs and batch jobs with the same images skip
+the features detection. Recently used features are kept in memory, and all
+detected features are also stored in the `.npz` files of the cache directory
+if it's configured, so they survive application restarts.
+"""
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.tools.common import MetaSingleton
+from correlation_map.gui.tools.logger import app_logger
+
+Features = tuple[Sequence[cv2.KeyPoint], Optional[ndarray]]
+
+
+class FeaturesCache(metaclass=MetaSingleton):
+    """Least recently used cache of the image features with the optional disk storage
+
+    Key points are stored on disk as the float32 array of their coordinates,
+    sizes, angles and responses and the int32 array of their octaves and
+    class ids. Descriptors are stored as they are, images without key points
+    are stored with the empty descriptors array.
+    """
+
+    __capacity: int = 8
+    __directory: Optional[str] = None
+    __features: "OrderedDict[str, Features]" = OrderedDict()
+
+    @classmethod
+    def configure(cls, capacity: int, directory: Optional[str] = None):
+        """Set amount of the features kept in memory and the directory to store features in
+
+        :param capacity: maximal amount of the images features kept in
+            memory, 0 disables the memory cache
+        :param directory: directory to store features files in, features
+            are not stored on disk if it's not set
+        """
+        cls.__capacity = max(capacity, 0)
+        cls.__directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        cls._shrink()
+
+    @classmethod
+    def get_key(cls, image: ImageWrapper, detector_parameters: dict) -> str:
+        """Return cache key of the given image features detected with the given parameters
+
+        :param image: image to detect features on
+        :param detector_parameters: ORB detector parameters
+        :return: cache key
+        """
+        parameters = "-".join(f"{name}={value}" for name, value in sorted(detector_parameters.items()))
+        return f"{image.content_digest}-{parameters}" if parameters else image.content_digest
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Features]:
+        """Return cached features by the given key
+
+        Features found on disk only are put into the memory cache.
+
+        :param key: features cache key
+        :return: key points and descriptors if they are cached else None
+        """
+        if key in cls.__features:
+            cls.__features.move_to_end(key)
+            app_logger.debug("Taking image features from the memory cache")
+            return cls.__features[key]
+        if not cls.__directory or not os.path.exists(path := cls._get_path(key)):
+            return None
+        app_logger.debug("Loading image features from %s", path)
+        features = cls._load(path)
+        cls._remember(key, features)
+        return features
+
+    @classmethod
+    def put(cls, key: str, features: Features):
+        """Put the given features into the cache
+
+        :param key: features cache key
+        :param features: detected key points and descriptors
+        """
+        cls._remember(key, features)
+        if cls.__directory:
+            cls._save(cls._get_path(key), features)
+
+    @classmethod
+    def clear(cls):
+        """Remove features kept in memory, stored features files are kept"""
+        cls.__features.clear()
+
+    @classmethod
+    def _remember(cls, key: str, features: Features):
+        """Put features into the memory cache removing the least recently used ones"""
+        cls.__features[key] = features
+        cls.__features.move_to_end(key)
+        cls._shrink()
+
+    @classmethod
+    def _shrink(cls):
+        """Remove the least recently used features exceeding the memory cache capacity"""
+        while len(cls.__features) > cls.__capacity:
+            cls.__features.popitem(last=False)
+
+    @classmethod
+    def _get_path(cls, key: str) -> str:
+        """Return path to the features file by the given key"""
+        return os.path.join(cls.__directory, f"{key}.npz")
+
+    @staticmethod
+    def _load(path: str) -> Features:
+        """Load key points and descriptors from the features file
+
+        :param path: path to the features file
+        :return: loaded key points and descriptors
+        """
+        with np.load(path) as features_file:
+            key_points_attributes = features_file["key_points_attributes"].tolist()
+            key_points_levels = features_file["key_points_levels"].tolist()
+            descriptors = features_file["descriptors"]
+        key_points = tuple(cv2.KeyPoint(x, y, size, angle, response, octave, class_id)
+                           for (x, y, size, angle, response), (octave, class_id)
+                           in zip(key_points_attributes, key_points_levels))
+        return key_points, descriptors if key_points else None
+
+    @staticmethod
+    def _save(path: str, features: Features):
+        """Save key points and descriptors to the features file
+
+        File is written under the temporary name and renamed then, so
+        concurrent jobs never read a partially written file.
+
+        :param path: path to the features file
+        :param features: key points and descriptors to save
+        """
+        key_points, descriptors = features
+        key_points_attributes = np.array(
+            [(*key_point.pt, key_point.size, key_point.angle, key_point.response) for key_point in key_points],
+            dtype=np.float32).reshape(-1, 5)
+        key_points_levels = np.array(
+            [(key_point.octave, key_point.class_id) for key_point in key_points], dtype=np.int32).reshape(-1, 2)
+        descriptors = descriptors if descriptors is not None else np.empty((0, 32), dtype=np.uint8)
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path))
+        with os.fdopen(file_descriptor, "wb") as features_file:
+            np.savez(features_file, key_points_attributes=key_points_attributes,
+                     key_points_levels=key_points_levels, descriptors=descriptors)
+        os.replace(temporary_path, path)
+        app_logger.debug("Image features saved to %s", path)
@@ -0,0 +1,125 @@
+"""Features matcher
+
+Contains matcher that matches ORB descriptors of two images and estimates
+the rotation angle between them. Matching strategy, ratio test and rotation
+estimation are configured, key points coordinates of the matches are
+extracted by arrays instead of the per-match Python loops.
+"""
+import math
+from typing import Final, Optional, Sequence
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, FeaturesMatchers, RotationEstimators
+from correlation_map.gui.tools.logger import app_logger
+
+
+class FeaturesMatcher:
+    """Matcher of the ORB descriptors and estimator of the rotation angle by the matched key points
+
+    Cross-checked brute force matcher keeps mutual best matches only. Brute
+    force and FLANN LSH kNN matchers find two nearest neighbours of every
+    source descriptor and keep matches passing the ratio test, so the
+    ambiguous matches of the repeated patterns are dropped.
+    """
+
+    # Parameters of the FLANN locality sensitive hashing index for the binary descriptors
+    FLANN_LSH_INDEX_PARAMETERS: Final[dict[str, int]] = {
+        "algorithm": 6, "table_number": 6, "key_size": 12, "multi_probe_level": 1}
+    FLANN_SEARCH_PARAMETERS: Final[dict[str, int]] = {"checks": 50}
+    RANSAC_REPROJECTION_THRESHOLD: Final[float] = 5.0
+
+    def __init__(self, features_matcher: FeaturesMatchers = FeaturesMatchers.BRUTE_FORCE_CROSS_CHECK,
+                 matches_ratio: float = 0.75, rotation_estimator: RotationEstimators = RotationEstimators.HOMOGRAPHY,
+                 ransac_max_iterations: int = 2000):
+        """
+        :param features_matcher: strategy to match descriptors with
+        :param matches_ratio: maximal ratio of the best and the second best
+            match distances of the kNN matchers
+        :param rotation_estimator: transformation to estimate rotation angle by
+        :param ransac_max_iterations: maximal amount of the RANSAC iterations
+        """
+        self.features_matcher = features_matcher
+        self.matches_ratio = matches_ratio
+        self.rotation_estimator = rotation_estimator
+        self.ransac_max_iterations = ransac_max_iterations
+
+    @classmethod
+    def from_configuration(cls, correlation_configuration: CorrelationConfiguration) -> "FeaturesMatcher":
+        """Create features matcher by the correlation configuration
+
+        :param correlation_configuration: correlation configuration with the
+            features matching settings
+        :return: configured features matcher
+        """
+        return cls(correlation_configuration.features_matcher, correlation_configuration.matches_ratio,
+                   correlation_configuration.rotation_estimator, correlation_configuration.ransac_max_iterations)
+
+    def match(self, source_descriptors: Optional[ndarray],
+              destination_descriptors: Optional[ndarray]) -> list[cv2.DMatch]:
+        """Match source and destination descriptors
+
+        :param source_descriptors: source image ORB descriptors
+        :param destination_descriptors: destination image ORB descriptors
+        :return: matches sorted by the distance
+        """
+        if source_descriptors is None or destination_descriptors is None:
+            return []
+        if self.features_matcher == FeaturesMatchers.BRUTE_FORCE_CROSS_CHECK:
+            matches = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True).match(
+                source_descriptors, destination_descriptors)
+        else:
+            if self.features_matcher == FeaturesMatchers.FLANN_LSH:
+                matcher = cv2.FlannBasedMatcher(self.FLANN_LSH_INDEX_PARAMETERS, self.FLANN_SEARCH_PARAMETERS)
+            else:
+                matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+            matches = [neighbours[0] for neighbours in matcher.knnMatch(source_descriptors, destination_descriptors, 2)
+                       if len(neighbours) == 2 and neighbours[0].distance < self.matches_ratio * neighbours[1].distance]
+        distances = np.fromiter((match.distance for match in matches), dtype=np.float32, count=len(matches))
+        return [matches[index] for index in np.argsort(distances, kind="stable")]
+
+    @staticmethod
+    def get_matched_points(source_key_points: Sequence[cv2.KeyPoint], destination_key_points: Sequence[cv2.KeyPoint],
+                           matches: list[cv2.DMatch]) -> tuple[ndarray, ndarray]:
+        """Return coordinates of the matched source and destination key points
+
+        :param source_key_points: source image key points
+        :param destination_key_points: destination image key points
+        :param matches: matches of the source and destination key points
+        :return: float32 arrays of the matched source and destination points
+            with the (matches amount, 1, 2) shape
+        """
+        source_indexes = np.fromiter((match.queryIdx for match in matches), dtype=np.intp, count=len(matches))
+        destination_indexes = np.fromiter((match.trainIdx for match in matches), dtype=np.intp, count=len(matches))
+        source_points = cv2.KeyPoint_convert(source_key_points).reshape(-1, 2)[source_indexes]
+        destination_points = cv2.KeyPoint_convert(destination_key_points).reshape(-1, 2)[destination_indexes]
+        return source_points.reshape(-1, 1, 2), destination_points.reshape(-1, 1, 2)
+
+    def estimate_rotation_angle(self, source_key_points: Sequence[cv2.KeyPoint],
+                                destination_key_points: Sequence[cv2.KeyPoint], matches: list[cv2.DMatch]) -> float:
+        """Return rotation angle from the transformation of the matched key points
+
+        :param source_key_points: source image key points
+        :param destination_key_points: destination image key points
+        :param matches: matches of the source and destination key points
+        :return: rotation angle in degrees, 0 if the transformation is not found
+        """
+        minimal_matches_count = 2 if self.rotation_estimator == RotationEstimators.PARTIAL_AFFINE else 4
+        if len(matches) < minimal_matches_count:
+            app_logger.warning("Rotation can not be found by %s matches, images are supposed not rotated", len(matches))
+            return 0.0
+        source_points, destination_points = self.get_matched_points(source_key_points, destination_key_points, matches)
+        if self.rotation_estimator == RotationEstimators.PARTIAL_AFFINE:
+            matrix, _ = cv2.estimateAffinePartial2D(
+                source_points, destination_points, method=cv2.RANSAC,
+                ransacReprojThreshold=self.RANSAC_REPROJECTION_THRESHOLD, maxIters=self.ransac_max_iterations)
+        else:
+            matrix, _ = cv2.findHomography(
+                source_points, destination_points, cv2.RANSAC, self.RANSAC_REPROJECTION_THRESHOLD,
+                maxIters=self.ransac_max_iterations)
+        if matrix is None:
+            app_logger.warning("Rotation is not found by %s matches, images are supposed not rotated", len(matches))
+            return 0.0
+        return - math.atan2(matrix[0, 1], matrix[0, 0]) * 180 / math.pi
@@ -0,0 +1,107 @@
+"""Frame source
+
+Contains frame source that decodes frames of the video file or the numbered
+images sequence in the background thread. Decoded frames wait in the bounded
+queue, so decoding of the next frames overlaps with the processing of the
+current one, and memory is bounded by the queue size.
+"""
+import queue
+import threading
+from typing import Final, Generator, Optional
+
+import cv2
+from numpy import ndarray
+
+from correlation_map.gui.tools.logger import app_logger
+
+
+class FrameSource:
+    """Decode frames of the video or images sequence in the background thread
+
+    Path is any path supported by `cv2.VideoCapture`: the video file or the
+    numbered images sequence pattern like `frames/frame_%04d.png`. Frames are
+    returned as RGB matrices like images of the image wrapper.
+    """
+
+    PUT_TIMEOUT: Final[float] = 0.1
+
+    def __init__(self, path: str, queue_size: int = 8):
+        """
+        :param path: path to the video file or the images sequence pattern
+        :param queue_size: maximal amount of decoded frames waiting in the
+            queue
+        """
+        self.path = path
+        self._frames_queue: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._stop_event = threading.Event()
+        self._decoding_thread: Optional[threading.Thread] = None
+        self._decoding_error: Optional[Exception] = None
+
+    def __iter__(self) -> Generator[ndarray, None, None]:
+        """Start decoding in the background thread and return decoded frames in order
+
+        Decoding is stopped if the iteration is stopped before the last frame.
+
+        :return: generator that returns RGB frame matrices
+        :raise IOError: when the frame source can't be opened
+        """
+        video_capture = cv2.VideoCapture(self.path)
+        if not video_capture.isOpened():
+            raise IOError(f"Can not open frame source {self.path}")
+        app_logger.debug("Decoding frames of %s in the background thread", self.path)
+        self._stop_event.clear()
+        self._decoding_thread = threading.Thread(target=self._decode_frames, args=(video_capture,), daemon=True)
+        self._decoding_thread.start()
+        try:
+            while (frame := self._frames_queue.get()) is not None:
+                yield frame
+        finally:
+            self.close()
+        if self._decoding_error:
+            raise self._decoding_error
+
+    def close(self):
+        """Stop decoding and wait for the decoding thread"""
+        self._stop_event.set()
+        if self._decoding_thread:
+            self._decoding_thread.join()
+            self._decoding_thread = None
+        while not self._frames_queue.empty():
+            self._frames_queue.get_nowait()
+
+    def _decode_frames(self, video_capture: cv2.VideoCapture):
+        """Decode frames and put them into the queue until the last frame or the stop
+
+        Frames queue is finished by None.
+
+        :param video_capture: opened video capture of the frame source
+        """
+        frames_count = 0
+        try:
+            while not self._stop_event.is_set():
+                is_read, frame = video_capture.read()
+                if not is_read:
+                    break
+                if not self._put(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)):
+                    break
+                frames_count += 1
+        except cv2.error as error:
+            self._decoding_error = error
+        finally:
+            video_capture.release()
+            self._put(None)
+            app_logger.debug("Decoded %s frames of %s", frames_count, self.path)
+
+    def _put(self, frame: Optional[ndarray]) -> bool:
+        """Put the frame into the queue waiting for the free place while decoding isn't stopped
+
+        :param frame: frame matrix or None to finish the queue
+        :return: True if the frame is put else False
+        """
+        while not self._stop_event.is_set():
+            try:
+                self._frames_queue.put(frame, timeout=self.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -1,42 +1,170 @@
 """Module contains image builder class for transforming images"""
+from typing import Final, Optional, Sequence
+
 import cv2
 import numpy as np
 from numpy import ndarray
 
+from correlation_map.core.config.correlation import GrayConversionModes
 from correlation_map.core.models.figures.image import FigureType, ImageWrapper
 from correlation_map.core.models.image_selected_region import ImageSelectedRegion
+from correlation_map.core.tools.thread_tile_executor import ThreadTileExecutor
+from correlation_map.gui.tools.logger import app_logger
 
 
 class ImageBuilder:
     """Contains actions and transformations for images"""
 
+    # Image dtypes and maximal channels amount supported by the OpenCV channels transformation
+    TRANSFORM_DTYPES: Final[tuple[np.dtype, ...]] = tuple(np.dtype(dtype) for dtype in (
+        np.uint8, np.int8, np.uint16, np.int16, np.int32, np.float32, np.float64))
+    TRANSFORM_MAX_CHANNELS: Final[int] = 4
+
     @classmethod
-    def transform_image_to_gray(cls, image: ImageWrapper) -> ImageWrapper:
+    def transform_image_to_gray(cls, image: ImageWrapper,
+                                gray_conversion: GrayConversionModes = GrayConversionModes.MEAN,
+                                dtype: Optional[np.dtype] = None) -> ImageWrapper:
         """Returns the image matrix of which was converted on a gray scale of intensity
 
         :param image: image to make gray
+        :param gray_conversion: conversion of the image channels to gray
+        :param dtype: dtype of the gray matrix, the image dtype if not given
         :return: image in gray scale
         """
-        gray_image = np.zeros(image.shape[:2])
-        for column_number, column in enumerate(image.image):
-            for row_number, pixel in enumerate(column):
-                gray_image[column_number, row_number] = cls.__make_gray_pixel(pixel)
-        return ImageWrapper.create_image(gray_image)
+        return ImageWrapper.create_image(cls.get_image_gray_matrix(image, gray_conversion, dtype))
+
+    @classmethod
+    def get_image_gray_matrix(cls, image: ImageWrapper,
+                              gray_conversion: GrayConversionModes = GrayConversionModes.MEAN,
+                              dtype: Optional[np.dtype] = None) -> ndarray:
+        """Return gray matrix of the image cached on the image wrapper
+
+        Gray matrix is converted once for every gray conversion and dtype, so
+        repeated builds and stages comparing the same image reuse it. Cache
+        is cleared when the image matrix of the wrapper is replaced, so the
+        cached gray matrix must not be modified in place.
+
+        :param image: image to get gray matrix of
+        :param gray_conversion: conversion of the image channels to gray
+        :param dtype: dtype of the gray matrix, the image dtype if not given
+        :return: gray matrix of the image
+        """
+        dtype = np.dtype(dtype if dtype is not None else image.image.dtype)
+        gray_matrix = image.gray_matrices.get((gray_conversion, dtype))
+        if gray_matrix is None:
+            app_logger.debug("Converting image to the %s gray matrix with %s dtype", gray_conversion.conversion, dtype)
+            gray_matrix = cls.get_gray_matrix(image.image, gray_conversion, dtype)
+            image.gray_matrices[gray_conversion, dtype] = gray_matrix
+        return gray_matrix
+
+    @classmethod
+    def get_gray_matrix(cls, image_matrix: ndarray, gray_conversion: GrayConversionModes = GrayConversionModes.MEAN,
+                        dtype: Optional[np.dtype] = None) -> ndarray:
+        """Return gray matrix of the given image matrix or its part
+
+        Gray pixel is the sum of the RGB pixel channels weighted by the gray
+        conversion weights, images with other channels amount are converted
+        by the channels mean. Channels are weighted by the single OpenCV
+        transformation pass in the float arithmetic, so they don't overflow
+        the image dtype, and rounded for the integer dtype. Gray matrix keeps
+        the image dtype if other dtype is not given, so 8-bit images take 8
+        times less memory than the float64 matrix, and 16-bit images keep
+        their depth.
+
+        :param image_matrix: image matrix with channels or gray matrix
+        :param gray_conversion: conversion of the image channels to gray
+        :param dtype: dtype of the gray matrix, the image dtype if not given
+        :return: gray matrix with the given dtype
+        """
+        dtype = np.dtype(dtype if dtype is not None else image_matrix.dtype)
+        if image_matrix.ndim == 2:
+            return image_matrix.astype(dtype, copy=False)
+        height, width, channels_count = image_matrix.shape
+        channels_weights = gray_conversion.channels_weights
+        if channels_count != len(channels_weights):
+            channels_weights = (1 / channels_count,) * channels_count
+        if np.issubdtype(dtype, np.floating) and image_matrix.dtype != dtype:
+            image_matrix = image_matrix.astype(dtype)
+        if image_matrix.size and image_matrix.dtype in cls.TRANSFORM_DTYPES \
+                and channels_count <= cls.TRANSFORM_MAX_CHANNELS:
+            gray_matrix = cv2.transform(image_matrix, np.array([channels_weights])).reshape(height, width)
+        else:
+            gray_matrix = image_matrix @ np.array(channels_weights)
+        if np.issubdtype(dtype, np.integer) and not np.issubdtype(gray_matrix.dtype, np.integer):
+            gray_matrix = np.rint(gray_matrix)
+        return gray_matrix.astype(dtype, copy=False)
 
     @classmethod
-    def rotate_image(cls, image: ImageWrapper, angle: float) -> ImageWrapper:
+    def rotate_image(cls, image: ImageWrapper, angle: float, threads_count: int = 1) -> ImageWrapper:
         """Rotate the image by the given angle relative to the center of image
 
+        Large images are rotated by row bands in the thread pool if more than
+        one thread is given.
+
         :param image: image to rotate
         :param angle: rotation angle
+        :param threads_count: amount of threads to rotate large image in
         :return: rotated image
         """
-        height, weight, _ = image.image.shape
-        image_center = height / 2, weight / 2
-        matrix = cv2.getRotationMatrix2D(image_center, angle, 1.0)
-        rotated_image = cv2.warpAffine(image.image, matrix, (weight, height))
+        height, weight = image.image.shape[:2]
+        matrix = cls.get_rotation_matrix(image.image.shape, angle)
+        tile_executor = ThreadTileExecutor(threads_count)
+        if tile_executor.is_worth_for(height, weight):
+            rotated_image = cls._warp_affine_by_bands(image.image, matrix, tile_executor)
+        else:
+            rotated_image = cv2.warpAffine(image.image, matrix, (weight, height))
         return ImageWrapper.create_image(rotated_image, FigureType.ROTATED_IMAGE)
 
+    @classmethod
+    def rotate_and_crop_image(cls, image: ImageWrapper, angle: float,
+                              image_selection: ImageSelectedRegion) -> ImageWrapper:
+        """Crop the given region of the image rotated by the given angle without rotating the whole image
+
+        Only the pixels of the region are warped, so the result equals the
+        region cropped from the rotated image.
+
+        :param image: image to rotate and crop
+        :param angle: rotation angle
+        :param image_selection: region coordinates in the rotated image
+        :return: rotated and cropped found image
+        """
+        x_1, y_1 = min(image_selection.x_1, image_selection.x_2), min(image_selection.y_1, image_selection.y_2)
+        region_image = cls.warp_affine_region(
+            image.image, cls.get_rotation_matrix(image.image.shape, angle),
+            (x_1, y_1, image_selection.width, image_selection.height))
+        return ImageWrapper.create_image(region_image, FigureType.FOUND_AND_CROPPED)
+
+    @staticmethod
+    def get_rotation_matrix(image_shape: tuple[int, ...], angle: float) -> ndarray:
+        """Return affine matrix of the image rotation by the given angle relative to the center of image
+
+        :param image_shape: shape of the image matrix to rotate
+        :param angle: rotation angle
+        :return: 2x3 affine transformation matrix
+        """
+        height, weight = image_shape[:2]
+        image_center = weight / 2, height / 2
+        return cv2.getRotationMatrix2D(image_center, angle, 1.0)
+
+    @staticmethod
+    def warp_affine_region(image: ndarray, matrix: ndarray, region: tuple[int, int, int, int]) -> ndarray:
+        """Apply affine transformation to the image and return the given region of the transformed image only
+
+        The region is warped with the inverse transformation shifted to the
+        region origin like the row bands of the large images, so some pixels
+        may differ by one intensity level from the whole image warping.
+
+        :param image: image matrix to transform
+        :param matrix: affine transformation matrix
+        :param region: first column, first row, width and height of the region
+            in the transformed image
+        :return: transformed image region matrix
+        """
+        first_column, first_row, width, height = region
+        region_matrix = cv2.invertAffineTransform(matrix)
+        region_matrix[:, 2] += region_matrix[:, 0] * first_column + region_matrix[:, 1] * first_row
+        return cv2.warpAffine(image, region_matrix, (width, height), flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP)
+
     @classmethod
     def crop_image(cls, image: ImageWrapper, image_selection: ImageSelectedRegion) -> ImageWrapper:
         """Crop image according to the given top left and bottom right region coordinates
@@ -56,10 +184,28 @@ class ImageBuilder:
         :return: image with drawn area
         """
         image_with_rectangle = ImageWrapper.create_image(image.image.copy(), FigureType.FOUND_IMAGE)
+        color = np.iinfo(image.image.dtype).max if np.issubdtype(image.image.dtype, np.integer) else 255
         cv2.rectangle(
-            image_with_rectangle.image, image_selection.top_left_point, image_selection.bottom_right_point, 255, 2)
+            image_with_rectangle.image, image_selection.top_left_point, image_selection.bottom_right_point, color, 2)
         return image_with_rectangle
 
+    @classmethod
+    def mark_defect_regions(cls, image: ImageWrapper, defect_regions: Sequence[ImageSelectedRegion]) -> ImageWrapper:
+        """Mark the given defect regions in the given image
+
+        :param image: image to draw in it
+        :param defect_regions: defect regions coordinates to draw along their
+            bounding boxes
+        :return: image with drawn defect regions
+        """
+        image_with_regions = ImageWrapper.create_image(image.image.copy(), FigureType.DEFECT_REGIONS_IMAGE)
+        max_value = np.iinfo(image.image.dtype).max if np.issubdtype(image.image.dtype, np.integer) else 255
+        color = (max_value, 0, 0) if image.image.ndim == 3 else max_value
+        for defect_region in defect_regions:
+            cv2.rectangle(image_with_regions.image, defect_region.top_left_point, defect_region.bottom_right_point,
+                          color, 2)
+        return image_with_regions
+
     @classmethod
     def crop_found_image(cls, image: ImageWrapper, image_selection: ImageSelectedRegion) -> ImageWrapper:
         """Crop image according to the given image selection
@@ -70,6 +216,33 @@ class ImageBuilder:
         """
         return ImageWrapper.create_image(cls._crop_image(image.image, image_selection), FigureType.FOUND_AND_CROPPED)
 
+    @classmethod
+    def _warp_affine_by_bands(cls, image: ndarray, matrix: ndarray, tile_executor: ThreadTileExecutor) -> ndarray:
+        """Apply affine transformation to the image by row bands of the output image
+
+        Every band is warped with the inverse transformation shifted to the
+        band first row. Bilinear weights of the band pixels can be rounded
+        differently from the whole image warping, so some pixels may differ
+        by one intensity level.
+
+        :param image: image matrix to transform
+        :param matrix: affine transformation matrix
+        :param tile_executor: executor to process output row bands
+        :return: transformed image matrix with the same shape
+        """
+        inverse_matrix = cv2.invertAffineTransform(matrix)
+        transformed_image = np.empty_like(image)
+
+        def warp_band(first_row: int, last_row: int):
+            band_matrix = inverse_matrix.copy()
+            band_matrix[:, 2] += inverse_matrix[:, 1] * first_row
+            transformed_image[first_row:last_row] = cv2.warpAffine(
+                image, band_matrix, (image.shape[1], last_row - first_row),
+                flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP)
+
+        tile_executor.map_row_bands(warp_band, image.shape[0])
+        return transformed_image
+
     @classmethod
     def _crop_image(cls, image: ndarray, image_selection: ImageSelectedRegion) -> ndarray:
         """Crop image according to the given top left and bottom right region coordinates
@@ -81,12 +254,3 @@ class ImageBuilder:
         return image[
                min(image_selection.y_1, image_selection.y_2):max(image_selection.y_1, image_selection.y_2),
                min(image_selection.x_1, image_selection.x_2):max(image_selection.x_1, image_selection.x_2)]
-
-    @staticmethod
-    def __make_gray_pixel(pixel: tuple[int, int, int]) -> int:
-        """Transform RGB pixel to gray
-
-        :param pixel: RGB pixel attributes
-        :return: gray pixel attributes
-        """
-        return round(sum(pixel) / len(pixel))
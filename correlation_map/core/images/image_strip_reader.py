@@ -0,0 +1,108 @@
+"""Contains image strip reader which returns grayscale horizontal strips of the image"""
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+from numpy.lib.format import open_memmap
+
+from correlation_map.core.config.correlation import GrayConversionModes
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.models.figures.image import ImageWrapper
+
+
+class ImageStripReader:
+    """Read grayscale horizontal strips of the image matrix
+
+    Only the requested strip is converted to the gray matrix, so
+    memory used by the gray conversion is bounded by the strip size. Image
+    matrix can be a memory mapped array, then only the strip rows are read
+    from the disk.
+    """
+
+    def __init__(self, image_matrix: ndarray, shape: Optional[tuple[int, int]] = None,
+                 gray_conversion: GrayConversionModes = GrayConversionModes.MEAN,
+                 gray_dtype: Optional[np.dtype] = None):
+        """
+        :param image_matrix: image matrix with channels or gray matrix
+        :param shape: height and width of the image top left part to read,
+            whole image is read if it's not given
+        :param gray_conversion: conversion of the image channels to gray
+        :param gray_dtype: dtype of the gray strips, the image dtype if it's
+            not given
+        """
+        self.image_matrix = image_matrix
+        self.shape: tuple[int, int] = shape or image_matrix.shape[:2]
+        self.gray_conversion = gray_conversion
+        self.gray_dtype = gray_dtype
+
+    @classmethod
+    def from_file(cls, path: str, directory: str, gray_conversion: GrayConversionModes = GrayConversionModes.MEAN,
+                  gray_dtype: Optional[np.dtype] = None) -> "ImageStripReader":
+        """Create image strip reader for the image file
+
+        Numpy `.npy` files with the RGB or gray image matrix are memory
+        mapped and never loaded whole. Other
+        image formats can't be decoded by strips, so they are decoded once
+        keeping the file depth, converted to RGB and written to the memory
+        mapped `.npy` file in the given directory. Decoded image is released
+        then, and only the strips are read back from the disk.
+
+        :param path: path to the image file
+        :param directory: directory to write the decoded image to
+        :param gray_conversion: conversion of the image channels to gray
+        :param gray_dtype: dtype of the gray strips, the image dtype if it's
+            not given
+        :return: image strip reader of the file
+        """
+        if path.endswith(".npy"):
+            return cls(np.load(path, mmap_mode="r"), gray_conversion=gray_conversion, gray_dtype=gray_dtype)
+        image_matrix = ImageWrapper.read_image(path)
+        file_descriptor, decoded_path = tempfile.mkstemp(suffix=".npy", dir=directory)
+        os.close(file_descriptor)
+        decoded_matrix = open_memmap(decoded_path, mode="w+", dtype=image_matrix.dtype, shape=image_matrix.shape)
+        decoded_matrix[:] = image_matrix
+        decoded_matrix.flush()
+        del image_matrix
+        return cls(np.load(decoded_path, mmap_mode="r"), gray_conversion=gray_conversion, gray_dtype=gray_dtype)
+
+    @classmethod
+    def from_image(cls, image: ImageWrapper, directory: str,
+                   gray_conversion: GrayConversionModes = GrayConversionModes.MEAN,
+                   gray_dtype: Optional[np.dtype] = None) -> "ImageStripReader":
+        """Create image strip reader for the image wrapper
+
+        Image that isn't read yet is read from its file by strips, already
+        read image is read from its matrix.
+
+        :param image: image wrapper to read
+        :param directory: directory to write the decoded image file to
+        :param gray_conversion: conversion of the image channels to gray
+        :param gray_dtype: dtype of the gray strips, the image dtype if it's
+            not given
+        :return: image strip reader of the image
+        """
+        if not image.is_image_read:
+            return cls.from_file(image.path, directory, gray_conversion, gray_dtype)
+        return cls(image.image, gray_conversion=gray_conversion, gray_dtype=gray_dtype)
+
+    def crop(self, height: int, width: int) -> "ImageStripReader":
+        """Return reader of the top left image part with the given shape
+
+        :param height: height of the image part
+        :param width: width of the image part
+        :return: image strip reader of the image part
+        """
+        return ImageStripReader(self.image_matrix, (height, width), self.gray_conversion, self.gray_dtype)
+
+    def read_gray_strip(self, first_row: int, last_row: int) -> ndarray:
+        """Read gray matrix of the given image rows
+
+        :param first_row: first image row of the strip
+        :param last_row: last (excluded) image row of the strip
+        :return: gray strip matrix with the gray dtype
+        """
+        height, width = self.shape
+        return ImageBuilder.get_gray_matrix(
+            self.image_matrix[first_row:min(last_row, height), :width], self.gray_conversion, self.gray_dtype)
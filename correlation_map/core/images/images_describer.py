@@ -1,57 +1,126 @@
 """Contains image describer which returns or calculates different image attributes"""
-import math
+from typing import Final, Optional, Sequence
 
 import cv2
 import numpy as np
+from numpy import ndarray
 
 from correlation_map.core.config.correlation import CorrelationTypes
 from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.features_cache import FeaturesCache
+from correlation_map.core.images.features_matcher import FeaturesMatcher
+from correlation_map.core.images.image_builder import ImageBuilder
 from correlation_map.core.models.figures.image import ImageWrapper
 from correlation_map.core.models.image_selected_region import ImageSelectedRegion
+from correlation_map.core.tools.thread_tile_executor import ThreadTileExecutor
+from correlation_map.gui.tools.logger import app_logger
 
 
 class ImagesDescriber:
     """Contains actions to return or calculate different images attributes"""
 
+    # Minimal side of the template on the coarsest level of the template search pyramid
+    TEMPLATE_SEARCH_MIN_SIDE: Final[int] = 16
+    TEMPLATE_SEARCH_MAX_LEVELS: Final[int] = 5
+    # Amount of pixels around the upscaled candidate to search the template in on the finer pyramid level,
+    # the coarse candidate of the low contrast templates drifts by several pixels from the exhaustive one
+    TEMPLATE_SEARCH_MARGIN: Final[int] = 16
+    # Amount of the best separated coarse candidates refined on the finer pyramid levels, the best coarse candidate
+    # of the repeated patterns isn't always the best one at full resolution
+    TEMPLATE_SEARCH_CANDIDATES: Final[int] = 6
+    # Default maximal amount of the ORB key points, it's the ORB detector default
+    ORB_FEATURES_COUNT: Final[int] = 500
+
     @classmethod
     def find_rotation_angle(cls, source_image: ImageWrapper, destination_image: ImageWrapper,
-                            descriptor_lines: int = 0) -> tuple[float, ImageWrapper]:
-        """
-        Return the angle of rotation of the source image relative to destination image
+                            descriptor_lines: int = 0, features_matcher: Optional[FeaturesMatcher] = None,
+                            features_count: int = ORB_FEATURES_COUNT) -> tuple[float, ImageWrapper]:
+        """Return the angle of rotation of the source image relative to destination image
+
+        :param source_image: source image to find rotation angle relative to
+        :param destination_image: destination image to find rotation angle of
+        :param descriptor_lines: amount of the best matches to draw
+        :param features_matcher: matcher of the images features, the
+            cross-checked brute force matcher with homography estimation is
+            used if it's not given
+        :param features_count: maximal amount of the key points detected on
+            every image
+        :return: rotation angle in degrees and image with the drawn matches
         """
+        features_matcher = features_matcher or FeaturesMatcher()
         # Use descriptor for detecting the source image in the destination image
-        orb = cv2.ORB_create()
-        src_image_key_points, src_image_descriptors = orb.detectAndCompute(source_image.image, None)
-        dst_image_key_points, dst_image_descriptors = orb.detectAndCompute(destination_image.image, None)
-        brute_force_match = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-        matches = brute_force_match.match(src_image_descriptors, dst_image_descriptors)
-        matches = sorted(matches, key=lambda match: match.distance)
+        src_image_key_points, src_image_descriptors = cls.detect_features(source_image, {"nfeatures": features_count})
+        dst_image_key_points, dst_image_descriptors = cls.detect_features(
+            destination_image, {"nfeatures": features_count})
+        matches = features_matcher.match(src_image_descriptors, dst_image_descriptors)
         # Show both images with the result work of descriptor
-        if not descriptor_lines:
-            descriptor_lines = 0
-        elif descriptor_lines > len(matches):
-            descriptor_lines = matches
+        descriptor_lines = min(max(descriptor_lines or 0, 0), len(matches))
         output_image = cv2.drawMatches(
-            img1=source_image.image,
+            img1=source_image.image_8bit,
             keypoints1=src_image_key_points,
-            img2=destination_image.image,
+            img2=destination_image.image_8bit,
             keypoints2=dst_image_key_points,
             matches1to2=matches[:descriptor_lines],
             outImg=None,
             flags=2,
         )
         descriptor_image = ImageWrapper.create_image(output_image, FigureType.DETECTED_IMAGE)
-        # Calculation angle
-        src_pts = np.float32([src_image_key_points[match.queryIdx].pt for match in matches]).reshape(-1, 1, 2)
-        dst_pts = np.float32([dst_image_key_points[match.trainIdx].pt for match in matches]).reshape(-1, 1, 2)
-
-        matrix, _ = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
-        theta = - math.atan2(matrix[0, 1], matrix[0, 0]) * 180 / math.pi
+        theta = features_matcher.estimate_rotation_angle(src_image_key_points, dst_image_key_points, matches)
         return theta, descriptor_image
 
+    @classmethod
+    def find_features_rotation_angle(cls, source_features: tuple[Sequence[cv2.KeyPoint], ndarray],
+                                     destination_image: ImageWrapper,
+                                     features_matcher: Optional[FeaturesMatcher] = None,
+                                     features_count: int = ORB_FEATURES_COUNT) -> float:
+        """Return the angle of rotation of the source image with the given features relative to destination image
+
+        Source features are detected once and reused to find rotation angles
+        of many destination images. Image with the drawn matches is not
+        created.
+
+        :param source_features: source image key points and descriptors
+        :param destination_image: destination image to find rotation angle of
+        :param features_matcher: matcher of the images features, the
+            cross-checked brute force matcher with homography estimation is
+            used if it's not given
+        :param features_count: maximal amount of the key points detected on
+            the destination image
+        :return: rotation angle in degrees
+        """
+        features_matcher = features_matcher or FeaturesMatcher()
+        src_image_key_points, src_image_descriptors = source_features
+        dst_image_key_points, dst_image_descriptors = cls.detect_features(
+            destination_image, {"nfeatures": features_count})
+        matches = features_matcher.match(src_image_descriptors, dst_image_descriptors)
+        return features_matcher.estimate_rotation_angle(src_image_key_points, dst_image_key_points, matches)
+
+    @classmethod
+    def detect_features(cls, image: ImageWrapper,
+                        detector_parameters: Optional[dict] = None) -> tuple[Sequence[cv2.KeyPoint], ndarray]:
+        """Detect ORB key points and compute their descriptors on the given image
+
+        Features are taken from the features cache if the image with the same
+        content was already described with the same detector parameters.
+
+        :param image: image to detect features on
+        :param detector_parameters: ORB detector parameters, default ones are
+            used if they are not given
+        :return: key points and their descriptors
+        """
+        detector_parameters = detector_parameters or {}
+        features_key = FeaturesCache.get_key(image, detector_parameters)
+        if (features := FeaturesCache.get(features_key)) is not None:
+            return features
+        orb = cv2.ORB_create(**detector_parameters)
+        features = orb.detectAndCompute(image.image_8bit, None)
+        FeaturesCache.put(features_key, features)
+        return features
+
     @classmethod
     def find_image_points(cls, source_image: ImageWrapper, destination_image: ImageWrapper,
-                          type_of_correlation: CorrelationTypes) -> ImageSelectedRegion:
+                          type_of_correlation: CorrelationTypes, threads_count: int = 1,
+                          pyramid_levels: Optional[int] = None) -> ImageSelectedRegion:
         """Find image points of the source image in the destination image
 
         :param source_image: source image to find in the destination
@@ -59,17 +128,313 @@ class ImagesDescriber:
             source image
         :param type_of_correlation: correlation type to use while matching
             source image in the destination one
+        :param threads_count: amount of threads to match large images in
+        :param pyramid_levels: amount of the downscaled pyramid levels to
+            search the source image on before the full resolution, it's
+            chosen by the source image size if None, 0 matches the source
+            image in the whole destination at full resolution
         :return: image region coordinates of the source image in the
             destination image
         """
-        res = cv2.matchTemplate(source_image.image, destination_image.image, type_of_correlation.correlation_cv2_type)
-        _, _, min_loc, max_loc = cv2.minMaxLoc(res)
+        x_1, y_1 = cls._find_template_location(
+            source_image.image, destination_image.image, type_of_correlation, threads_count, pyramid_levels)
         height, weight, _ = source_image.image.shape
-
-        # If the method is TM_SQDIFF or TM_SQDIFF_NORMED, take minimum
-        if type_of_correlation in [CorrelationTypes.TM_SQDIFF, CorrelationTypes.TM_SQDIFF_NORMED]:
-            x_1, y_1 = min_loc
-        else:
-            x_1, y_1 = max_loc
         x_2, y_2 = x_1 + weight, y_1 + height
         return ImageSelectedRegion(x_1=x_1, y_1=y_1, x_2=x_2, y_2=y_2)
+
+    @classmethod
+    def find_rotated_image_points(cls, source_image: ImageWrapper, destination_image: ImageWrapper, angle: float,
+                                  type_of_correlation: CorrelationTypes,
+                                  pyramid_levels: Optional[int] = None) -> ImageSelectedRegion:
+        """Find image points of the source image in the destination image rotated by the given angle
+
+        Destination image is not rotated as a whole. The rotated destination
+        is warped on the coarsest pyramid level only, finer levels warp just
+        the small regions around the upscaled candidates, so the found region
+        is the same as in the rotated destination while the full resolution
+        warping covers a few template sizes. At least one downscaled level is
+        searched, so the whole destination is never warped at full resolution.
+
+        :param source_image: source image to find in the rotated destination
+        :param destination_image: destination image to rotate
+        :param angle: rotation angle of the destination image
+        :param type_of_correlation: correlation type to use while matching
+            source image in the rotated destination one
+        :param pyramid_levels: amount of the downscaled pyramid levels to
+            search the source image on before the full resolution, it's
+            chosen by the source image size if None, 0 is searched as a single
+            level
+        :return: image region coordinates of the source image in the rotated
+            destination image
+        """
+        template, image = source_image.image, destination_image.image
+        if image.shape[0] < template.shape[0] or image.shape[1] < template.shape[1]:
+            app_logger.debug("Source image is larger than the destination one, rotating the whole destination")
+            return cls.find_image_points(
+                source_image, ImageBuilder.rotate_image(destination_image, angle), type_of_correlation,
+                pyramid_levels=pyramid_levels)
+        if template.dtype != np.uint8 or image.dtype != np.uint8:
+            template, image = template.astype(np.float32), image.astype(np.float32)
+        if pyramid_levels is None:
+            pyramid_levels = cls.get_template_search_levels(*template.shape[:2])
+        x_1, y_1 = cls._find_rotated_template_location(
+            image, template, ImageBuilder.get_rotation_matrix(image.shape, angle), type_of_correlation,
+            max(pyramid_levels, 1))
+        height, weight = source_image.image.shape[:2]
+        return ImageSelectedRegion(x_1=x_1, y_1=y_1, x_2=x_1 + weight, y_2=y_1 + height)
+
+    @classmethod
+    def _find_rotated_template_location(cls, image: ndarray, template: ndarray, matrix: ndarray,
+                                        type_of_correlation: CorrelationTypes, pyramid_levels: int) -> tuple[int, int]:
+        """Return the best template location in the image transformed by the given affine matrix
+
+        :param image: image matrix to transform and match template in
+        :param template: template matrix
+        :param matrix: affine transformation matrix of the full resolution image
+        :param type_of_correlation: correlation type to match images by
+        :param pyramid_levels: amount of the downscaled pyramid levels, at
+            least one
+        :return: column and row of the template top left corner in the
+            transformed image
+        """
+        images_pyramid, templates_pyramid = [image], [template]
+        for _ in range(pyramid_levels):
+            images_pyramid.append(cv2.pyrDown(images_pyramid[-1]))
+            templates_pyramid.append(cv2.pyrDown(templates_pyramid[-1]))
+
+        coarse_image = images_pyramid[-1]
+        coarse_region = (0, 0, coarse_image.shape[1], coarse_image.shape[0])
+        coarse_match_result = cv2.matchTemplate(
+            ImageBuilder.warp_affine_region(
+                coarse_image, cls._scale_affine_matrix(matrix, pyramid_levels), coarse_region),
+            templates_pyramid[-1], type_of_correlation.correlation_cv2_type)
+        candidates = cls._get_best_locations(coarse_match_result, type_of_correlation)
+        for level in range(pyramid_levels - 1, -1, -1):
+            level_image, level_template = images_pyramid[level], templates_pyramid[level]
+            level_matrix = cls._scale_affine_matrix(matrix, level)
+            refined_candidates = []
+            for location, _ in candidates:
+                region = cls._get_refine_region(
+                    level_image.shape, level_template.shape, (location[0] * 2, location[1] * 2))
+                refined_candidates.append(cls._match_template_region(
+                    ImageBuilder.warp_affine_region(level_image, level_matrix, region),
+                    level_template, region[:2], type_of_correlation))
+            candidates = cls._get_sorted_candidates(refined_candidates, type_of_correlation)
+        return candidates[0][0]
+
+    @staticmethod
+    def _scale_affine_matrix(matrix: ndarray, level: int) -> ndarray:
+        """Return affine transformation of the full resolution images for the given pyramid level images
+
+        :param matrix: affine transformation matrix of the full resolution
+        :param level: pyramid level, every level halves the images
+        :return: affine transformation matrix of the pyramid level
+        """
+        level_matrix = matrix.copy()
+        level_matrix[:, 2] /= 2 ** level
+        return level_matrix
+
+    @classmethod
+    def get_template_search_levels(cls, template_height: int, template_width: int) -> int:
+        """Return amount of the pyramid levels to search the template with the given size on
+
+        Every level halves the template, the coarsest template side is kept
+        not less than the minimal one, so the template still has details to
+        match.
+
+        :param template_height: template height at full resolution
+        :param template_width: template width at full resolution
+        :return: amount of the downscaled pyramid levels
+        """
+        template_side = min(template_height, template_width)
+        levels = 0
+        while levels < cls.TEMPLATE_SEARCH_MAX_LEVELS and template_side >> (levels + 1) >= cls.TEMPLATE_SEARCH_MIN_SIDE:
+            levels += 1
+        return levels
+
+    @classmethod
+    def _find_template_location(cls, first_image: ndarray, second_image: ndarray,
+                                type_of_correlation: CorrelationTypes, threads_count: int,
+                                pyramid_levels: Optional[int]) -> tuple[int, int]:
+        """Return the best location of the smaller image in the larger one
+
+        Template is matched in the whole image on the coarsest pyramid level
+        only. Several best separated candidates are upscaled to every finer
+        level and matched again in the small regions around them, so the full
+        resolution matching covers a few positions instead of the whole image,
+        and the candidate of the repeated pattern which is the best one only
+        on the coarse level doesn't hide the exhaustive search location.
+
+        :param first_image: first image matrix to match
+        :param second_image: second image matrix to match
+        :param type_of_correlation: correlation type to match images by
+        :param threads_count: amount of threads to match large images in
+        :param pyramid_levels: amount of the downscaled pyramid levels, it's
+            chosen by the template size if None
+        :return: column and row of the template top left corner in the image
+        """
+        if first_image.dtype != np.uint8 or second_image.dtype != np.uint8:
+            first_image, second_image = first_image.astype(np.float32), second_image.astype(np.float32)
+        image, template = first_image, second_image
+        if image.shape[0] < template.shape[0] or image.shape[1] < template.shape[1]:
+            image, template = template, image
+        if pyramid_levels is None:
+            pyramid_levels = cls.get_template_search_levels(*template.shape[:2])
+        match_method = type_of_correlation.correlation_cv2_type
+        images_pyramid, templates_pyramid = [image], [template]
+        for _ in range(pyramid_levels):
+            images_pyramid.append(cv2.pyrDown(images_pyramid[-1]))
+            templates_pyramid.append(cv2.pyrDown(templates_pyramid[-1]))
+
+        coarse_match_result = cls._match_template(
+            images_pyramid[-1], templates_pyramid[-1], match_method, threads_count)
+        if not pyramid_levels:
+            return cls._get_best_location(coarse_match_result, type_of_correlation)
+        candidates = cls._get_best_locations(coarse_match_result, type_of_correlation)
+        for level_image, level_template in zip(images_pyramid[-2::-1], templates_pyramid[-2::-1]):
+            candidates = cls._get_sorted_candidates([
+                cls._refine_template_location(
+                    level_image, level_template, (location[0] * 2, location[1] * 2), type_of_correlation)
+                for location, _ in candidates], type_of_correlation)
+        return candidates[0][0]
+
+    @classmethod
+    def _refine_template_location(cls, image: ndarray, template: ndarray, location: tuple[int, int],
+                                  type_of_correlation: CorrelationTypes) -> tuple[tuple[int, int], float]:
+        """Return the best template location in the image region around the given location
+
+        :param image: image matrix to match template in
+        :param template: template matrix
+        :param location: column and row of the candidate template location
+        :param type_of_correlation: correlation type to match images by
+        :return: column and row of the best template location in the image
+            and its match score
+        """
+        first_column, first_row, width, height = cls._get_refine_region(image.shape, template.shape, location)
+        return cls._match_template_region(
+            image[first_row:first_row + height, first_column:first_column + width], template,
+            (first_column, first_row), type_of_correlation)
+
+    @classmethod
+    def _get_refine_region(cls, image_shape: tuple[int, ...], template_shape: tuple[int, ...],
+                           location: tuple[int, int]) -> tuple[int, int, int, int]:
+        """Return image region to match template in around the given candidate location
+
+        :param image_shape: shape of the image matrix to match template in
+        :param template_shape: shape of the template matrix
+        :param location: column and row of the candidate template location
+        :return: first column, first row, width and height of the region
+        """
+        template_height, template_width = template_shape[:2]
+        last_row, last_column = image_shape[0] - template_height, image_shape[1] - template_width
+        first_row = min(max(location[1] - cls.TEMPLATE_SEARCH_MARGIN, 0), last_row)
+        first_column = min(max(location[0] - cls.TEMPLATE_SEARCH_MARGIN, 0), last_column)
+        last_row = max(min(location[1] + cls.TEMPLATE_SEARCH_MARGIN, last_row), first_row)
+        last_column = max(min(location[0] + cls.TEMPLATE_SEARCH_MARGIN, last_column), first_column)
+        return first_column, first_row, last_column - first_column + template_width, \
+            last_row - first_row + template_height
+
+    @classmethod
+    def _match_template_region(cls, image_region: ndarray, template: ndarray, region_origin: tuple[int, int],
+                               type_of_correlation: CorrelationTypes) -> tuple[tuple[int, int], float]:
+        """Return the best template location in the image region
+
+        :param image_region: image region matrix to match template in
+        :param template: template matrix
+        :param region_origin: column and row of the region in the image
+        :param type_of_correlation: correlation type to match images by
+        :return: column and row of the best template location in the image
+            and its match score
+        """
+        match_result = cv2.matchTemplate(image_region, template, type_of_correlation.correlation_cv2_type)
+        x_offset, y_offset = cls._get_best_location(match_result, type_of_correlation)
+        return (region_origin[0] + x_offset, region_origin[1] + y_offset), float(match_result[y_offset, x_offset])
+
+    @classmethod
+    def _get_best_locations(cls, match_result: ndarray,
+                            type_of_correlation: CorrelationTypes) -> list[tuple[tuple[int, int], float]]:
+        """Return several best separated locations in the match result
+
+        Positions around the already chosen location are suppressed, they are
+        covered by its refine region on the finer level anyway. Candidates of
+        the repeated pattern closer than the template size are kept.
+
+        :param match_result: template matching result matrix
+        :param type_of_correlation: correlation type of the match result
+        :return: columns and rows of the best locations and their match
+            scores, the best location is the first one
+        """
+        match_result = match_result.copy()
+        worst_score = np.inf if type_of_correlation.is_lower_better else -np.inf
+        radius = cls.TEMPLATE_SEARCH_MARGIN // 2
+        candidates: list[tuple[tuple[int, int], float]] = []
+        for _ in range(cls.TEMPLATE_SEARCH_CANDIDATES):
+            column, row = cls._get_best_location(match_result, type_of_correlation)
+            score = float(match_result[row, column])
+            if not np.isfinite(score):
+                break
+            candidates.append(((column, row), score))
+            match_result[max(row - radius, 0):row + radius + 1,
+                         max(column - radius, 0):column + radius + 1] = worst_score
+        return candidates
+
+    @staticmethod
+    def _get_sorted_candidates(candidates: list[tuple[tuple[int, int], float]],
+                               type_of_correlation: CorrelationTypes) -> list[tuple[tuple[int, int], float]]:
+        """Return distinct candidate locations sorted from the best match score to the worst one
+
+        :param candidates: columns and rows of the candidate locations and
+            their match scores
+        :param type_of_correlation: correlation type of the match scores
+        :return: sorted candidates without the repeated locations
+        """
+        distinct_candidates = dict(candidates)
+        return sorted(distinct_candidates.items(), key=lambda candidate: candidate[1],
+                      reverse=not type_of_correlation.is_lower_better)
+
+    @staticmethod
+    def _get_best_location(match_result: ndarray, type_of_correlation: CorrelationTypes) -> tuple[int, int]:
+        """Return location of the best match in the match result
+
+        :param match_result: template matching result matrix
+        :param type_of_correlation: correlation type of the match result
+        :return: column and row of the best match
+        """
+        _, _, min_loc, max_loc = cv2.minMaxLoc(match_result)
+        # If the method is TM_SQDIFF or TM_SQDIFF_NORMED, take minimum
+        return min_loc if type_of_correlation.is_lower_better else max_loc
+
+    @classmethod
+    def _match_template(cls, first_image: ndarray, second_image: ndarray, match_method: int,
+                        threads_count: int) -> ndarray:
+        """Match the smaller image in the larger one
+
+        Large images are matched by row bands of the match result in the
+        thread pool if more than one thread is given. Every band matches the
+        template in the image rows covered by the band positions. Images
+        with the depth not supported by cv2 matching are matched as float32
+        images.
+
+        :param first_image: first image matrix to match
+        :param second_image: second image matrix to match
+        :param match_method: cv2 template matching method
+        :param threads_count: amount of threads to match large images in
+        :return: match result matrix
+        """
+        if first_image.dtype != np.uint8 or second_image.dtype != np.uint8:
+            first_image = first_image.astype(np.float32, copy=False)
+            second_image = second_image.astype(np.float32, copy=False)
+        image, template = first_image, second_image
+        if image.shape[0] < template.shape[0] or image.shape[1] < template.shape[1]:
+            image, template = template, image
+        tile_executor = ThreadTileExecutor(threads_count)
+        if not tile_executor.is_worth_for(*image.shape[:2]):
+            return cv2.matchTemplate(first_image, second_image, match_method)
+
+        template_height = template.shape[0]
+        result_rows = image.shape[0] - template_height + 1
+        bands_results = tile_executor.map_row_bands(
+            lambda first_row, last_row: cv2.matchTemplate(
+                image[first_row:last_row + template_height - 1], template, match_method),
+            result_rows)
+        return np.vstack(bands_results)
@@ -0,0 +1,232 @@
+"""Phase correlation registrator
+
+Contains registrator that finds rotation angle and position of the source
+image in the destination image without features detection. Rotation is found
+by the phase correlation of the polar magnitude spectra of the images,
+position is found by the phase correlation of the source image and the
+rotated destination image. It works on the low texture images where ORB
+finds too few key points.
+"""
+import math
+from functools import lru_cache
+from typing import Final, Optional
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from correlation_map.core.config.correlation import GrayConversionModes
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.models.image_selected_region import ImageSelectedRegion
+from correlation_map.gui.tools.logger import app_logger
+
+
+class PhaseCorrelationRegistrator:
+    """Registrator of the rotation and shift between images by the phase correlation
+
+    Magnitude spectrum doesn't depend on the image shift and is rotated with
+    the image, so the rotation becomes a shift along the angle axis of the
+    polar spectrum. Spectra are taken of the squares of the same side
+    weighted by the radial window, so neither the image borders nor the
+    window add the same not rotated structure to both spectra. Central source
+    square is correlated with the destination squares covering the whole
+    destination, the rotation of the square with the highest response is kept,
+    because the rotated destination content may leave its center. Magnitude
+    spectrum is symmetric, so the rotation is found up to 180 degrees, both
+    candidates are checked by the correlation coefficient of the source image
+    and the rotated destination image at the found shift. Images are
+    downscaled to find rotation, the shift of the best candidate is found at
+    full resolution.
+    """
+
+    # Maximal side of the downscaled squares to find rotation on
+    ROTATION_SIDE: Final[int] = 256
+    # Amount of the polar spectrum bins along the angle axis per the full turn
+    ANGLES_COUNT: Final[int] = 720
+    # Fractions of the spectrum radius to correlate, the lowest frequencies are dominated by the image brightness
+    # and the highest ones by the noise and the interpolation
+    SPECTRUM_RADIUS_RANGE: Final[tuple[float, float]] = (0.05, 0.8)
+    # Minimal fraction of the source pixels covered by the rotated destination to compare rotation candidates by
+    MIN_COVERED_FRACTION: Final[float] = 0.1
+
+    @classmethod
+    def register(cls, source_image: ImageWrapper, destination_image: ImageWrapper,
+                 gray_conversion: GrayConversionModes = GrayConversionModes.MEAN) -> tuple[float, ImageSelectedRegion]:
+        """Find rotation angle of the destination image and region of the source image in the rotated destination
+
+        :param source_image: source image to find in the destination
+        :param destination_image: destination image to register
+        :param gray_conversion: conversion of the images to gray matrices
+        :return: angle to rotate the destination image by and the source
+            image region coordinates in the rotated destination image
+        """
+        source_matrix = ImageBuilder.get_image_gray_matrix(source_image, gray_conversion, np.float32)
+        destination_matrix = ImageBuilder.get_image_gray_matrix(destination_image, gray_conversion, np.float32)
+        scale = min(cls.ROTATION_SIDE / min(*source_matrix.shape, *destination_matrix.shape), 1.0)
+        small_source_matrix = cls._resize(source_matrix, scale)
+        small_destination_matrix = cls._resize(destination_matrix, scale)
+        spectrum_angle = cls.get_spectrum_rotation_angle(small_source_matrix, small_destination_matrix)
+        angle = max((cls._normalize_angle(spectrum_angle), cls._normalize_angle(spectrum_angle + 180)),
+                    key=lambda candidate_angle: cls.get_match_score(
+                        small_source_matrix, small_destination_matrix, candidate_angle))
+
+        x_1, y_1 = cls.get_position(source_matrix, cls._rotate(destination_matrix, angle))
+        height, width = source_matrix.shape
+        app_logger.debug("Images registered by phase correlation: angle %.3f, position %s, %s", angle, x_1, y_1)
+        return angle, ImageSelectedRegion(x_1=x_1, y_1=y_1, x_2=x_1 + width, y_2=y_1 + height)
+
+    @classmethod
+    def get_spectrum_rotation_angle(cls, source_matrix: ndarray, destination_matrix: ndarray) -> float:
+        """Return rotation angle between the magnitude spectra of the given gray matrices
+
+        :param source_matrix: source gray matrix
+        :param destination_matrix: destination gray matrix
+        :return: angle to rotate the destination matrix by, up to 180 degrees
+        """
+        side = min(*source_matrix.shape, *destination_matrix.shape)
+        source_spectrum = cls._get_polar_spectrum(cls._get_central_square(source_matrix, side))
+        best_response, best_angle_shift = -math.inf, 0.0
+        for top, left in cls._get_squares_corners(destination_matrix.shape, side):
+            (_, angle_shift), response = cv2.phaseCorrelate(
+                source_spectrum, cls._get_polar_spectrum(destination_matrix[top:top + side, left:left + side]))
+            if response > best_response:
+                best_response, best_angle_shift = response, angle_shift
+        return best_angle_shift * 360 / cls.ANGLES_COUNT
+
+    @classmethod
+    def get_match_score(cls, source_matrix: ndarray, destination_matrix: ndarray, angle: float) -> float:
+        """Return correlation coefficient of the source gray matrix and the rotated destination one
+
+        Source matrix is compared with the rotated destination at the found
+        position, pixels not covered by the rotated destination are skipped.
+
+        :param source_matrix: source gray matrix
+        :param destination_matrix: destination gray matrix
+        :param angle: angle to rotate the destination matrix by
+        :return: correlation coefficient of the covered pixels, -1 if too few
+            pixels are covered
+        """
+        rotated_matrix = cls._rotate(destination_matrix, angle)
+        covered_mask = cls._rotate(np.ones_like(destination_matrix), angle, border_value=0.0) > 0.5
+        x_1, y_1 = cls.get_position(source_matrix, rotated_matrix)
+        height = min(source_matrix.shape[0], destination_matrix.shape[0])
+        width = min(source_matrix.shape[1], destination_matrix.shape[1])
+        covered_mask = covered_mask[y_1:y_1 + height, x_1:x_1 + width]
+        if np.count_nonzero(covered_mask) < cls.MIN_COVERED_FRACTION * covered_mask.size:
+            return -1.0
+        source_values = source_matrix[:height, :width][covered_mask]
+        destination_values = rotated_matrix[y_1:y_1 + height, x_1:x_1 + width][covered_mask]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(np.nan_to_num(np.corrcoef(source_values, destination_values)[0, 1], nan=-1.0))
+
+    @classmethod
+    def get_position(cls, source_matrix: ndarray, destination_matrix: ndarray) -> tuple[int, int]:
+        """Return position of the source gray matrix in the destination one
+
+        Source matrix is padded with its mean to the destination matrix shape,
+        negative shifts are wrapped around the destination matrix, and the
+        position is clipped to keep the source inside the destination.
+
+        :param source_matrix: source gray matrix
+        :param destination_matrix: destination gray matrix
+        :return: column and row of the source top left corner in the
+            destination
+        """
+        height = max(source_matrix.shape[0], destination_matrix.shape[0])
+        width = max(source_matrix.shape[1], destination_matrix.shape[1])
+        (x_shift, y_shift), _ = cv2.phaseCorrelate(
+            cls._pad(source_matrix, height, width), cls._pad(destination_matrix, height, width))
+        x_1 = min(round(x_shift) % width, max(destination_matrix.shape[1] - source_matrix.shape[1], 0))
+        y_1 = min(round(y_shift) % height, max(destination_matrix.shape[0] - source_matrix.shape[0], 0))
+        return x_1, y_1
+
+    @classmethod
+    def _get_polar_spectrum(cls, square: ndarray) -> ndarray:
+        """Return polar log magnitude spectrum of the square gray matrix weighted by the radial window
+
+        :param square: square gray matrix to get spectrum of
+        :return: polar spectrum with the half turn angles along rows and the
+            radii of the correlated range along columns
+        """
+        side = square.shape[0]
+        window = cls._get_radial_window(side)
+        square = ((square - square[window > 0].mean()) * window).astype(np.float32)
+        spectrum = np.log1p(np.fft.fftshift(cv2.magnitude(*cv2.split(cv2.dft(square, flags=cv2.DFT_COMPLEX_OUTPUT)))))
+        radius = side / 2
+        polar_spectrum = cv2.warpPolar(spectrum, (side // 2, cls.ANGLES_COUNT), (radius, radius), radius,
+                                       cv2.INTER_LINEAR)
+        first_radius, last_radius = (round(fraction * polar_spectrum.shape[1]) for fraction in
+                                     cls.SPECTRUM_RADIUS_RANGE)
+        # Magnitude spectrum is symmetric, so its half turn is periodic along the angle axis
+        return np.ascontiguousarray(polar_spectrum[:cls.ANGLES_COUNT // 2, first_radius:last_radius])
+
+    @staticmethod
+    def _get_central_square(gray_matrix: ndarray, side: int) -> ndarray:
+        """Return the central square of the gray matrix with the given side"""
+        top, left = (gray_matrix.shape[0] - side) // 2, (gray_matrix.shape[1] - side) // 2
+        return gray_matrix[top:top + side, left:left + side]
+
+    @staticmethod
+    def _get_squares_corners(shape: tuple[int, int], side: int) -> list[tuple[int, int]]:
+        """Return top left corners of the squares covering the matrix with the given shape
+
+        Squares are placed with their side step, the last squares are aligned
+        with the matrix bottom and right edges, and the central square is
+        always included.
+
+        :param shape: height and width of the matrix
+        :param side: side of the squares
+        :return: rows and columns of the squares top left corners
+        """
+        tops = sorted({*range(0, shape[0] - side + 1, side), shape[0] - side, (shape[0] - side) // 2})
+        lefts = sorted({*range(0, shape[1] - side + 1, side), shape[1] - side, (shape[1] - side) // 2})
+        return [(top, left) for top in tops for left in lefts]
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def _get_radial_window(side: int) -> ndarray:
+        """Return the Hann window of the square side depending on the distance to the square center only"""
+        center = (side - 1) / 2
+        rows, columns = np.ogrid[:side, :side]
+        radii = np.sqrt((rows - center) ** 2 + (columns - center) ** 2) / (side / 2)
+        return np.where(radii < 1, 0.5 + 0.5 * np.cos(math.pi * np.minimum(radii, 1)), 0).astype(np.float32)
+
+    @staticmethod
+    def _rotate(gray_matrix: ndarray, angle: float, border_value: Optional[float] = None) -> ndarray:
+        """Rotate the gray matrix like the image builder rotates images
+
+        Not covered pixels get the matrix mean value by default, such border
+        adds no edges to correlate with, unlike the black corners of the
+        rotated images.
+
+        :param gray_matrix: gray matrix to rotate
+        :param angle: rotation angle
+        :param border_value: value of the not covered pixels, the matrix mean
+            value if it's not given
+        :return: rotated gray matrix
+        """
+        height, width = gray_matrix.shape
+        border_value = float(gray_matrix.mean()) if border_value is None else border_value
+        return cv2.warpAffine(gray_matrix, ImageBuilder.get_rotation_matrix(gray_matrix.shape, angle), (width, height),
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+
+    @staticmethod
+    def _resize(gray_matrix: ndarray, scale: float) -> ndarray:
+        """Downscale the gray matrix by the given scale"""
+        if scale >= 1.0:
+            return gray_matrix
+        height, width = gray_matrix.shape
+        return cv2.resize(gray_matrix, (max(round(width * scale), 1), max(round(height * scale), 1)),
+                          interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def _pad(gray_matrix: ndarray, height: int, width: int) -> ndarray:
+        """Pad the gray matrix with its mean value to the given shape, so the padding adds no edges"""
+        return cv2.copyMakeBorder(gray_matrix, 0, height - gray_matrix.shape[0], 0, width - gray_matrix.shape[1],
+                                  cv2.BORDER_CONSTANT, value=float(gray_matrix.mean()))
+
+    @staticmethod
+    def _normalize_angle(angle: float) -> float:
+        """Return the same angle in the (-180, 180] degrees range"""
+        return 180.0 - (180.0 - angle) % 360.0
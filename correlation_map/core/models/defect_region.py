@@ -0,0 +1,19 @@
+"""Contains defect region model"""
+from dataclasses import dataclass
+
+from correlation_map.core.models.image_selected_region import ImageSelectedRegion
+
+
+@dataclass(frozen=True, kw_only=True)
+class DefectRegion(ImageSelectedRegion):
+    """Dataclass for the region of the connected defect blocks of the correlation map
+
+    Coordinates are the bounding box of the region blocks in the image
+    pixels. Area is the amount of the full size correlation map pixels of the
+    region blocks.
+    """
+    blocks_count: int
+    area: int
+    min_score: float
+    max_score: float
+    mean_score: float
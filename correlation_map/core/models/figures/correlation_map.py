@@ -1,113 +1,375 @@
 """Contains correlation map model"""
 import logging
-from collections import deque
-from typing import Optional
+from typing import Final, Optional
 
 import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 from numpy import ndarray
 
-from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
 from correlation_map.core.config.figure_types import FigureType
-from correlation_map.core.correlation.correlation_maker import CorrelationMaker
+from correlation_map.core.correlation.band_correlation_builder import (
+    BandCorrelationBuilder, ProcessPoolCorrelationBuilder, ThreadPoolCorrelationBuilder)
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.block_sums_cache import BlockSumsCache
+from correlation_map.core.correlation.correlation_backends import CorrelationBackendsRegistry
+from correlation_map.core.correlation.map_statistics import MapStatistics
+from correlation_map.core.correlation.pyramid_correlation_builder import PyramidCorrelationBuilder
+from correlation_map.core.correlation.streaming_correlation_builder import StreamingCorrelationBuilder
+from correlation_map.core.correlation.worst_blocks_index import WorstBlocksIndex
 from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.image_strip_reader import ImageStripReader
 from correlation_map.core.models.figures.base_figure import BaseFigure
 from correlation_map.core.models.figures.image import ImageWrapper
+from correlation_map.core.models.worst_block import WorstBlock
 from correlation_map.gui.tools.logger import app_logger
 
 
 class CorrelationMap(BaseFigure):
     """Correlation map figure model
 
-    3d figure which shows correlation between source and destination image
+    3d figure which shows correlation between source and destination image.
+    Correlation block grid is the map data, every block value fills stride
+    sized cell of the full size map. Full size map is expanded from the grid
+    only on demand.
     """
 
-    def __init__(self, source_image: ImageWrapper, destination_image: ImageWrapper,
-                 correlation_type: CorrelationTypes, pieces_amount: int = 10):
+    CHANNEL_FIGURE_TYPES: Final[tuple[FigureType, ...]] = (
+        FigureType.RED_CHANNEL_CORRELATION_MAP,
+        FigureType.GREEN_CHANNEL_CORRELATION_MAP,
+        FigureType.BLUE_CHANNEL_CORRELATION_MAP,
+    )
+
+    def __init__(self, source_image: ImageWrapper, destination_image: ImageWrapper, correlation_type: CorrelationTypes,
+                 correlation_configuration: Optional[CorrelationConfiguration] = None):
+        """
+        :param source_image: source image to compare
+        :param destination_image: destination image to compare
+        :param correlation_type: correlation type to compare pieces
+        :param correlation_configuration: correlation configuration with the
+            pieces amount, stride and other map building options. Default
+            configuration is used if it's not given.
+        """
         self.source_image = source_image
         self.destination_image = destination_image
         self.correlation_type = correlation_type
+        self.correlation_configuration = correlation_configuration or CorrelationConfiguration()
 
-        self.pieces_amount = pieces_amount
-        self.correlation_map: Optional[ndarray] = None
+        self.compute_dtype = self.correlation_configuration.compute_precision.dtype
+        self.pieces_amount = self.correlation_configuration.pieces_shape
+        self.stride = self.correlation_configuration.pieces_stride
+        self.edge_mode = self.correlation_configuration.edge_blocks_mode
+        self.block_statistics: Optional[BlockStatistics] = None
+        self.correlation_grid: Optional[ndarray] = None
+        # Index of the worst correlation blocks built on the first request
+        self.worst_blocks_index: Optional[WorstBlocksIndex] = None
+        # Running statistics of the block correlations accumulated while the grid is built
+        self.map_statistics: Optional[MapStatistics] = None
+        # Robust z-scores of the block correlations calculated on the first request
+        self.anomaly_grid: Optional[ndarray] = None
+        self.map_figure_type = FigureType.CORRELATION_MAP
+        # Fraction and mask of the map blocks calculated with the fine pieces in the hierarchical mode, not refined
+        # blocks keep the coarse correlations which only approximate the fine ones
+        self.refined_fraction: Optional[float] = None
+        self.refined_mask: Optional[ndarray] = None
+        self.streaming_builder: Optional[StreamingCorrelationBuilder] = None
+        if self.correlation_configuration.streaming_block_rows:
+            self.streaming_builder = StreamingCorrelationBuilder(correlation_type, self.correlation_configuration)
 
     @property
     def figure_type(self) -> FigureType:
         """Return correlation map figure type"""
-        return FigureType.CORRELATION_MAP
+        return self.map_figure_type
 
-    def _get_cells_from_image_matrix(self, matrix: ndarray) -> deque[ndarray]:
-        """Divide the given matrix by cells with the pieces amount shapes
+    @staticmethod
+    def get_correlation_type_figure_type(correlation_type: CorrelationTypes) -> FigureType:
+        """Get figure type of the additional correlation map with the given correlation type
 
-        :param matrix: image matrix to divide
-        :return: list of image matrix cells with the current pieces amount shapes
+        :param correlation_type: correlation type of the additional map
+        :return: figure type of the correlation map with the given type
         """
-        cells: deque[ndarray] = deque()
-        for i, row_i in enumerate(range(0, len(matrix), self.pieces_amount)):
-            for _, column_i in enumerate(range(0, len(matrix[i]), self.pieces_amount)):
-                cells.append(matrix[row_i:row_i + self.pieces_amount, column_i:column_i + self.pieces_amount])
-        return cells
+        return FigureType.get_by_name(f"{correlation_type.correlation_type.replace('_', ' ')} map")
 
     def get_correlation_map_shapes(self, source_image_matrix: ndarray, destination_image: ndarray) -> tuple[int, int]:
-        """Get correlation map shapes from the given image matrices
+        """Get shapes of the image matrices part compared by the correlation map pieces
+
+        Partial edge blocks of the common part of the images are padded or
+        reduced by the block statistics, so the compared part never exceeds
+        the common part, and the pixels of the larger image outside it are not
+        compared with the padding of the smaller one.
 
         :param source_image_matrix: source grayscale image matrix
         :param destination_image: destination grayscale image matrix
-        :return: height and weight of the correlation map
+        :return: height and weight of the compared image part
         """
-        height_1, weight_1 = source_image_matrix.shape
-        height_2, weight_2 = destination_image.shape
+        height = min(source_image_matrix.shape[0], destination_image.shape[0])
+        weight = min(source_image_matrix.shape[1], destination_image.shape[1])
+        rows, columns = self.get_correlation_grid_shape(source_image_matrix, destination_image)
+        covered_height, covered_weight = BlockStatistics.get_covered_shape(
+            rows, columns, self.pieces_amount, self.stride)
+        return min(height, covered_height), min(weight, covered_weight)
 
-        if height_1 * weight_1 < height_2 * weight_2:
-            height, weight = height_1, weight_1
-        else:
-            height, weight = height_2, weight_2
-        return height - round(height % self.pieces_amount), weight - round(weight % self.pieces_amount)
+    def get_correlation_grid_shape(self, source_image_matrix: ndarray, destination_image: ndarray) -> tuple[int, int]:
+        """Get correlation map block grid shape from the given image matrices
+
+        :param source_image_matrix: source grayscale image matrix
+        :param destination_image: destination grayscale image matrix
+        :return: amount of pieces rows and columns
+        """
+        height = min(source_image_matrix.shape[0], destination_image.shape[0])
+        weight = min(source_image_matrix.shape[1], destination_image.shape[1])
+        return BlockStatistics.get_grid_shape(height, weight, self.pieces_amount, self.stride, self.edge_mode)
 
     def build_correlation_map(self) -> "CorrelationMap":
         """Calculate correlation map
 
-        Transform source and destination image in grayscale. Slides through
-        destination image, compares the overlapped pieces of the specific size
-        from source image using the specified correlation type. Save calculated
-        results as x_array, y_array, z_array in the current map.
+        Transform source and destination image in grayscale. Divides the
+        common part of the images into the blocks of the pieces amount size
+        placed with the stride step and calculates block sums for all blocks
+        at once. Compares blocks using the specified correlation type from
+        these sums. Save calculated results as block grid, full size
+        correlation map is expanded from it on demand.
+        Image row bands are calculated in the process pool if more than one
+        correlation process is configured, otherwise in the thread pool if
+        more than one correlation thread is configured. If streaming block
+        rows are configured, images are read and calculated strip by strip,
+        and results are stored in the memory mapped arrays. Images that are
+        not read yet are read by strips from their files. If refinement
+        threshold is configured, the coarse map is calculated on the image
+        pyramid level and only blocks with the coarse scores crossing the
+        threshold are calculated with the map pieces amount. Otherwise, if
+        block sums cache base is configured, block sums are aggregated from
+        the cached base block sums of the same images.
 
         :return: calculated correlation map
         """
         app_logger.debug("Starting correlation map calculations")
+        if self.streaming_builder:
+            app_logger.debug("Building correlation map out of core by %s block rows strips",
+                             self.streaming_builder.strip_block_rows)
+            gray_conversion = self.correlation_configuration.gray_conversion
+            gray_dtype = self.correlation_configuration.gray_dtype
+            directory = self.streaming_builder.directory
+            self.block_statistics, correlation_grid = self.streaming_builder.build(
+                ImageStripReader.from_image(self.source_image, directory, gray_conversion, gray_dtype),
+                ImageStripReader.from_image(self.destination_image, directory, gray_conversion, gray_dtype))
+            self._set_correlation_grid(correlation_grid, self.streaming_builder.map_statistics)
+            return self
+        if self.correlation_configuration.block_sums_cache_base \
+                and self.correlation_configuration.refinement_threshold is None:
+            self.calculate_correlations(BlockSumsCache.get_block_statistics(
+                self.source_image, self.destination_image, self.correlation_configuration))
+            return self
         app_logger.debug("Transforming current source image to grayscale")
-        gray_source_matrix = ImageBuilder.transform_image_to_gray(self.source_image).image
+        gray_conversion = self.correlation_configuration.gray_conversion
+        gray_dtype = self.correlation_configuration.gray_dtype
+        gray_source_matrix = ImageBuilder.get_image_gray_matrix(self.source_image, gray_conversion, gray_dtype)
         app_logger.debug("Transforming current destination image to grayscale")
-        gray_destination_matrix = ImageBuilder.transform_image_to_gray(self.destination_image).image
-        app_logger.debug("Filling correlation map with zeroes using source and destination images shapes")
+        gray_destination_matrix = ImageBuilder.get_image_gray_matrix(
+            self.destination_image, gray_conversion, gray_dtype)
         height, weight = self.get_correlation_map_shapes(gray_source_matrix, gray_destination_matrix)
-        self.correlation_map = np.zeros((height, weight))
-        app_logger.debug("Dividing source image to cells with the %s height and %s weight",
-                         self.pieces_amount, self.pieces_amount)
-        source_cells = self._get_cells_from_image_matrix(gray_source_matrix)
-        app_logger.debug("Dividing destination image to cells with the %s height and %s weight",
-                         self.pieces_amount, self.pieces_amount)
-        destination_cells = self._get_cells_from_image_matrix(gray_destination_matrix)
-
-        cells_to_process = min(len(source_cells), len(destination_cells))
-        app_logger.debug("Calculating correlations between source and destination cells. To calculate correlation for "
-                         "%s cells", cells_to_process)
-        correlation_method = CorrelationMaker().__getattribute__(self.correlation_type.correlation_type)
-
-        correlation_vector_deque: deque = deque()
-        for current_cell_number, (source_cell, destination_cell) in enumerate(zip(source_cells, destination_cells)):
-            app_logger.debug("Calculated %s/%s cells", current_cell_number, cells_to_process)
-            cell_correlation = correlation_method(source_cell[0], destination_cell[0])
-            correlation_vector_deque.append(cell_correlation)
-
-        for i, row in enumerate(range(0, len(self.correlation_map), self.pieces_amount)):
-            for _, column in enumerate(range(0, len(self.correlation_map[i]), self.pieces_amount)):
-                correlation_part = np.full((self.pieces_amount, self.pieces_amount), correlation_vector_deque.popleft())
-                map_part = self.correlation_map[row:row + self.pieces_amount, column:column + self.pieces_amount]
-                self.correlation_map[row:row + map_part.shape[0], column:column + map_part.shape[1]] = correlation_part
+        app_logger.debug("Calculating block sums for the blocks with the %s height and %s weight and %sx%s stride",
+                         *self.pieces_amount, *self.stride)
+        gray_source_matrix = gray_source_matrix[:height, :weight]
+        gray_destination_matrix = gray_destination_matrix[:height, :weight]
+        if self.correlation_configuration.refinement_threshold is not None and height and weight:
+            pyramid_builder = PyramidCorrelationBuilder(self.correlation_type, self.correlation_configuration)
+            self.block_statistics, correlation_grid = pyramid_builder.build(gray_source_matrix, gray_destination_matrix)
+            self.refined_fraction = pyramid_builder.refined_fraction
+            self.refined_mask = pyramid_builder.refined_mask
+            app_logger.info("Refined %.1f%% of the correlation map blocks", self.refined_fraction * 100)
+            self._set_correlation_grid(correlation_grid)
+            return self
+
+        band_builder = self._get_band_correlation_builder()
+        if band_builder and height and weight:
+            self.block_statistics, correlation_grid = band_builder.build(gray_source_matrix, gray_destination_matrix)
+            self._set_correlation_grid(correlation_grid)
+            return self
+
+        block_statistics = BlockStatistics.from_image_matrices(
+            gray_source_matrix, gray_destination_matrix, self.pieces_amount, self.stride, self.edge_mode)
+        self.calculate_correlations(block_statistics)
         return self
 
+    def _get_band_correlation_builder(self) -> Optional[BandCorrelationBuilder]:
+        """Get builder to calculate correlation map by bands in parallel according to the configuration
+
+        :return: process or thread pool builder or None if the map should be
+            calculated at once
+        """
+        if self.correlation_configuration.correlation_processes_count > 1:
+            return ProcessPoolCorrelationBuilder(self.correlation_type, self.correlation_configuration)
+        if self.correlation_configuration.correlation_threads_count > 1:
+            return ThreadPoolCorrelationBuilder(self.correlation_type, self.correlation_configuration)
+        return None
+
+    def build_related_correlation_map(self, correlation_type: CorrelationTypes) -> "CorrelationMap":
+        """Build correlation map with the given correlation type from the block statistics of the current map
+
+        All correlation types are calculated from the same block sums, so the
+        related map is built without transforming and scanning images again.
+        Related map has its own figure type according to its correlation type.
+        Block sums of the not refined blocks of the hierarchical mode are
+        approximate, so the related map has the same refined blocks.
+
+        :param correlation_type: correlation type of the related map
+        :return: calculated related correlation map
+        """
+        app_logger.debug("Building related correlation map with the `%s` correlation type",
+                         correlation_type.correlation_type)
+        related_map = CorrelationMap(
+            self.source_image, self.destination_image, correlation_type, self.correlation_configuration)
+        related_map.map_figure_type = self.get_correlation_type_figure_type(correlation_type)
+        related_map.refined_fraction = self.refined_fraction
+        related_map.refined_mask = self.refined_mask
+        related_map.calculate_correlations(self.block_statistics)
+        return related_map
+
+    def build_channel_correlation_maps(self) -> list["CorrelationMap"]:
+        """Build correlation maps of the image colour channels according to the configuration
+
+        Block sums of all channels are calculated in a single pass over the
+        images. Red, green and blue channel maps and the combined channels map
+        are built from them. The combined map compares blocks as the whole
+        colour vectors, so it detects colour only differences that are
+        averaged away by the gray conversion. Channel maps are calculated in
+        memory.
+
+        :return: calculated channel correlation maps, empty list if images
+            don't have colour channels
+        """
+        source_matrix, destination_matrix = self.source_image.image, self.destination_image.image
+        if source_matrix.ndim != 3 or destination_matrix.ndim != 3:
+            app_logger.warning("Can not build channel correlation maps, images don't have colour channels")
+            return []
+        channels_count = min(source_matrix.shape[2], destination_matrix.shape[2], len(self.CHANNEL_FIGURE_TYPES))
+        height, weight = self.get_correlation_map_shapes(source_matrix, destination_matrix)
+        app_logger.debug("Calculating block sums of %s image channels", channels_count)
+        channel_statistics = BlockStatistics.from_channel_matrices(
+            source_matrix[:height, :weight, :channels_count], destination_matrix[:height, :weight, :channels_count],
+            self.pieces_amount, self.stride, self.edge_mode)
+
+        channel_maps_statistics: list[tuple[FigureType, BlockStatistics]] = []
+        if self.correlation_configuration.channel_maps:
+            channel_maps_statistics.extend(
+                (figure_type, channel_statistics.get_channel(channel))
+                for channel, figure_type in enumerate(self.CHANNEL_FIGURE_TYPES[:channels_count]))
+        if self.correlation_configuration.combined_channels_map:
+            channel_maps_statistics.append(
+                (FigureType.COMBINED_CHANNELS_CORRELATION_MAP, channel_statistics.sum_channels()))
+        channel_maps: list[CorrelationMap] = []
+        for figure_type, block_statistics in channel_maps_statistics:
+            channel_map = CorrelationMap(
+                self.source_image, self.destination_image, self.correlation_type, self.correlation_configuration)
+            channel_map.map_figure_type = figure_type
+            channel_map.streaming_builder = None
+            channel_map.calculate_correlations(block_statistics)
+            channel_maps.append(channel_map)
+        return channel_maps
+
+    def calculate_correlations(self, block_statistics: BlockStatistics):
+        """Calculate correlation block grid and full size map from the given block statistics
+
+        :param block_statistics: block sums of the source and destination
+            images calculated with the current map pieces amount and stride
+        """
+        app_logger.debug("Calculating correlations for %s blocks", block_statistics.cross_sum.size)
+        self.block_statistics = block_statistics
+        if self.streaming_builder:
+            correlation_grid = self.streaming_builder.calculate_correlations(block_statistics)
+            self._set_correlation_grid(correlation_grid, self.streaming_builder.map_statistics)
+            return
+        correlation_method = CorrelationBackendsRegistry.get_correlation_method(
+            self.correlation_type, self.correlation_configuration)
+        self._set_correlation_grid(correlation_method(block_statistics.to_calculation_dtype(self.compute_dtype)))
+
+    def get_blocks_view(self) -> ndarray:
+        """Return full size correlation map as the read only blocks view of the correlation grid
+
+        View doesn't copy the grid, its element with the (row, cell row,
+        column, cell column) index is the value of the stride sized cell of
+        the full size map.
+
+        :return: (rows, stride height, columns, stride width) view
+        """
+        rows, columns = self.correlation_grid.shape
+        return np.broadcast_to(
+            self.correlation_grid[:, np.newaxis, :, np.newaxis], (rows, self.stride[0], columns, self.stride[1]))
+
+    def expand_correlation_map(self) -> ndarray:
+        """Expand correlation grid to the full size correlation map
+
+        Full size map is allocated on every call, so it's intended for the
+        export. Full size map of the streaming correlation map is expanded
+        into the memory mapped array.
+
+        :return: full size correlation map, where every block value fills
+            stride sized cell
+        """
+        app_logger.debug("Expanding correlation grid with the %sx%s shape to the full size map",
+                         *self.correlation_grid.shape)
+        if self.streaming_builder:
+            return self.streaming_builder.expand_grid(self.correlation_grid)
+        return np.repeat(np.repeat(self.correlation_grid, self.stride[0], axis=0), self.stride[1], axis=1)
+
+    def _set_correlation_grid(self, correlation_grid: ndarray, map_statistics: Optional[MapStatistics] = None):
+        """Set correlation block grid and its statistics
+
+        :param correlation_grid: calculated correlations of all blocks
+        :param map_statistics: statistics accumulated while the grid was
+            calculated, they are accumulated from the grid if not given
+        """
+        self.correlation_grid = correlation_grid.astype(self.compute_dtype, copy=False)
+        self.map_statistics = map_statistics or MapStatistics.from_grid(self.correlation_grid)
+        self.worst_blocks_index = None
+        self.anomaly_grid = None
+        app_logger.debug("Correlation map statistics: mean %.4g, standard deviation %.4g, median %.4g, range %.4g-%.4g",
+                         self.map_statistics.mean, self.map_statistics.standard_deviation, self.map_statistics.median,
+                         self.map_statistics.minimum, self.map_statistics.maximum)
+
+    def get_anomaly_grid(self) -> ndarray:
+        """Return robust z-scores of the block correlations
+
+        Median and median absolute deviation are taken from the map
+        statistics accumulated while the grid was built, so z-scores are
+        calculated in a single pass over the grid on the first request.
+
+        :return: float64 anomaly grid with the correlation grid shape
+        """
+        if self.anomaly_grid is None:
+            app_logger.debug("Calculating robust z-scores of the correlation map blocks")
+            self.anomaly_grid = self.map_statistics.get_robust_z_scores(self.correlation_grid)
+        return self.anomaly_grid
+
+    def get_worst_blocks(self, count: Optional[int] = None) -> list[WorstBlock]:
+        """Return blocks with the worst correlations sorted from the worst one
+
+        Worst blocks index is built on the first request by the grid strips
+        and is rebuilt only if more blocks than its capacity are requested.
+        Not refined blocks of the hierarchical mode have approximate
+        correlations, so they are never the worst blocks.
+
+        :param count: amount of the worst blocks, configured amount if it's
+            not given
+        :return: worst blocks with their image coordinates and correlations
+        """
+        count = count or self.correlation_configuration.worst_blocks_count
+        if self.worst_blocks_index is None or self.worst_blocks_index.capacity < count:
+            app_logger.debug("Building index of the %s worst correlation blocks", count)
+            correlation_grid = self.correlation_grid if self.refined_mask is None \
+                else np.where(self.refined_mask, self.correlation_grid, np.nan)
+            self.worst_blocks_index = WorstBlocksIndex.from_grid(
+                correlation_grid, max(count, self.correlation_configuration.worst_blocks_count),
+                self.correlation_type.is_lower_better)
+        rows, columns, scores = self.worst_blocks_index.get_worst_blocks(count)
+        (pieces_height, pieces_width), (stride_height, stride_width) = self.pieces_amount, self.stride
+        return [WorstBlock(x_1=int(column) * stride_width, y_1=int(row) * stride_height,
+                           x_2=int(column) * stride_width + pieces_width, y_2=int(row) * stride_height + pieces_height,
+                           row=int(row), column=int(column), score=float(score))
+                for row, column, score in zip(rows, columns, scores)]
+
     def configure_figure_axes(self, axes: Axes) -> Axes:
         """Configure correlation map axes
 
@@ -121,13 +383,13 @@ class CorrelationMap(BaseFigure):
         """
         x_array, y_array, z_array, = self._get_correlation_map_arrays()
         axes.plot_trisurf(x_array, y_array, z_array, linewidth=0.1, antialiased=True, cmap="magma")
-        axes.set_title("Correlation map")
+        axes.set_title(self.figure_type.value.capitalize())
         return axes
 
     def show(self):
         """View current correlation map as 3d matplotlib window"""
         app_logger.debug("Showing correlation map in the new window")
-        if self.correlation_map is None:
+        if self.correlation_grid is None:
             app_logger.warning("Can not show correlation map, it's not created")
             return None
 
@@ -143,15 +405,31 @@ class CorrelationMap(BaseFigure):
         """
         logging.warning("Cannot save correlation map. Not implemented")
 
-    def _get_correlation_map_arrays(self) -> tuple[list[float], list[float], list[float]]:
+    def _get_correlation_map_arrays(self) -> tuple[ndarray, ndarray, ndarray]:
         """Return current correlation map arrays
 
+        Every block cell is plotted by its first and last full size map rows
+        and columns, so the surface has the same steps as the full size map
+        without expanding it.
+
         :return: tuple of x, y, z arrays
         """
-        x_array, y_array, z_array = [], [], []
-        for i, row in enumerate(self.correlation_map):
-            for j, _ in enumerate(row):
-                x_array.append(i)
-                y_array.append(j)
-                z_array.append(self.correlation_map[i, j])
-        return x_array, y_array, z_array
+        rows_coordinates, rows_indexes = self._get_cells_edges(self.correlation_grid.shape[0], self.stride[0])
+        columns_coordinates, columns_indexes = self._get_cells_edges(self.correlation_grid.shape[1], self.stride[1])
+        x_array, y_array = np.meshgrid(rows_coordinates, columns_coordinates, indexing="ij")
+        z_array = np.asarray(self.correlation_grid)[np.ix_(rows_indexes, columns_indexes)]
+        return x_array.ravel(), y_array.ravel(), z_array.ravel()
+
+    @staticmethod
+    def _get_cells_edges(blocks_amount: int, step: int) -> tuple[ndarray, ndarray]:
+        """Return full size map coordinates of the first and last cells lines and their blocks indexes
+
+        :param blocks_amount: amount of blocks along the axis
+        :param step: cell size along the axis
+        :return: coordinates of the cells edges and indexes of their blocks
+        """
+        cells_starts = np.arange(blocks_amount) * step
+        if step == 1:
+            return cells_starts, np.arange(blocks_amount)
+        return (np.column_stack((cells_starts, cells_starts + step - 1)).ravel(),
+                np.repeat(np.arange(blocks_amount), 2))
@@ -6,6 +6,7 @@ latest generated or loaded figures by figure types.
 from typing import Generator, Optional
 
 from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.correlation.block_sums_cache import BlockSumsCache
 from correlation_map.core.models.figures.base_figure import BaseFigure
 from correlation_map.core.tools.common import MetaSingleton
 from correlation_map.gui.tools.logger import app_logger
@@ -18,7 +19,13 @@ class FigureContainer(metaclass=MetaSingleton):
 
     @classmethod
     def add(cls, figure: BaseFigure):
-        """Add the given figure to the figure container"""
+        """Add the given figure to the figure container
+
+        Cached block sums are cleared when the source or destination image is
+        changed.
+        """
+        if figure.figure_type in (FigureType.SOURCE_IMAGE, FigureType.DESTINATION_IMAGE):
+            BlockSumsCache.clear()
         cls.__figures[figure.figure_type] = figure
         app_logger.debug("New figure with type `%s` registered in the figure container", figure.figure_type.value)
 
@@ -0,0 +1,66 @@
+"""Contains frame scores figure model"""
+import os
+
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.axes import Axes
+
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.correlation.frame_sequence_correlator import FrameSequenceCorrelation
+from correlation_map.core.models.figures.base_figure import BaseFigure
+from correlation_map.gui.tools.logger import app_logger
+
+
+class FrameScores(BaseFigure):
+    """Frame scores figure model
+
+    2d figure which shows summary scores of the correlated frames of the frame
+    source. Memory mapped correlation block grids of the frames are kept with
+    the scores, so their run directory lives as long as the figure.
+    """
+
+    def __init__(self, frame_sequence_correlation: FrameSequenceCorrelation):
+        """
+        :param frame_sequence_correlation: correlation grids and scores of the
+            correlated frames
+        """
+        self.frame_sequence_correlation = frame_sequence_correlation
+
+    @property
+    def figure_type(self) -> FigureType:
+        """Return frame scores figure type"""
+        return FigureType.FRAME_SCORES
+
+    @property
+    def frame_scores(self) -> np.ndarray:
+        """Return summary scores of the correlated frames"""
+        return self.frame_sequence_correlation.frame_scores
+
+    def configure_figure_axes(self, axes: Axes) -> Axes:
+        """Configure frame scores axes
+
+        :param axes: frame scores axes
+        :return: configured frame scores axes
+        """
+        axes.plot(np.arange(1, len(self.frame_scores) + 1), self.frame_scores, marker=".")
+        axes.set_xlabel("frame")
+        axes.set_ylabel("score")
+        axes.set_title(f"{self.figure_type.value.capitalize()}, "
+                       f"{self.frame_sequence_correlation.frames_per_second:.2f} frames per second")
+        return axes
+
+    def show(self):
+        """View frame scores as 2d matplotlib window"""
+        app_logger.debug("Showing frame scores in the new window")
+        axes = plt.axes()
+        self.configure_figure_axes(axes)
+        plt.show()
+
+    def save(self, path: str):
+        """Save frame scores in the specified directory path as csv file
+
+        :param path: path to the directory to save
+        """
+        scores_path = os.path.join(path, f"{self.figure_type.value.replace(' ', '_')}.csv")
+        np.savetxt(scores_path, self.frame_scores, delimiter=",")
+        app_logger.info("Frame scores saved in path %s", path)
@@ -1,8 +1,10 @@
 """Contains all available image types and image wrapper model"""
 import os
-from typing import Optional, Tuple
+from enum import Enum
+from typing import Final, Optional, Tuple
 
 import cv2
+import numpy as np
 from filetype import guess
 from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
@@ -10,12 +12,16 @@ from numpy import ndarray
 
 from correlation_map.core.config.figure_types import FigureType
 from correlation_map.core.models.figures.base_figure import BaseFigure
+from correlation_map.core.tools.common import get_array_digest
 from correlation_map.gui.tools.logger import app_logger
 
 
 class ImageWrapper(BaseFigure):
     """Figure implementation for the image"""
 
+    # Images are read as RGB images keeping their depth, so 16-bit images aren't reduced to 8-bit
+    READ_FLAGS: Final[int] = cv2.IMREAD_ANYDEPTH | cv2.IMREAD_COLOR
+
     def __init__(self, path: str = None, image_type: FigureType = None):
         """Checks the given image type and load image by the given path
 
@@ -26,20 +32,72 @@ class ImageWrapper(BaseFigure):
         self.path = path
         self.image_type = image_type
         self._image_format = guess(self.path).extension if self.path else "png"
-        self.image: Optional[ndarray] = cv2.cvtColor(cv2.imread(self.path), cv2.COLOR_BGR2RGB) if self.path else None
+        # Gray matrices of the image by the gray conversions and dtypes
+        self.gray_matrices: dict[tuple[Enum, np.dtype], ndarray] = {}
+        # Digest of the image matrix calculated on the first request
+        self._content_digest: Optional[str] = None
+        self._image: Optional[ndarray] = None
+        # Image is read from the path on the first request, so the unread image file can be read by strips instead
+        self.is_image_read = not self.path
+
+    @classmethod
+    def read_image(cls, path: str) -> ndarray:
+        """Read RGB image matrix from the file keeping its depth
+
+        :param path: path to the image file
+        :return: RGB image matrix
+        """
+        return cv2.cvtColor(cv2.imread(path, cls.READ_FLAGS), cv2.COLOR_BGR2RGB)
+
+    @property
+    def image(self) -> Optional[ndarray]:
+        """Return image matrix, read it from the path on the first request"""
+        if not self.is_image_read:
+            self._image = self.read_image(self.path)
+            self.is_image_read = True
+        return self._image
+
+    @image.setter
+    def image(self, image: Optional[ndarray]):
+        """Set image matrix and clear gray matrices and digest cached for the previous one"""
+        self._image = image
+        self.is_image_read = True
+        self.gray_matrices.clear()
+        self._content_digest = None
+
+    @property
+    def content_digest(self) -> str:
+        """Return digest of the image matrix content, shape and dtype"""
+        if self._content_digest is None:
+            self._content_digest = get_array_digest(self.image)
+        return self._content_digest
 
     @property
     def figure_type(self) -> FigureType:
         """Return image type"""
         return self.image_type
 
+    @property
+    def image_8bit(self) -> Optional[ndarray]:
+        """Return image matrix scaled to the 8-bit depth
+
+        8-bit image matrix is used to display the image and for algorithms
+        supporting only 8-bit images. Integer images are scaled by their
+        dtype range, float images by their values range.
+        """
+        if self.image is None or self.image.dtype == np.uint8:
+            return self.image
+        if np.issubdtype(self.image.dtype, np.integer):
+            return (self.image // (np.iinfo(self.image.dtype).max // 255)).astype(np.uint8)
+        return cv2.normalize(self.image, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+
     def show(self):
         """Show current image as matplotlib figure"""
         app_logger.debug("Showing image in the new window")
         if self.image is None:
             app_logger.warning("Can not show image with type %s, it's empty", self.image_type.value)
             return None
-        plt.imshow(self.image)
+        plt.imshow(self.image_8bit)
         plt.title(self.image_type.value.capitalize())
         plt.show()
         return None
@@ -51,7 +109,7 @@ class ImageWrapper(BaseFigure):
         - Add current image data arrays to the given axes
         - Set plot title
         """
-        axes.imshow(self.image)
+        axes.imshow(self.image_8bit)
         axes.set_title(self.image_type.value.capitalize())
         return axes
 
@@ -0,0 +1,16 @@
+"""Contains worst block model"""
+from dataclasses import dataclass
+
+from correlation_map.core.models.image_selected_region import ImageSelectedRegion
+
+
+@dataclass(frozen=True, kw_only=True)
+class WorstBlock(ImageSelectedRegion):
+    """Dataclass for the block of the correlation map with one of the worst correlations
+
+    Coordinates are the block bounds in the image pixels, row and column are
+    the block index in the correlation block grid.
+    """
+    row: int
+    column: int
+    score: float
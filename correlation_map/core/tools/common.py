@@ -1,4 +1,13 @@
 """Contains common classes for the whole package"""
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
 
 
 class MetaSingleton(type):
@@ -11,3 +20,39 @@ class MetaSingleton(type):
         if cls not in cls._instances:
             cls._instances[cls] = super(MetaSingleton, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
+
+
+def get_array_digest(array: ndarray) -> str:
+    """Return digest of the array content, shape and dtype
+
+    :param array: array to calculate digest of
+    :return: hexadecimal digest string
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.shape}{array.dtype.str}".encode())
+    digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+def create_run_directory(base_directory: Optional[str] = None) -> str:
+    """Create unique temporary directory of the single run
+
+    Every run writes its files into its own directory, so runs never
+    overwrite files of each other.
+
+    :param base_directory: directory to create the run directory in, it's
+        created if it doesn't exist, system temporary directory if not given
+    :return: path to the created directory
+    """
+    if base_directory:
+        os.makedirs(base_directory, exist_ok=True)
+    return tempfile.mkdtemp(prefix="correlation_map_", dir=base_directory or None)
+
+
+def remove_directory_with(owner: object, directory: str):
+    """Remove the directory when its owner is garbage collected or the interpreter exits
+
+    :param owner: object owning the directory files
+    :param directory: path to the directory to remove
+    """
+    weakref.finalize(owner, shutil.rmtree, directory, ignore_errors=True)
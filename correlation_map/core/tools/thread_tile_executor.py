@@ -0,0 +1,64 @@
+"""Thread tile executor
+
+Contains executor that splits large arrays into row bands and processes them
+in the thread pool. NumPy reductions and most OpenCV functions release the
+GIL, so bands are processed in parallel without process spawning costs.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Final
+
+
+def split_rows(rows: int, bands_count: int) -> list[tuple[int, int]]:
+    """Split the given amount of rows into bands with the almost equal sizes
+
+    :param rows: amount of rows to split
+    :param bands_count: maximal amount of bands
+    :return: list of first and last (excluded) rows of the bands
+    """
+    bands_count = max(min(rows, bands_count), 1)
+    band_size, bigger_bands_count = divmod(rows, bands_count)
+    bands: list[tuple[int, int]] = []
+    first_row = 0
+    for band_number in range(bands_count):
+        last_row = first_row + band_size + (1 if band_number < bigger_bands_count else 0)
+        if last_row > first_row:
+            bands.append((first_row, last_row))
+        first_row = last_row
+    return bands
+
+
+class ThreadTileExecutor:
+    """Executor to process row bands of the large arrays in the thread pool"""
+
+    BANDS_PER_THREAD: Final[int] = 4
+    LARGE_IMAGE_PIXELS: Final[int] = 2 ** 22
+
+    def __init__(self, threads_count: int = 1):
+        """
+        :param threads_count: amount of threads to process bands in
+        """
+        self.threads_count = max(threads_count, 1)
+
+    def is_worth_for(self, height: int, width: int) -> bool:
+        """Check if the image with the given shape is large enough to process it by bands in threads
+
+        :param height: image height
+        :param width: image width
+        :return: True if there is more than one thread and the image is large
+            else False
+        """
+        return self.threads_count > 1 and height * width >= self.LARGE_IMAGE_PIXELS
+
+    def map_row_bands(self, band_function: Callable[[int, int], Any], rows: int) -> list[Any]:
+        """Call the given function for every row band in the thread pool
+
+        :param band_function: function that takes first and last (excluded)
+            rows of the band
+        :param rows: amount of rows to split into bands
+        :return: band function results in the bands order
+        """
+        bands = split_rows(rows, self.threads_count * self.BANDS_PER_THREAD)
+        if self.threads_count == 1:
+            return [band_function(first_row, last_row) for first_row, last_row in bands]
+        with ThreadPoolExecutor(max_workers=self.threads_count) as executor:
+            return list(executor.map(lambda band: band_function(*band), bands))
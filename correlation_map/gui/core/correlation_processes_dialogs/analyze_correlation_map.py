@@ -18,9 +18,13 @@ class CorrelationMapAnalyzerDialog(QDialog):
         self.search_limit_sping_box = self.__configure_search_limit()
         self.action_button_box = self.__configure_action_buttons()
 
+    def get_similarity_limit(self) -> float:
+        """Return similarity limit of the defect blocks from the search limit percents"""
+        return self.search_limit_sping_box.value() / 100
+
     def __configure_main_attributes(self):
         """Configure dialog main attributes"""
-        self.setWindowTitle("Correlation building process")
+        self.setWindowTitle("Correlation map analysis")
 
     @log_configuration_process
     def __configure_main_layout(self) -> QVBoxLayout:
@@ -39,6 +43,11 @@ class CorrelationMapAnalyzerDialog(QDialog):
 
     @log_configuration_process
     def __configure_search_limit(self):
+        """Configure and return spin box of the similarity limit of the defect blocks in percents"""
+        search_limit_label_widget = QWidget()
+        search_limit_label = QLabel(search_limit_label_widget)
+        search_limit_label.setText("Search limit, % of similarity:")
+        self._main_layout.addWidget(search_limit_label)
         search_limit_spin_box = QSpinBox()
         search_limit_spin_box.setValue(80)
         search_limit_spin_box.setRange(0, 100)
@@ -1,11 +1,12 @@
 """Contains dialog wrapper to configure correlation map building"""
-from typing import Dict
+from typing import Dict, Optional
 
-from PyQt5.QtWidgets import QCheckBox, QDialog, QDialogButtonBox, QHBoxLayout, QLabel, QRadioButton, QSpinBox, \
-    QVBoxLayout, QWidget
+from PyQt5.QtWidgets import QButtonGroup, QCheckBox, QDialog, QDialogButtonBox, QFileDialog, QHBoxLayout, QLabel, \
+    QLineEdit, QPushButton, QRadioButton, QSpinBox, QVBoxLayout, QWidget
 
-from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationSettings, CorrelationTypes, \
-    PreprocessorActions
+from correlation_map.core.config.correlation import ColorCorrelationMaps, ComputePrecision, \
+    CorrelationConfiguration, CorrelationSettings, CorrelationTypes, EdgeBlocksModes, FrameReferenceMode, \
+    GrayConversionModes, PreprocessorActions
 from correlation_map.gui.tools.common import log_configuration_process
 from correlation_map.gui.tools.logger import app_logger
 
@@ -20,7 +21,15 @@ class CorrelationStartSettingsDialog(QDialog):
 
         self.preprocessor_checks_map = self.__configure_preprocessor_action_check_boxes()
         self.correlation_radio_buttons_map = self.__configure_correlation_type_radio_buttons()
+        self.additional_correlation_checks_map = self.__configure_additional_correlation_type_check_boxes()
+        self.color_correlation_checks_map = self.__configure_color_correlation_maps_check_boxes()
         self.correlation_settings_map = self.__configure_correlation_settings_spin_boxes()
+        self.edge_blocks_radio_buttons_map = self.__configure_edge_blocks_mode_radio_buttons()
+        self.compute_precision_radio_buttons_map = self.__configure_compute_precision_radio_buttons()
+        self.gray_conversion_radio_buttons_map = self.__configure_gray_conversion_radio_buttons()
+        self.gray_dtype_radio_buttons_map = self.__configure_gray_dtype_radio_buttons()
+        self.frame_source_line_edit = self.__configure_frame_source_line_edit()
+        self.frame_reference_radio_buttons_map = self.__configure_frame_reference_mode_radio_buttons()
         self.action_buttons = self.__configure_action_buttons()
 
     def update_correlation_configuration(self, correlation_configuration: CorrelationConfiguration) \
@@ -37,13 +46,43 @@ class CorrelationStartSettingsDialog(QDialog):
         correlation_configuration.auto_find = auto_find_check_box.isChecked()
         chose_important_part = self.preprocessor_checks_map[PreprocessorActions.CHOSE_IMPORTANT_PART]
         correlation_configuration.chose_important_part = chose_important_part.isChecked()
+        phase_registration_check_box = self.preprocessor_checks_map[PreprocessorActions.PHASE_REGISTRATION]
+        correlation_configuration.phase_registration = phase_registration_check_box.isChecked()
         # Updating correlation type
         correlation_configuration.correlation_type = self.get_checked_correlation_type()
+        correlation_configuration.additional_correlation_types = [
+            correlation_type for correlation_type, check_box in self.additional_correlation_checks_map.items()
+            if check_box.isChecked()]
+        channel_maps_check_box = self.color_correlation_checks_map[ColorCorrelationMaps.CHANNEL_MAPS]
+        correlation_configuration.channel_maps = channel_maps_check_box.isChecked()
+        combined_channels_map_check_box = self.color_correlation_checks_map[ColorCorrelationMaps.COMBINED_CHANNELS_MAP]
+        correlation_configuration.combined_channels_map = combined_channels_map_check_box.isChecked()
         # Updating correlation settings
         detection_match_count_widget = self.correlation_settings_map[CorrelationSettings.DETECTION_MATCH_COUNT]
         correlation_configuration.detection_match_count = detection_match_count_widget.value()
         correlation_pieces_count_widget = self.correlation_settings_map[CorrelationSettings.CORRELATION_PIECES_COUNT]
         correlation_configuration.correlation_pieces_count = correlation_pieces_count_widget.value()
+        correlation_pieces_width_widget = self.correlation_settings_map[CorrelationSettings.CORRELATION_PIECES_WIDTH]
+        correlation_configuration.correlation_pieces_width = correlation_pieces_width_widget.value()
+        correlation_pieces_stride_widget = self.correlation_settings_map[CorrelationSettings.CORRELATION_PIECES_STRIDE]
+        correlation_configuration.correlation_pieces_stride = correlation_pieces_stride_widget.value()
+        processes_count_widget = self.correlation_settings_map[CorrelationSettings.CORRELATION_PROCESSES_COUNT]
+        correlation_configuration.correlation_processes_count = processes_count_widget.value()
+        threads_count_widget = self.correlation_settings_map[CorrelationSettings.CORRELATION_THREADS_COUNT]
+        correlation_configuration.correlation_threads_count = threads_count_widget.value()
+        streaming_block_rows_widget = self.correlation_settings_map[CorrelationSettings.STREAMING_BLOCK_ROWS]
+        correlation_configuration.streaming_block_rows = streaming_block_rows_widget.value()
+        block_sums_cache_base_widget = self.correlation_settings_map[CorrelationSettings.BLOCK_SUMS_CACHE_BASE]
+        correlation_configuration.block_sums_cache_base = block_sums_cache_base_widget.value()
+        correlation_configuration.edge_blocks_mode = self.get_checked_edge_blocks_mode()
+        # Updating precision and gray conversion of the compared images
+        correlation_configuration.compute_precision = self.get_checked_compute_precision()
+        correlation_configuration.gray_conversion = self.get_checked_gray_conversion()
+        gray_precision = self.get_checked_gray_precision()
+        correlation_configuration.gray_dtype = gray_precision.dtype if gray_precision is not None else None
+        # Updating frame source configuration
+        correlation_configuration.frame_source_path = self.frame_source_line_edit.text().strip() or None
+        correlation_configuration.frame_reference_mode = self.get_checked_frame_reference_mode()
         return correlation_configuration
 
     def get_checked_correlation_type(self) -> CorrelationTypes:
@@ -57,6 +96,64 @@ class CorrelationStartSettingsDialog(QDialog):
         app_logger.warning("Impossible design error. Checked correlation type not found. Using default one")
         return next(correlation for correlation in CorrelationTypes if correlation.is_default)
 
+    def get_checked_edge_blocks_mode(self) -> EdgeBlocksModes:
+        """Get checked edge blocks mode from the edge blocks mode radio buttons
+
+        :return: checked edge blocks mode
+        """
+        for edge_blocks_mode, radio_button in self.edge_blocks_radio_buttons_map.items():
+            if radio_button.isChecked():
+                return edge_blocks_mode
+        return EdgeBlocksModes.DROP
+
+    def get_checked_compute_precision(self) -> ComputePrecision:
+        """Get checked compute precision from the compute precision radio buttons
+
+        :return: checked compute precision
+        """
+        for compute_precision, radio_button in self.compute_precision_radio_buttons_map.items():
+            if radio_button.isChecked():
+                return compute_precision
+        return ComputePrecision.FLOAT64
+
+    def get_checked_gray_conversion(self) -> GrayConversionModes:
+        """Get checked gray conversion from the gray conversion radio buttons
+
+        :return: checked gray conversion mode
+        """
+        for gray_conversion, radio_button in self.gray_conversion_radio_buttons_map.items():
+            if radio_button.isChecked():
+                return gray_conversion
+        return GrayConversionModes.MEAN
+
+    def get_checked_gray_precision(self) -> Optional[ComputePrecision]:
+        """Get checked precision of the gray matrices from the gray dtype radio buttons
+
+        :return: checked precision of the gray matrices, None to keep the
+            image dtype
+        """
+        for gray_precision, radio_button in self.gray_dtype_radio_buttons_map.items():
+            if radio_button.isChecked():
+                return gray_precision
+        return None
+
+    def get_checked_frame_reference_mode(self) -> FrameReferenceMode:
+        """Get checked frame reference mode from the frame reference mode radio buttons
+
+        :return: checked frame reference mode
+        """
+        for frame_reference_mode, radio_button in self.frame_reference_radio_buttons_map.items():
+            if radio_button.isChecked():
+                return frame_reference_mode
+        return FrameReferenceMode.PREVIOUS_FRAME
+
+    def choose_frame_source(self):
+        """Choose video file or image of the numbered images sequence to correlate frames of"""
+        frame_source_path, _ = QFileDialog.getOpenFileName(self, "Choose frame source")
+        if frame_source_path:
+            app_logger.debug("User chosen frame source %s", frame_source_path)
+            self.frame_source_line_edit.setText(frame_source_path)
+
     def __configure_main_attributes(self):
         """Configure dialog main attributes"""
         self.setWindowTitle("Correlation build settings")
@@ -81,7 +178,8 @@ class CorrelationStartSettingsDialog(QDialog):
         preprocessor_checks_map: dict[PreprocessorActions, QCheckBox] = {}
         for action in PreprocessorActions:
             check_box = QCheckBox(action.value.capitalize())
-            check_box.setChecked(True)
+            # Phase correlation registration replaces auto rotation and finding, so it's off by default
+            check_box.setChecked(action != PreprocessorActions.PHASE_REGISTRATION)
             self._main_layout.addWidget(check_box)
             preprocessor_checks_map[action] = check_box
         return preprocessor_checks_map
@@ -105,6 +203,40 @@ class CorrelationStartSettingsDialog(QDialog):
             correlation_radio_buttons_map[correlation_type] = radio_button
         return correlation_radio_buttons_map
 
+    @log_configuration_process
+    def __configure_additional_correlation_type_check_boxes(self) -> Dict[CorrelationTypes, QCheckBox]:
+        """Configure check boxes of the correlation types to build additional maps with
+
+        :return: map of correlation type name and check box widget items
+        """
+        additional_correlation_types_label_widget = QWidget()
+        additional_correlation_types_label = QLabel(additional_correlation_types_label_widget)
+        additional_correlation_types_label.setText("Additional correlation maps:")
+        self._main_layout.addWidget(additional_correlation_types_label)
+        additional_correlation_checks_map: dict[CorrelationTypes, QCheckBox] = {}
+        for correlation_type in CorrelationTypes:
+            check_box = QCheckBox(correlation_type.correlation_type.replace("_", " ").capitalize())
+            self._main_layout.addWidget(check_box)
+            additional_correlation_checks_map[correlation_type] = check_box
+        return additional_correlation_checks_map
+
+    @log_configuration_process
+    def __configure_color_correlation_maps_check_boxes(self) -> Dict[ColorCorrelationMaps, QCheckBox]:
+        """Configure check boxes of the colour channels correlation maps
+
+        :return: map of colour correlation maps name and check box widget items
+        """
+        color_correlation_maps_label_widget = QWidget()
+        color_correlation_maps_label = QLabel(color_correlation_maps_label_widget)
+        color_correlation_maps_label.setText("Color correlation maps:")
+        self._main_layout.addWidget(color_correlation_maps_label)
+        color_correlation_checks_map: dict[ColorCorrelationMaps, QCheckBox] = {}
+        for color_correlation_maps in ColorCorrelationMaps:
+            check_box = QCheckBox(color_correlation_maps.value.capitalize())
+            self._main_layout.addWidget(check_box)
+            color_correlation_checks_map[color_correlation_maps] = check_box
+        return color_correlation_checks_map
+
     @log_configuration_process
     def __configure_correlation_settings_spin_boxes(self) -> dict[CorrelationSettings, QSpinBox]:
         """Configure correlation settings spin boxes
@@ -129,6 +261,135 @@ class CorrelationStartSettingsDialog(QDialog):
             self._main_layout.addLayout(horizontal_layout)
         return correlation_settings_widgets_map
 
+    @log_configuration_process
+    def __configure_edge_blocks_mode_radio_buttons(self) -> Dict[EdgeBlocksModes, QRadioButton]:
+        """Configure edge blocks mode radio buttons
+
+        Radio buttons are grouped apart from the correlation type ones.
+
+        :return: map of edge blocks mode and radio button widget items
+        """
+        edge_blocks_label_widget = QWidget()
+        edge_blocks_label = QLabel(edge_blocks_label_widget)
+        edge_blocks_label.setText("Edge blocks:")
+        self._main_layout.addWidget(edge_blocks_label)
+        edge_blocks_button_group = QButtonGroup(self)
+        edge_blocks_radio_buttons_map: dict[EdgeBlocksModes, QRadioButton] = {}
+        for edge_blocks_mode in EdgeBlocksModes:
+            radio_button = QRadioButton(edge_blocks_mode.value.capitalize())
+            radio_button.setChecked(edge_blocks_mode == EdgeBlocksModes.DROP)
+            edge_blocks_button_group.addButton(radio_button)
+            self._main_layout.addWidget(radio_button)
+            edge_blocks_radio_buttons_map[edge_blocks_mode] = radio_button
+        return edge_blocks_radio_buttons_map
+
+    @log_configuration_process
+    def __configure_compute_precision_radio_buttons(self) -> Dict[ComputePrecision, QRadioButton]:
+        """Configure compute precision radio buttons
+
+        :return: map of compute precision and radio button widget items
+        """
+        compute_precision_label_widget = QWidget()
+        compute_precision_label = QLabel(compute_precision_label_widget)
+        compute_precision_label.setText("Compute precision:")
+        self._main_layout.addWidget(compute_precision_label)
+        compute_precision_button_group = QButtonGroup(self)
+        compute_precision_radio_buttons_map: dict[ComputePrecision, QRadioButton] = {}
+        for compute_precision in ComputePrecision:
+            radio_button = QRadioButton(compute_precision.value.capitalize())
+            radio_button.setChecked(compute_precision == ComputePrecision.FLOAT64)
+            compute_precision_button_group.addButton(radio_button)
+            self._main_layout.addWidget(radio_button)
+            compute_precision_radio_buttons_map[compute_precision] = radio_button
+        return compute_precision_radio_buttons_map
+
+    @log_configuration_process
+    def __configure_gray_conversion_radio_buttons(self) -> Dict[GrayConversionModes, QRadioButton]:
+        """Configure gray conversion radio buttons
+
+        :return: map of gray conversion mode and radio button widget items
+        """
+        gray_conversion_label_widget = QWidget()
+        gray_conversion_label = QLabel(gray_conversion_label_widget)
+        gray_conversion_label.setText("Gray conversion:")
+        self._main_layout.addWidget(gray_conversion_label)
+        gray_conversion_button_group = QButtonGroup(self)
+        gray_conversion_radio_buttons_map: dict[GrayConversionModes, QRadioButton] = {}
+        for gray_conversion in GrayConversionModes:
+            radio_button = QRadioButton(gray_conversion.conversion.capitalize())
+            radio_button.setChecked(gray_conversion == GrayConversionModes.MEAN)
+            gray_conversion_button_group.addButton(radio_button)
+            self._main_layout.addWidget(radio_button)
+            gray_conversion_radio_buttons_map[gray_conversion] = radio_button
+        return gray_conversion_radio_buttons_map
+
+    @log_configuration_process
+    def __configure_gray_dtype_radio_buttons(self) -> Dict[Optional[ComputePrecision], QRadioButton]:
+        """Configure gray matrices dtype radio buttons
+
+        Gray matrices keep the image dtype unless one of the floating point
+        precisions is checked.
+
+        :return: map of gray matrices precision and radio button widget items
+        """
+        gray_dtype_label_widget = QWidget()
+        gray_dtype_label = QLabel(gray_dtype_label_widget)
+        gray_dtype_label.setText("Gray matrices dtype:")
+        self._main_layout.addWidget(gray_dtype_label)
+        gray_dtype_button_group = QButtonGroup(self)
+        gray_dtype_radio_buttons_map: dict[Optional[ComputePrecision], QRadioButton] = {}
+        for gray_precision in (None, *ComputePrecision):
+            radio_button = QRadioButton(gray_precision.value.capitalize() if gray_precision else "Image dtype")
+            radio_button.setChecked(gray_precision is None)
+            gray_dtype_button_group.addButton(radio_button)
+            self._main_layout.addWidget(radio_button)
+            gray_dtype_radio_buttons_map[gray_precision] = radio_button
+        return gray_dtype_radio_buttons_map
+
+    @log_configuration_process
+    def __configure_frame_source_line_edit(self) -> QLineEdit:
+        """Configure frame source path line edit with the button to choose it
+
+        Frames of the frame source are correlated instead of the destination
+        image if the path is set.
+
+        :return: frame source path line edit
+        """
+        frame_source_label_widget = QWidget()
+        frame_source_label = QLabel(frame_source_label_widget)
+        frame_source_label.setText("Frame source (video file or numbered images pattern):")
+        self._main_layout.addWidget(frame_source_label)
+        horizontal_layout = QHBoxLayout()
+        frame_source_line_edit = QLineEdit()
+        horizontal_layout.addWidget(frame_source_line_edit)
+        choose_button = QPushButton("Choose")
+        choose_button.clicked.connect(self.choose_frame_source)
+        horizontal_layout.addWidget(choose_button)
+        self._main_layout.addLayout(horizontal_layout)
+        return frame_source_line_edit
+
+    @log_configuration_process
+    def __configure_frame_reference_mode_radio_buttons(self) -> Dict[FrameReferenceMode, QRadioButton]:
+        """Configure frame reference mode radio buttons
+
+        Source image is the fixed reference of the frames.
+
+        :return: map of frame reference mode and radio button widget items
+        """
+        frame_reference_label_widget = QWidget()
+        frame_reference_label = QLabel(frame_reference_label_widget)
+        frame_reference_label.setText("Frame reference:")
+        self._main_layout.addWidget(frame_reference_label)
+        frame_reference_button_group = QButtonGroup(self)
+        frame_reference_radio_buttons_map: dict[FrameReferenceMode, QRadioButton] = {}
+        for frame_reference_mode in FrameReferenceMode:
+            radio_button = QRadioButton(frame_reference_mode.value.capitalize())
+            radio_button.setChecked(frame_reference_mode == FrameReferenceMode.PREVIOUS_FRAME)
+            frame_reference_button_group.addButton(radio_button)
+            self._main_layout.addWidget(radio_button)
+            frame_reference_radio_buttons_map[frame_reference_mode] = radio_button
+        return frame_reference_radio_buttons_map
+
     @log_configuration_process
     def __configure_action_buttons(self) -> QDialogButtonBox:
         """Configure and return dialog action buttons"""
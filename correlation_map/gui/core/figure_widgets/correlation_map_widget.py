@@ -1,9 +1,15 @@
 """Module contains widget for correlation map 3d plot"""
+from typing import Final
+
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
+from PyQt5.QtWidgets import QLabel, QListWidget, QListWidgetItem, QWidget
 
 from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.worst_block import WorstBlock
 from correlation_map.gui.core.figure_widgets.base_figure_widget import BaseFigureWidget
+from correlation_map.gui.tools.common import log_configuration_process
+from correlation_map.gui.tools.logger import app_logger
 
 
 class Mpl3dCanvas(FigureCanvasQTAgg):
@@ -16,13 +22,57 @@ class Mpl3dCanvas(FigureCanvasQTAgg):
 
 
 class CorrelationMapWidget(BaseFigureWidget):
-    """Image widget wrapper for displaying an image as plot and plot tools"""
+    """Image widget wrapper for displaying an image as plot and plot tools
+
+    Worst correlation blocks are listed under the plot, click on the block
+    zooms the plot to it.
+    """
+
+    # Amount of the map cells around the chosen worst block shown after the jump to it
+    JUMP_CELLS_MARGIN: Final[int] = 10
 
     def __init__(self, correlation_map: CorrelationMap):
         """
         :param correlation_map: correlation map to attach to the widget
         """
         super().__init__(correlation_map)
+        self.worst_blocks = correlation_map.get_worst_blocks()
+        self.worst_blocks_list = self.__configure_worst_blocks_list()
+        self.worst_block_marker = None
+
+    def jump_to_worst_block(self, list_item: QListWidgetItem):
+        """Zoom the correlation map plot to the clicked worst block and mark it
+
+        :param list_item: clicked item of the worst blocks list
+        """
+        worst_block: WorstBlock = self.worst_blocks[self.worst_blocks_list.row(list_item)]
+        app_logger.debug("Jumping to the worst block in the %s row and %s column", worst_block.row, worst_block.column)
+        stride_height, stride_width = self.figure.stride
+        row_coordinate, column_coordinate = worst_block.y_1, worst_block.x_1
+        self.canvas.axes.set_xlim(row_coordinate - self.JUMP_CELLS_MARGIN * stride_height,
+                                  row_coordinate + (self.JUMP_CELLS_MARGIN + 1) * stride_height)
+        self.canvas.axes.set_ylim(column_coordinate - self.JUMP_CELLS_MARGIN * stride_width,
+                                  column_coordinate + (self.JUMP_CELLS_MARGIN + 1) * stride_width)
+        if self.worst_block_marker is not None:
+            self.worst_block_marker.remove()
+        self.worst_block_marker = self.canvas.axes.scatter(
+            [row_coordinate], [column_coordinate], [worst_block.score], color="cyan", s=40, depthshade=False)
+        self.canvas.draw_idle()
 
     def _get_canvas(self) -> FigureCanvasQTAgg:
         return Mpl3dCanvas(width=5, height=4, dpi=100)
+
+    @log_configuration_process
+    def __configure_worst_blocks_list(self) -> QListWidget:
+        """Configure and return list of the worst correlation blocks"""
+        worst_blocks_label_widget = QWidget()
+        worst_blocks_label = QLabel(worst_blocks_label_widget)
+        worst_blocks_label.setText(f"{len(self.worst_blocks)} worst blocks:")
+        self.main_layout.addWidget(worst_blocks_label)
+        worst_blocks_list = QListWidget()
+        for worst_block in self.worst_blocks:
+            worst_blocks_list.addItem(f"{worst_block.score:.4g} at x {worst_block.x_1}-{worst_block.x_2}, "
+                                      f"y {worst_block.y_1}-{worst_block.y_2}")
+        worst_blocks_list.itemClicked.connect(self.jump_to_worst_block)
+        self.main_layout.addWidget(worst_blocks_list)
+        return worst_blocks_list
@@ -0,0 +1,20 @@
+"""Contains frame scores widget class"""
+
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+
+from correlation_map.core.models.figures.frame_scores import FrameScores
+from correlation_map.gui.core.figure_widgets.base_figure_widget import BaseFigureWidget
+from correlation_map.gui.core.figure_widgets.image_widget import MplCanvas
+
+
+class FrameScoresWidget(BaseFigureWidget):
+    """Frame scores widget wrapper for displaying scores of the correlated frames as plot and plot tools"""
+
+    def __init__(self, frame_scores: FrameScores):
+        """
+        :param frame_scores: frame scores to attach to widget
+        """
+        super().__init__(frame_scores)
+
+    def _get_canvas(self) -> FigureCanvasQTAgg:
+        return MplCanvas(width=5, height=4, dpi=100)
@@ -73,7 +73,7 @@ class ImageWithSelectorWidget(ImageWidget):
     def _set_image(self):
         """Set and display current image as plot. Add rectangle selector."""
         app_logger.debug("Setting image in the image widget with selector")
-        self.canvas.axes.imshow(self.figure.image)
+        self.canvas.axes.imshow(self.figure.image_8bit)
         rectangle_selector_event = RectangleSelector(self.canvas.axes, self._on_select, drawtype='box', button=[1, 3])
         plt.connect('key_press_event', rectangle_selector_event)
         self.main_layout.addWidget(self.canvas)
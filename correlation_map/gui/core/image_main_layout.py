@@ -8,10 +8,12 @@ from PyQt5.QtWidgets import QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QWidg
 from correlation_map.core.config.figure_types import FigureType
 from correlation_map.core.models.figures.base_figure import BaseFigure
 from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.frame_scores import FrameScores
 from correlation_map.core.models.figures.image import ImageWrapper
 from correlation_map.core.models.figures.figure_container import FigureContainer
 from correlation_map.gui.core.figure_widgets.base_figure_widget import BaseFigureWidget
 from correlation_map.gui.core.figure_widgets.correlation_map_widget import CorrelationMapWidget
+from correlation_map.gui.core.figure_widgets.frame_scores_widget import FrameScoresWidget
 from correlation_map.gui.core.figure_widgets.image_widget import ImageWidget
 from correlation_map.gui.core.image_chooser import ImageChooserComboBox
 from correlation_map.gui.tools.logger import app_logger
@@ -19,6 +21,7 @@ from correlation_map.gui.tools.logger import app_logger
 FIGURE_AND_WIDGET_MAP: Mapping[Type[BaseFigure], Type[BaseFigureWidget]] = {
     ImageWrapper: ImageWidget,
     CorrelationMap: CorrelationMapWidget,
+    FrameScores: FrameScoresWidget,
 }
 
 
@@ -6,7 +6,10 @@ from PyQt5.QtWidgets import QAction, QMessageBox, QToolBar
 from correlation_map.core.config.correlation import CorrelationConfiguration
 from correlation_map.core.config.figure_types import FigureType
 from correlation_map.core.config.variables import ProjectFileMapping
+from correlation_map.core.correlation.correlation_map_analyzer import CorrelationMapAnalyzer
+from correlation_map.core.images.image_builder import ImageBuilder
 from correlation_map.core.models.figures.figure_container import FigureContainer
+from correlation_map.gui.core.correlation_processes_dialogs.analyze_correlation_map import CorrelationMapAnalyzerDialog
 from correlation_map.gui.core.correlation_processes_dialogs.correlation_building_dialog import CorrelationBuildingDialog
 from correlation_map.gui.core.correlation_processes_dialogs.correlation_start_settings_dialog import \
     CorrelationStartSettingsDialog
@@ -29,7 +32,7 @@ class ExecutionToolBar(QToolBar):
         # TODO: Uncomment them when they function will be implemented
         # self.stop_action = self.__set_stop_action()
         # self.terminate_action = self.__set_terminate_action()
-        # self.analyze_action = self.__set_analyze_action()
+        self.analyze_action = self.__set_analyze_action()
 
     def check_for_loaded_source_and_destination_images(self) -> bool:
         """Check if user loaded source and destination images
@@ -110,10 +113,43 @@ class ExecutionToolBar(QToolBar):
         """
         self.__active_image_layouts.remove(image_layout)
 
-    # def analyze_correlation_map(self):
-    #     """Analyze correlation map and build relative images"""
-    #     correlation_map_analysis_settings = CorrelationMapAnalyzerDialog()
-    #     correlation_map_analysis_settings.exec()
+    def analyze_correlation_map(self):
+        """Analyze correlation map and build relative images
+
+        1) Allow user to select the search limit
+        2) Find defect regions of the latest correlation map
+        3) Mark defect regions in the image the map was built with
+        """
+        app_logger.info("User analyzing correlation map")
+        if not FigureContainer.is_contain_specific_image(FigureType.CORRELATION_MAP):
+            app_logger.info("User didn't build correlation map to analyze")
+            QMessageBox.information(
+                self,
+                "No correlation map",
+                "Correlation map is not built. Please build correlation map to analyze it",
+                buttons=QMessageBox.Ok,
+                defaultButton=QMessageBox.Ok,
+            )
+            return None
+        correlation_map_analysis_settings = CorrelationMapAnalyzerDialog()
+        if not correlation_map_analysis_settings.exec():
+            app_logger.info("User canceled correlation map analysis dialog")
+            return None
+        correlation_map = FigureContainer.get(FigureType.CORRELATION_MAP)
+        defect_regions = CorrelationMapAnalyzer.find_defect_regions(
+            correlation_map, correlation_map_analysis_settings.get_similarity_limit())
+        FigureContainer.add(ImageBuilder.mark_defect_regions(correlation_map.destination_image, defect_regions))
+        for image_layout in self.__active_image_layouts:
+            image_layout.image_chooser.update_items()
+        QMessageBox.information(
+            self,
+            "Correlation map analyzed",
+            f"Found {len(defect_regions)} defect regions. They are marked in the "
+            f"`{FigureType.DEFECT_REGIONS_IMAGE.value}` figure",
+            buttons=QMessageBox.Ok,
+            defaultButton=QMessageBox.Ok,
+        )
+        return None
 
     def __set_add_image_window_action(self):
         """Configure and return run correlation process action"""
@@ -153,7 +189,7 @@ class ExecutionToolBar(QToolBar):
         return terminate_action
 
     def __set_analyze_action(self):
-        """Configure and return terminate correlation process action"""
+        """Configure and return analyze correlation map action"""
         analyze_action = QAction(self)
         analyze_action.setText("&Analyze")
         analyze_icon = QIcon(ProjectPathFactory.get_static_file_path(ProjectFileMapping.ANALYZE_ICON_FILE_NAME))
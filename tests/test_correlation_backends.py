@@ -0,0 +1,42 @@
+"""Tests of the correlation backends conformance"""
+import os
+
+import numpy as np
+import pytest
+
+from correlation_map.core.config.correlation import CorrelationBackends, CorrelationTypes, EdgeBlocksModes
+from correlation_map.core.correlation.block_statistics import BlockStatistics
+from correlation_map.core.correlation.correlation_backends import CorrelationBackendsRegistry
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.models.figures.image import ImageWrapper
+
+SAMPLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples", "space")
+SOURCE_PATH = os.path.join(SAMPLES_DIRECTORY, "2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg")
+DESTINATION_PATH = os.path.join(SAMPLES_DIRECTORY, "2021-04-13T04-20-49_NGC_6188_Halpha_T-20_600s_cal_500.jpg")
+PIECES_AMOUNTS_AND_STRIDES = ((2, 2), (8, 8), (8, 2), (32, 4))
+TOLERANCES = {np.dtype(np.int64): 1e-12, np.dtype(np.float64): 1e-12, np.dtype(np.float32): 1e-5}
+
+
+@pytest.fixture(scope="module", name="gray_matrices")
+def fixture_gray_matrices() -> tuple[np.ndarray, np.ndarray]:
+    """Return gray matrices of the space samples"""
+    return (ImageBuilder.get_gray_matrix(ImageWrapper(SOURCE_PATH).image),
+            ImageBuilder.get_gray_matrix(ImageWrapper(DESTINATION_PATH).image))
+
+
+@pytest.mark.parametrize("edge_mode", [EdgeBlocksModes.DROP, EdgeBlocksModes.REDUCED])
+@pytest.mark.parametrize("pieces_amount, stride", PIECES_AMOUNTS_AND_STRIDES)
+@pytest.mark.parametrize("backend", list(CorrelationBackends))
+def test_backend_conforms_to_numpy_backend(gray_matrices, backend, pieces_amount, stride, edge_mode):
+    """Check that correlations of every backend equal the NumPy backend ones within the sums dtype tolerance"""
+    if backend == CorrelationBackends.NUMBA:
+        pytest.importorskip("numba")
+    assert backend in CorrelationBackendsRegistry.get_available_backends()
+    source_matrix, destination_matrix = gray_matrices
+    integer_statistics = BlockStatistics.from_image_matrices(
+        source_matrix, destination_matrix, pieces_amount, stride, edge_mode=edge_mode)
+    for block_statistics in (integer_statistics, integer_statistics.astype(np.float32)):
+        differences = CorrelationBackendsRegistry.get_conformance_differences(block_statistics)
+        tolerance = TOLERANCES[block_statistics.cross_sum.dtype]
+        for correlation_type in CorrelationTypes:
+            assert differences[backend, correlation_type] <= tolerance, correlation_type
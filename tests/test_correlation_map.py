@@ -0,0 +1,65 @@
+"""Tests of the correlation map"""
+import cv2
+import numpy as np
+import pytest
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes, EdgeBlocksModes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.image import ImageWrapper
+
+
+def create_images(source_shape: tuple[int, int], destination_shape: tuple[int, int]) -> tuple[
+        ImageWrapper, ImageWrapper]:
+    """Create random RGB source and destination images with the given shapes"""
+    random_generator = np.random.default_rng(0)
+    return (ImageWrapper.create_image(random_generator.integers(0, 256, (*source_shape, 3), dtype=np.uint8),
+                                      FigureType.SOURCE_IMAGE),
+            ImageWrapper.create_image(random_generator.integers(0, 256, (*destination_shape, 3), dtype=np.uint8),
+                                      FigureType.DESTINATION_IMAGE))
+
+
+def crop_image(image: ImageWrapper, height: int, width: int) -> ImageWrapper:
+    """Return the top left part of the image with the given shape"""
+    return ImageWrapper.create_image(image.image[:height, :width].copy(), image.figure_type)
+
+
+@pytest.mark.parametrize("edge_mode", list(EdgeBlocksModes))
+@pytest.mark.parametrize("correlation_type", [CorrelationTypes.TM_CCOEFF, CorrelationTypes.TM_SQDIFF_NORMED])
+def test_images_of_different_shapes_are_compared_by_their_common_part(edge_mode, correlation_type):
+    """Check that maps of the images with different shapes equal maps of their common parts"""
+    source_image, destination_image = create_images((37, 41), (35, 44))
+    configuration = CorrelationConfiguration(
+        correlation_pieces_count=4, edge_blocks_mode=edge_mode, channel_maps=True, combined_channels_map=True)
+
+    correlation_map = CorrelationMap(source_image, destination_image, correlation_type, configuration)
+    correlation_map.build_correlation_map()
+
+    expected_map = CorrelationMap(
+        crop_image(source_image, 35, 41), crop_image(destination_image, 35, 41), correlation_type, configuration)
+    expected_map.build_correlation_map()
+    np.testing.assert_allclose(correlation_map.correlation_grid, expected_map.correlation_grid)
+    for channel_map, expected_channel_map in zip(correlation_map.build_channel_correlation_maps(),
+                                                 expected_map.build_channel_correlation_maps()):
+        np.testing.assert_allclose(channel_map.correlation_grid, expected_channel_map.correlation_grid)
+
+
+def test_related_map_keeps_refined_blocks_of_hierarchical_map():
+    """Check that the not refined blocks of the related map are never the worst blocks like in the primary map"""
+    random_generator = np.random.default_rng(0)
+    source_matrix = cv2.GaussianBlur(random_generator.integers(0, 256, (256, 256, 3), dtype=np.uint8), (0, 0), 3)
+    destination_matrix = source_matrix.copy()
+    destination_matrix[100:130, 60:90] = random_generator.integers(0, 256, (30, 30, 3), dtype=np.uint8)
+    configuration = CorrelationConfiguration(correlation_pieces_count=8, refinement_threshold=1e-4)
+    correlation_map = CorrelationMap(
+        ImageWrapper.create_image(source_matrix, FigureType.SOURCE_IMAGE),
+        ImageWrapper.create_image(destination_matrix, FigureType.DESTINATION_IMAGE),
+        CorrelationTypes.TM_SQDIFF_NORMED, configuration).build_correlation_map()
+
+    related_map = correlation_map.build_related_correlation_map(CorrelationTypes.TM_CCOEFF_NORMED)
+
+    assert 0 < related_map.refined_fraction < 1
+    np.testing.assert_array_equal(related_map.refined_mask, correlation_map.refined_mask)
+    worst_blocks = related_map.get_worst_blocks(int(related_map.refined_mask.sum()) + 10)
+    assert len(worst_blocks) == related_map.refined_mask.sum()
+    assert all(related_map.refined_mask[worst_block.row, worst_block.column] for worst_block in worst_blocks)
@@ -0,0 +1,61 @@
+"""Tests of the frame sequence correlation"""
+import gc
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes, FrameReferenceMode
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.correlation.correlation_map_pipeline_builder import CorrelationMapPipelineBuilder
+from correlation_map.core.correlation.frame_sequence_correlator import FrameSequenceCorrelator
+from correlation_map.core.models.figures.figure_container import FigureContainer
+from correlation_map.core.models.figures.image import ImageWrapper
+
+FRAMES_COUNT = 4
+
+
+@pytest.fixture(name="frames")
+def fixture_frames(tmp_path) -> list[np.ndarray]:
+    """Write noisy copies of the random RGB frame as the numbered images sequence"""
+    random_generator = np.random.default_rng(0)
+    frame = random_generator.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    frames = [np.clip(frame + random_generator.normal(0, 10 * index, frame.shape), 0, 255).astype(np.uint8)
+              for index in range(FRAMES_COUNT)]
+    for index, noisy_frame in enumerate(frames):
+        cv2.imwrite(os.path.join(tmp_path, f"frame_{index:04d}.png"), cv2.cvtColor(noisy_frame, cv2.COLOR_RGB2BGR))
+    return frames
+
+
+def test_correlate_file_removes_run_directory_with_grids(tmp_path, frames):
+    """Check that the frames are correlated with the previous frames and the run directory lives with the grids"""
+    streaming_directory = os.path.join(tmp_path, "streaming")
+    configuration = CorrelationConfiguration(correlation_pieces_count=8, streaming_directory=streaming_directory)
+
+    frame_sequence_correlation = FrameSequenceCorrelator(configuration).correlate_file(
+        os.path.join(tmp_path, "frame_%04d.png"))
+
+    assert frame_sequence_correlation.correlation_grids.shape[0] == len(frames) - 1
+    assert len(frame_sequence_correlation.frame_scores) == len(frames) - 1
+    assert len(os.listdir(streaming_directory)) == 1
+    del frame_sequence_correlation
+    gc.collect()
+    assert not os.listdir(streaming_directory)
+
+
+def test_pipeline_correlates_frames_with_source_image(tmp_path, frames):
+    """Check that the pipeline correlates frames of the frame source with the fixed source image"""
+    configuration = CorrelationConfiguration(
+        correlation_type=CorrelationTypes.TM_CCOEFF_NORMED, correlation_pieces_count=8,
+        frame_source_path=os.path.join(tmp_path, "frame_%04d.png"),
+        frame_reference_mode=FrameReferenceMode.FIXED_REFERENCE, streaming_directory=os.path.join(tmp_path, "runs"))
+    FigureContainer.add(ImageWrapper.create_image(frames[0], FigureType.SOURCE_IMAGE))
+
+    stages = list(CorrelationMapPipelineBuilder(configuration).start_correlation_building_pipeline())
+
+    frame_scores = FigureContainer.get(FigureType.FRAME_SCORES)
+    assert stages[-1].pipeline_progress == 100
+    assert len(frame_scores.frame_scores) == len(frames)
+    assert frame_scores.frame_scores[0] == pytest.approx(1.0)
+    assert np.all(np.diff(frame_scores.frame_scores) < 0)
@@ -0,0 +1,70 @@
+"""Tests of the fused rotation and cropping of the found source image"""
+import os
+
+import numpy as np
+import pytest
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.models.figures.image import ImageWrapper
+
+SAMPLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples")
+SAMPLES = (
+    ("raspberry/raspberry_small.png", "raspberry/raspberry_small_changed.png"),
+    ("raspberry_with_noise/raspberry_small_noise_10.png", "raspberry_with_noise/raspberry_small_changed_noise_10.png"),
+    ("space/2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg",
+     "space/2021-04-13T04-20-49_NGC_6188_Halpha_T-20_600s_cal_500.jpg"),
+)
+CORRELATION_TYPE = CorrelationTypes.TM_SQDIFF_NORMED
+
+
+def crop_center(image: ImageWrapper, crop_fraction: float) -> ImageWrapper:
+    """Return the central crop of the image with the given fraction of its sides"""
+    height, width = image.image.shape[:2]
+    crop_height, crop_width = int(height * crop_fraction), int(width * crop_fraction)
+    top, left = (height - crop_height) // 2, (width - crop_width) // 2
+    return ImageWrapper.create_image(
+        image.image[top:top + crop_height, left:left + crop_width].copy(), FigureType.SOURCE_IMAGE)
+
+
+@pytest.mark.parametrize("crop_fraction", [0.1, 0.5])
+@pytest.mark.parametrize("angle", [7.0, -30.0, 135.0])
+@pytest.mark.parametrize("source_path, destination_path", SAMPLES)
+def test_fused_crop_equals_crop_of_rotated_destination(source_path, destination_path, angle, crop_fraction):
+    """Check that the fused crop equals the crop found by the exhaustive search in the whole rotated destination"""
+    source_image = crop_center(
+        ImageWrapper(os.path.join(SAMPLES_DIRECTORY, source_path), FigureType.SOURCE_IMAGE), crop_fraction)
+    destination_image = ImageBuilder.rotate_image(
+        ImageWrapper(os.path.join(SAMPLES_DIRECTORY, destination_path), FigureType.DESTINATION_IMAGE), -angle)
+
+    image_selection = ImagesDescriber.find_rotated_image_points(
+        source_image, destination_image, angle, CORRELATION_TYPE)
+    fused_image = ImageBuilder.rotate_and_crop_image(destination_image, angle, image_selection)
+
+    rotated_image = ImageBuilder.rotate_image(destination_image, angle)
+    expected_image = ImageBuilder.crop_found_image(rotated_image, ImagesDescriber.find_image_points(
+        source_image, rotated_image, CORRELATION_TYPE, pyramid_levels=0))
+    assert fused_image.image.shape == expected_image.image.shape
+    assert np.abs(fused_image.image.astype(np.int16) - expected_image.image.astype(np.int16)).max() <= 1
+
+
+@pytest.mark.parametrize("pyramid_levels", [0, None])
+def test_fused_search_does_not_warp_whole_destination(monkeypatch, pyramid_levels):
+    """Check that the destination is warped as a whole only downscaled, full resolution warps cover the regions"""
+    source_path, destination_path = SAMPLES[0]
+    source_image = crop_center(ImageWrapper(os.path.join(SAMPLES_DIRECTORY, source_path), FigureType.SOURCE_IMAGE), 0.1)
+    destination_image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, destination_path), FigureType.DESTINATION_IMAGE)
+    warped_shapes: list[tuple[int, int]] = []
+    warp_affine_region = ImageBuilder.warp_affine_region
+
+    def record_warp_affine_region(image, matrix, region):
+        warped_shapes.append((region[3], region[2]))
+        return warp_affine_region(image, matrix, region)
+
+    monkeypatch.setattr(ImageBuilder, "warp_affine_region", record_warp_affine_region)
+    ImagesDescriber.find_rotated_image_points(source_image, destination_image, 7.0, CORRELATION_TYPE, pyramid_levels)
+
+    assert warped_shapes
+    assert destination_image.image.shape[:2] not in warped_shapes
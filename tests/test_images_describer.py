@@ -0,0 +1,78 @@
+"""Tests of the pyramid template search of the images describer"""
+import os
+
+import pytest
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.models.figures.image import ImageWrapper
+
+SAMPLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples")
+SAMPLES = (
+    ("arduino/arduino.jpg", "arduino/arduino_changed.jpg"),
+    ("raspberry/raspberry_small.png", "raspberry/raspberry_small_changed.png"),
+    ("raspberry_with_noise/raspberry_small_noise_10.png", "raspberry_with_noise/raspberry_small_changed_noise_10.png"),
+    ("space/2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg",
+     "space/2021-04-13T04-20-49_NGC_6188_Halpha_T-20_600s_cal_500.jpg"),
+)
+# Left and top of the crop relative to the image size and its size fraction
+CROPS = ((0.3, 0.6, 0.3), (0.6, 0.5, 0.2), (0.3, 0.2, 0.5))
+
+
+def crop_sample(sample_path: str, crop: tuple[float, float, float], angle: float = 0.0) -> ImageWrapper:
+    """Return the crop of the sample image rotated by the given angle"""
+    image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, sample_path), FigureType.SOURCE_IMAGE)
+    if angle:
+        image = ImageBuilder.rotate_image(image, angle)
+    height, width = image.image.shape[:2]
+    left, top, fraction = int(width * crop[0]), int(height * crop[1]), crop[2]
+    return ImageWrapper.create_image(
+        image.image[top:top + int(height * fraction), left:left + int(width * fraction)].copy(),
+        FigureType.SOURCE_IMAGE)
+
+
+@pytest.mark.parametrize("correlation_type", [CorrelationTypes.TM_CCOEFF_NORMED, CorrelationTypes.TM_SQDIFF])
+@pytest.mark.parametrize("crop", CROPS)
+@pytest.mark.parametrize("source_path, destination_path", SAMPLES)
+def test_pyramid_search_finds_exhaustive_search_region(source_path, destination_path, crop, correlation_type):
+    """Check that the pyramid search finds the crop of the sample in the changed sample as the exhaustive search"""
+    source_image = crop_sample(source_path, crop)
+    destination_image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, destination_path), FigureType.DESTINATION_IMAGE)
+
+    found_region = ImagesDescriber.find_image_points(source_image, destination_image, correlation_type)
+
+    expected_region = ImagesDescriber.find_image_points(
+        source_image, destination_image, correlation_type, pyramid_levels=0)
+    assert abs(found_region.x_1 - expected_region.x_1) <= 1
+    assert abs(found_region.y_1 - expected_region.y_1) <= 1
+
+
+def test_pyramid_search_refines_several_coarse_candidates():
+    """Check that the repeated pattern which is the best one on the coarse level doesn't hide the exhaustive region"""
+    source_image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, SAMPLES[1][0]), FigureType.SOURCE_IMAGE)
+    source_image = ImageWrapper.create_image(source_image.image[438:654, 379:763].copy(), FigureType.SOURCE_IMAGE)
+    destination_image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, SAMPLES[1][1]), FigureType.DESTINATION_IMAGE)
+
+    found_region = ImagesDescriber.find_image_points(
+        source_image, destination_image, CorrelationTypes.TM_CCOEFF_NORMED)
+
+    assert (found_region.x_1, found_region.y_1) == (379, 438)
+
+
+@pytest.mark.parametrize("angle", [5.0, -30.0])
+@pytest.mark.parametrize("source_path, destination_path", SAMPLES[1:])
+def test_rotated_pyramid_search_finds_exhaustive_search_region(source_path, destination_path, angle):
+    """Check that the pyramid search in the rotated changed sample finds the region of the exhaustive search"""
+    source_image = crop_sample(source_path, CROPS[2], angle)
+    destination_image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, destination_path), FigureType.DESTINATION_IMAGE)
+
+    found_region = ImagesDescriber.find_rotated_image_points(
+        source_image, destination_image, angle, CorrelationTypes.TM_CCOEFF_NORMED)
+
+    expected_region = ImagesDescriber.find_image_points(
+        source_image, ImageBuilder.rotate_image(destination_image, angle), CorrelationTypes.TM_CCOEFF_NORMED,
+        pyramid_levels=0)
+    assert abs(found_region.x_1 - expected_region.x_1) <= 1
+    assert abs(found_region.y_1 - expected_region.y_1) <= 1
@@ -0,0 +1,40 @@
+"""Tests of the phase correlation registrator"""
+import os
+
+import pytest
+
+from correlation_map.core.config.correlation import CorrelationTypes
+from correlation_map.core.config.figure_types import FigureType
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.images_describer import ImagesDescriber
+from correlation_map.core.images.phase_correlation_registrator import PhaseCorrelationRegistrator
+from correlation_map.core.models.figures.image import ImageWrapper
+
+SAMPLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples")
+SAMPLES = (
+    "raspberry/raspberry_small.png",
+    "raspberry_with_noise/raspberry_small_noise_10.png",
+    "space/2021-04-13T04-09-51_NGC_6188_Halpha_T-20_600s_cal_500.jpg",
+    "noise/white_noise_100_1.png",
+)
+
+
+@pytest.mark.parametrize("angle", [7.0, -20.0, 135.0])
+@pytest.mark.parametrize("sample_path", SAMPLES)
+def test_register_finds_rotation_and_position(sample_path, angle):
+    """Check that the central crop of the sample is registered in the rotated sample"""
+    image = ImageWrapper(os.path.join(SAMPLES_DIRECTORY, sample_path), FigureType.SOURCE_IMAGE)
+    height, width = image.image.shape[:2]
+    top, left = height // 5, width // 5
+    source_image = ImageWrapper.create_image(
+        image.image[top:height - top, left:width - left].copy(), FigureType.SOURCE_IMAGE)
+    destination_image = ImageBuilder.rotate_image(image, angle)
+
+    found_angle, found_region = PhaseCorrelationRegistrator.register(source_image, destination_image)
+
+    expected_region = ImagesDescriber.find_image_points(
+        source_image, ImageBuilder.rotate_image(destination_image, -angle), CorrelationTypes.TM_CCOEFF_NORMED,
+        pyramid_levels=0)
+    assert abs(found_angle + angle) < 0.5
+    assert abs(found_region.x_1 - expected_region.x_1) <= 1
+    assert abs(found_region.y_1 - expected_region.y_1) <= 1
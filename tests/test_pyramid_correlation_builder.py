@@ -0,0 +1,30 @@
+"""Tests of the pyramid correlation builder"""
+import cv2
+import numpy as np
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes
+from correlation_map.core.correlation.band_correlation_builder import ThreadPoolCorrelationBuilder
+from correlation_map.core.correlation.pyramid_correlation_builder import PyramidCorrelationBuilder
+
+REFINEMENT_THRESHOLD = 1e-3
+
+
+def test_not_refined_blocks_error_is_bounded():
+    """Check that refined blocks are exact and not refined blocks are not crossing the threshold"""
+    random_generator = np.random.default_rng(0)
+    source_matrix = cv2.GaussianBlur(random_generator.random((256, 256), dtype=np.float32), (0, 0), 3) * 4
+    destination_matrix = source_matrix + random_generator.normal(0, 0.01, source_matrix.shape).astype(np.float32)
+    destination_matrix[100:130, 60:90] += 0.5 * random_generator.random((30, 30), dtype=np.float32)
+    configuration = CorrelationConfiguration(correlation_pieces_count=8, refinement_threshold=REFINEMENT_THRESHOLD)
+
+    pyramid_builder = PyramidCorrelationBuilder(CorrelationTypes.TM_SQDIFF_NORMED, configuration)
+    _, correlation_grid = pyramid_builder.build(source_matrix, destination_matrix)
+
+    _, expected_grid = ThreadPoolCorrelationBuilder(CorrelationTypes.TM_SQDIFF_NORMED, configuration).build(
+        source_matrix, destination_matrix)
+    refined_mask = pyramid_builder.refined_mask
+    assert 0 < pyramid_builder.refined_fraction < 1
+    assert refined_mask.shape == expected_grid.shape
+    np.testing.assert_allclose(correlation_grid[refined_mask], expected_grid[refined_mask], rtol=1e-5, atol=1e-7)
+    assert np.all(expected_grid[~refined_mask] < REFINEMENT_THRESHOLD)
+    assert np.all(np.abs(correlation_grid[~refined_mask] - expected_grid[~refined_mask]) < REFINEMENT_THRESHOLD / 10)
@@ -0,0 +1,89 @@
+"""Tests of the streaming correlation builder"""
+import gc
+import os
+
+import cv2
+import numpy as np
+
+from correlation_map.core.config.correlation import CorrelationConfiguration, CorrelationTypes, GrayConversionModes
+from correlation_map.core.correlation.band_correlation_builder import ThreadPoolCorrelationBuilder
+from correlation_map.core.correlation.streaming_correlation_builder import StreamingCorrelationBuilder
+from correlation_map.core.images.image_builder import ImageBuilder
+from correlation_map.core.images.image_strip_reader import ImageStripReader
+from correlation_map.core.models.figures.correlation_map import CorrelationMap
+from correlation_map.core.models.figures.image import ImageWrapper
+
+
+def test_build_creates_missing_streaming_directory(tmp_path):
+    """Check that the missing streaming directory is created and the streamed grid equals the in-memory one"""
+    streaming_directory = os.path.join(tmp_path, "missing", "streaming")
+    configuration = CorrelationConfiguration(
+        correlation_pieces_count=8, streaming_block_rows=3, streaming_directory=streaming_directory)
+    random_generator = np.random.default_rng(0)
+    source_matrix = random_generator.random((64, 48), dtype=np.float32)
+    destination_matrix = random_generator.random((64, 48), dtype=np.float32)
+
+    builder = StreamingCorrelationBuilder(CorrelationTypes.TM_CCOEFF_NORMED, configuration)
+    _, correlation_grid = builder.build(ImageStripReader(source_matrix), ImageStripReader(destination_matrix))
+
+    _, expected_grid = ThreadPoolCorrelationBuilder(CorrelationTypes.TM_CCOEFF_NORMED, configuration).build(
+        source_matrix, destination_matrix)
+    assert os.path.isdir(streaming_directory)
+    assert os.listdir(streaming_directory)
+    np.testing.assert_allclose(correlation_grid, expected_grid, rtol=1e-5, atol=1e-6)
+
+
+def write_images(directory) -> tuple[str, str]:
+    """Write random RGB source and destination images with different channels to the directory"""
+    random_generator = np.random.default_rng(0)
+    paths = os.path.join(directory, "source.png"), os.path.join(directory, "destination.png")
+    for path in paths:
+        cv2.imwrite(path, random_generator.integers(0, 256, (64, 48, 3), dtype=np.uint8))
+    return paths
+
+
+def test_strip_reader_reads_rgb_strips_from_file(tmp_path):
+    """Check that the file strips are RGB like the image wrapper matrix"""
+    source_path, _ = write_images(tmp_path)
+    reader = ImageStripReader.from_file(
+        source_path, str(tmp_path), GrayConversionModes.REC_601, np.dtype(np.float64))
+
+    expected_matrix = ImageBuilder.get_gray_matrix(
+        ImageWrapper(source_path).image, GrayConversionModes.REC_601, np.float64)
+    assert isinstance(reader.image_matrix, np.memmap)
+    np.testing.assert_allclose(reader.read_gray_strip(8, 24), expected_matrix[8:24])
+
+
+def test_streaming_map_reads_image_files_by_strips(tmp_path):
+    """Check that the streaming map reads not read images from files and runs don't share their directories"""
+    source_path, destination_path = write_images(tmp_path)
+    streaming_directory = os.path.join(tmp_path, "streaming")
+    configuration = CorrelationConfiguration(
+        correlation_pieces_count=8, streaming_block_rows=3, streaming_directory=streaming_directory)
+    source_image, destination_image = ImageWrapper(source_path), ImageWrapper(destination_path)
+
+    correlation_map = CorrelationMap(source_image, destination_image, CorrelationTypes.TM_CCOEFF_NORMED, configuration)
+    correlation_map.build_correlation_map()
+    correlation_grid = np.array(correlation_map.correlation_grid)
+    other_map = CorrelationMap(ImageWrapper(destination_path), ImageWrapper(source_path),
+                               CorrelationTypes.TM_CCOEFF_NORMED, configuration)
+    other_map.build_correlation_map()
+
+    expected_map = CorrelationMap(
+        ImageWrapper(source_path), ImageWrapper(destination_path), CorrelationTypes.TM_CCOEFF_NORMED,
+        CorrelationConfiguration(correlation_pieces_count=8))
+    expected_map.build_correlation_map()
+    assert not source_image.is_image_read and not destination_image.is_image_read
+    np.testing.assert_allclose(correlation_map.correlation_grid, expected_map.correlation_grid, rtol=1e-6)
+    np.testing.assert_array_equal(correlation_map.correlation_grid, correlation_grid)
+    assert len(os.listdir(streaming_directory)) == 2
+    del correlation_map, other_map
+    gc.collect()
+    assert not os.listdir(streaming_directory)
+
+
+def test_builder_without_arrays_creates_no_directory(tmp_path):
+    """Check that the run directory is created only when the builder writes arrays"""
+    configuration = CorrelationConfiguration(streaming_block_rows=3, streaming_directory=str(tmp_path))
+    StreamingCorrelationBuilder(CorrelationTypes.TM_CCOEFF_NORMED, configuration)
+    assert not os.listdir(tmp_path)